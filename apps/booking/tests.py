@@ -177,3 +177,42 @@ class BookingStatsApiTests(APITestCase):
         payload = response.json()
         self.assertEqual(payload["summary"]["total_revenue"], 50.0)
         self.assertEqual(payload["summary"]["total_bookings"], 1)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.data = _seed_data()
+        self.client.force_authenticate(user=self.data["admin"])
+
+    def test_rental_slot_list_and_retrieve(self):
+        url = reverse("rentalslot-list")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        # 304 chỉ tốn 1 query aggregate, không serialize
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        slot = RentalSlot.objects.create(name="Slot 2", time_slot="17:00-18:00")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        slot.delete()
+        self.assertNotEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        detail_url = reverse("rentalslot-detail", args=[RentalSlot.objects.get().id])
+        last_modified = self.client.get(detail_url)["Last-Modified"]
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_stats_follow_bookings_and_user(self):
+        url = reverse("booking_stats")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # ETag theo user: quyền khác nhau thì số liệu khác nhau
+        self.client.force_authenticate(user=self.data["owner1"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.client.force_authenticate(user=self.data["admin"])
+        booking = Booking.objects.filter(status=StatusBookingEnum.PENDING.value).first()
+        booking.status = StatusBookingEnum.CONFIRMED.value
+        booking.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
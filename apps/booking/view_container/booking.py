@@ -6,15 +6,18 @@ from apps.booking.serializers import (
     BookingBulkCreateSerializer, BookingUpdateSerializer, BookingBulkCreateMonthSerializer
 )
 from apps.booking.view_container.filter import BookingFilter
+from apps.depends.throttling import BookingWriteThrottle
 from apps.user.view_container import (
     Response, IsUser, ModelViewSet, status, IsOwner,
     LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, OrderingFilter, RoleSystemEnum,
     AppStatus, action
 )
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class BookingViewSet(ModelViewSet):
+class BookingViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
+    throttle_classes = [BookingWriteThrottle]
     queryset = Booking.objects.all()
     pagination_class = LimitOffsetPagination
     parser_classes = [MultiPartParser, FormParser]
@@ -22,6 +25,8 @@ class BookingViewSet(ModelViewSet):
     filterset_class = BookingFilter
     ordering_fields = ['price', 'booking_date', 'status', 'created_at']
     ordering = ('booking_date', )
+    # Payload kèm tên user/sân/khung giờ: ETag theo cả updated_at của các bản ghi đó
+    last_modified_fields = ('updated_at', 'user__updated_at', 'sport_field__updated_at', 'rental_slot__updated_at')
 
     def get_queryset(self):
         return Booking.objects.select_related('user', 'sport_field', 'rental_slot')
@@ -61,7 +66,7 @@ class BookingViewSet(ModelViewSet):
         return Response(serializer.data)
 
 
-class BookingListTiniViewSet(ModelViewSet):
+class BookingListTiniViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
     queryset = Booking.objects.all()
     serializer_class = BookingListTiniSerializer
@@ -71,6 +76,7 @@ class BookingListTiniViewSet(ModelViewSet):
     filterset_class = BookingFilter
     ordering_fields = ['price', 'booking_date', 'status', 'created_at']
     ordering = ('booking_date',)
+    last_modified_fields = ('updated_at', 'rental_slot__updated_at')
 
     def get_queryset(self):
         return Booking.objects.select_related('rental_slot')
@@ -12,15 +12,33 @@ from drf_yasg.utils import swagger_auto_schema
 from apps.depends.oauth2 import IsUser
 from apps.booking.models import Booking
 from apps.sport_center.models import SportCenter, SportField
+from apps.sport_center.search import area_filter
 from apps.utils.enum_type import StatusBookingEnum, StatusFieldEnum
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class BookingAvailableView(APIView):
+class BookingAvailableView(ConditionalGetMixin, APIView):
     """
     API lấy danh sách booking PENDING (sân trống) theo format nested
     Format: sport_center -> sport_field[] -> rental_slot[] (time_slot)
     """
     permission_classes = [IsUser]
+    last_modified_fields = ('updated_at', 'sport_field__updated_at', 'sport_field__sport_center__updated_at',
+                            'rental_slot__updated_at')
+
+    def get_booking_date(self):
+        try:
+            return date.fromisoformat(self.request.query_params.get('booking_date') or date.today().isoformat())
+        except ValueError:
+            return None
+
+    def get_validator_queryset(self):
+        # Mọi booking của ngày (kể cả đã đặt): đổi trạng thái cũng đổi updated_at
+        return Booking.objects.filter(booking_date=self.get_booking_date())
+
+    def get_etag_parts(self):
+        # Không truyền booking_date thì là hôm nay: cùng URL nhưng khác ngày
+        return (self.get_booking_date(),)
 
     @swagger_auto_schema(
         operation_summary="Lấy danh sách sân trống (booking PENDING)",
@@ -126,11 +144,8 @@ class BookingAvailableView(APIView):
 
         # Lọc theo địa chỉ nếu có
         if address_filter:
-            bookings = bookings.filter(
-                sport_field__sport_center__address__icontains=address_filter
-            ) | bookings.filter(
-                sport_field__address__icontains=address_filter
-            )
+            # Tên quận/huyện: so sánh bằng trên cột district; địa chỉ khác: tìm không dấu (index trigram/FTS5)
+            bookings = bookings.filter(area_filter(address_filter))
 
         # Group by (sport_center, booking_date) -> sport_field -> rental_slot
         result_dict = {}
@@ -4,15 +4,18 @@ from apps.booking.serializers import (
     BookingBulkCreateSerializer, BookingBulkCreateMonthSerializer
 )
 from apps.booking.view_container.filter import BookingFilter, BookingManageFilter
+from apps.depends.throttling import BookingWriteThrottle
 from apps.user.view_container import (
     Response, IsUser, ModelViewSet, status, IsOwner,
     LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, OrderingFilter, RoleSystemEnum,
     AppStatus, action
 )
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class BookingManageViewSet(ModelViewSet):
+class BookingManageViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
+    throttle_classes = [BookingWriteThrottle]
     queryset = Booking.objects.all()
     pagination_class = LimitOffsetPagination
     parser_classes = [MultiPartParser, FormParser]
@@ -20,6 +23,9 @@ class BookingManageViewSet(ModelViewSet):
     filterset_class = BookingManageFilter
     ordering_fields = ['price', 'booking_date', 'status', 'created_at']
     ordering = ('booking_date', )
+    # Payload kèm tên user/sân/trung tâm/khung giờ: ETag theo cả updated_at của các bản ghi đó
+    last_modified_fields = ('updated_at', 'user__updated_at', 'sport_field__updated_at',
+                            'sport_field__sport_center__updated_at', 'rental_slot__updated_at')
 
     def get_queryset(self):
         user = self.request.user
@@ -8,9 +8,10 @@ from apps.user.view_container import (
     LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, OrderingFilter, RoleSystemEnum,
     AppStatus
 )
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class RentalSlotViewSet(ModelViewSet):
+class RentalSlotViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
     queryset = RentalSlot.objects.all()
     pagination_class = LimitOffsetPagination
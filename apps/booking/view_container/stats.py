@@ -1,3 +1,4 @@
+from apps.booking.models import Booking
 from apps.booking.serializers import BookingStatsQuerySerializer
 from apps.booking.utils.stats import get_booking_stats
 from apps.user.view_container import (
@@ -7,10 +8,12 @@ from apps.user.view_container import (
     swagger_auto_schema,
     status,
     IsOwner,
+    timezone,
 )
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class BookingStatsView(APIView):
+class BookingStatsView(ConditionalGetMixin, APIView):
     """
     API thống kê doanh thu/booking cho admin & chủ sân.
     - Admin xem tất cả.
@@ -18,6 +21,15 @@ class BookingStatsView(APIView):
     """
 
     permission_classes = [IsOwner]
+    last_modified_fields = ('updated_at', 'sport_field__updated_at', 'sport_field__sport_center__updated_at')
+
+    def get_validator_queryset(self):
+        # 1 query aggregate thay cho toàn bộ các query thống kê
+        return Booking.objects.all()
+
+    def get_etag_parts(self):
+        # Preset (hôm nay, 7 ngày...) tính theo ngày hiện tại
+        return (timezone.localdate(),)
 
     @swagger_auto_schema(
         operation_summary="Thống kê booking/doanh thu",
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from .models import ChatSession, ChatMessage
 
 
@@ -8,10 +9,14 @@ class ChatSessionAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['session_id', 'user__username', 'user__email']
     readonly_fields = ['session_id', 'created_at', 'updated_at']
-    
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user').annotate(_message_count=Count('messages'))
+
     def message_count(self, obj):
-        return obj.messages.count()
+        return obj._message_count
     message_count.short_description = 'Số tin nhắn'
+    message_count.admin_order_field = '_message_count'
 
 
 @admin.register(ChatMessage)
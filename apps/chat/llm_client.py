@@ -0,0 +1,306 @@
+"""
+Client gọi LLM (FPT AI - API tương thích OpenAI) có:
+- Timeout connect/read rõ ràng và connection pool keep-alive giới hạn
+- Retry với backoff ngẫu nhiên (full jitter) cho lỗi tạm thời
+- Circuit breaker: upstream lỗi liên tục thì fail nhanh để trả lời dự phòng thay vì giữ worker
+- Metrics độ trễ/lỗi trong process
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from django.conf import settings
+from openai import (
+    OpenAI, APIConnectionError, APIStatusError, InternalServerError, RateLimitError,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class LLMUnavailableError(Exception):
+    """
+    LLM không trả lời được (circuit đang mở, hết số lần retry hoặc lỗi không retry được)
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker 3 trạng thái:
+    - CLOSED: gọi bình thường, đếm số lỗi liên tiếp
+    - OPEN: đủ `failure_threshold` lỗi liên tiếp -> chặn mọi request trong `reset_timeout` giây
+    - HALF_OPEN: hết thời gian chờ -> cho 1 request thử, thành công thì CLOSED, lỗi thì OPEN lại
+    """
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # HALF_OPEN: chỉ cho 1 request thử tại một thời điểm
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """
+        Kết thúc request thử mà không đánh giá upstream (ví dụ lỗi 400 do request)
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("LLM circuit breaker opened after %s failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+
+class LLMMetrics:
+    """
+    Bộ đếm request/lỗi và thống kê độ trễ (giữ `window` mẫu gần nhất để tính percentile)
+    """
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters = {
+                'requests': 0,
+                'successes': 0,
+                'failures': 0,
+                'retries': 0,
+                'timeouts': 0,
+                'short_circuited': 0,
+            }
+            self.errors = {}
+            self._latencies.clear()
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, latency: float, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self.counters['requests'] += 1
+            self._latencies.append(latency)
+            if error is None:
+                self.counters['successes'] += 1
+                return
+            self.counters['failures'] += 1
+            if isinstance(error, httpx.TimeoutException) or 'Timeout' in type(error).__name__:
+                self.counters['timeouts'] += 1
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self.counters)
+            errors = dict(self.errors)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 1)
+
+        return {
+            **counters,
+            'errors': errors,
+            'latency_ms': {
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(latencies[-1] * 1000, 1) if latencies else None,
+                'samples': len(latencies),
+            },
+        }
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (APIConnectionError, RateLimitError, InternalServerError)):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES or exc.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class LLMClient:
+    """
+    Wrapper quanh OpenAI client. OpenAI client được tạo lazy ở lần gọi đầu tiên
+    (không cần API key lúc import, dễ trỏ sang stub server khi test)
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: Optional[str],
+        model: Optional[str],
+        connect_timeout: float = 3.0,
+        read_timeout: float = 30.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4.0,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[LLMMetrics] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or LLMMetrics()
+        self.sleep = sleep
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        max_retries=0,  # Retry do wrapper xử lý (có jitter + circuit breaker)
+                        http_client=httpx.Client(timeout=self.timeout, limits=self.limits),
+                    )
+        return self._client
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full jitter: ngẫu nhiên trong [0, min(backoff_max, backoff_base * 2^attempt)]
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def chat(self, messages: List[Dict[str, str]], **params) -> str:
+        """
+        Gọi chat completion, trả về nội dung câu trả lời.
+        Raise LLMUnavailableError nếu circuit đang mở hoặc gọi thất bại.
+        """
+        if not self.breaker.allow_request():
+            self.metrics.incr('short_circuited')
+            raise LLMUnavailableError("LLM circuit breaker is open")
+
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                resp = self.client.chat.completions.create(model=self.model, messages=messages, **params)
+            except Exception as exc:
+                self.metrics.observe(time.perf_counter() - started, exc)
+                retryable = is_retryable(exc)
+                if retryable and attempt < self.max_retries:
+                    self.metrics.incr('retries')
+                    self.sleep(self.backoff(attempt))
+                    continue
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release()
+                logger.warning("LLM call failed after %s attempt(s): %r", attempt + 1, exc)
+                raise LLMUnavailableError(str(exc)) from exc
+
+            self.metrics.observe(time.perf_counter() - started)
+            self.breaker.record_success()
+            return resp.choices[0].message.content
+
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def build_llm_client() -> LLMClient:
+    return LLMClient(
+        api_key=settings.FPT_API_KEY,
+        base_url=settings.FPT_URL_API,
+        model=settings.FPT_MODEL_NAME,
+        connect_timeout=settings.FPT_CONNECT_TIMEOUT,
+        read_timeout=settings.FPT_READ_TIMEOUT,
+        max_connections=settings.FPT_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.FPT_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.FPT_POOL_KEEPALIVE_EXPIRY,
+        max_retries=settings.FPT_MAX_RETRIES,
+        backoff_base=settings.FPT_RETRY_BACKOFF,
+        backoff_max=settings.FPT_RETRY_BACKOFF_MAX,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.CHAT_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.CHAT_BREAKER_RESET_SECONDS,
+        ),
+    )
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Client dùng chung trong process (giữ connection pool và trạng thái circuit breaker)
+    """
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = build_llm_client()
+    return _llm_client
+
+
+def get_llm_metrics() -> Dict[str, Any]:
+    llm_client = get_llm_client()
+    return {
+        'circuit_state': llm_client.breaker.state,
+        **llm_client.metrics.snapshot(),
+    }
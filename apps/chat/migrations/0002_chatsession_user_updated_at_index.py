@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['user', '-updated_at'], name='chat_chatse_user_id_40a24e_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_chatsession_user_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session', 'id'], name='chat_chatme_session_dc4dbc_idx'),
+        ),
+    ]
@@ -25,6 +25,7 @@ class ChatSession(models.Model):
         indexes = [
             models.Index(fields=['session_id']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', '-updated_at']),
         ]
 
     def __str__(self):
@@ -56,6 +57,7 @@ class ChatMessage(models.Model):
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['session', 'created_at']),
+            models.Index(fields=['session', 'id']),
         ]
 
     def __str__(self):
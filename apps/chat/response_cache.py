@@ -0,0 +1,188 @@
+"""
+Cache câu trả lời chatbot cho các câu hỏi lặp lại (giá sân, cách đặt sân, ...)
+
+Key cache gồm: câu hỏi đã chuẩn hóa + version snapshot sân trống + ngày hiện tại.
+- Tầng 1: tra cứu chính xác theo key
+- Tầng 2 (tùy chọn): so khớp gần đúng bằng n-gram ký tự, không cần service bên ngoài; chỉ giữa
+  các câu hỏi có cùng số/giờ ("5 người" khác "7 người", "17:00" khác "19:00")
+"""
+import hashlib
+import json
+import re
+import unicodedata
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_PREFIX = 'chat:answer'
+NUMBER_RE = re.compile(r'\d+(?:[:h.,]\d+)*')
+STAT_EXACT_HIT = 'exact_hit'
+STAT_SIMILAR_HIT = 'similar_hit'
+STAT_MISS = 'miss'
+STAT_STORE = 'store'
+STAT_NAMES = (STAT_EXACT_HIT, STAT_SIMILAR_HIT, STAT_MISS, STAT_STORE)
+
+
+def _cache():
+    return caches[settings.CHAT_CACHE_ALIAS]
+
+
+def normalize_question(question: str) -> str:
+    """
+    Chuẩn hóa câu hỏi: NFC, chữ thường, bỏ dấu câu, gộp khoảng trắng.
+    Giữ nguyên dấu tiếng Việt vì dấu làm thay đổi nghĩa câu hỏi.
+    """
+    text = unicodedata.normalize('NFC', question or '').lower()
+    text = re.sub(r'[^\w\s:-]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def fold_accents(text: str) -> str:
+    """
+    Bỏ dấu tiếng Việt ("sân trống" -> "san trong"), dùng cho tầng so khớp gần đúng
+    """
+    text = unicodedata.normalize('NFD', text).replace('đ', 'd').replace('Đ', 'D')
+    return ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+
+
+def char_ngrams(text: str, n: int = 3) -> set:
+    padded = f" {fold_accents(text)} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def ngram_similarity(left: str, right: str) -> float:
+    """
+    Độ tương đồng Jaccard trên tập trigram ký tự (0..1)
+    """
+    left_grams, right_grams = char_ngrams(left), char_ngrams(right)
+    union = left_grams | right_grams
+    if not union:
+        return 0.0
+    return len(left_grams & right_grams) / len(union)
+
+
+def number_tokens(text: str) -> list:
+    """
+    Các số/giờ trong câu hỏi ("sân 5 người lúc 17:00" -> ['17:00', '5'])
+    """
+    return sorted(NUMBER_RE.findall(text))
+
+
+def availability_version(available_bookings: Optional[List[Dict]]) -> str:
+    """
+    Version của snapshot sân trống: đổi khi có sân được đặt/mở thêm,
+    nên câu trả lời cũ tự động hết hiệu lực
+    """
+    payload = json.dumps(available_bookings or [], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _bucket(available_bookings: Optional[List[Dict]]) -> str:
+    return f"{date.today().isoformat()}:{availability_version(available_bookings)}"
+
+
+def _answer_key(bucket: str, normalized: str) -> str:
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+    return f"{CACHE_PREFIX}:{bucket}:{digest}"
+
+
+def _index_key(bucket: str) -> str:
+    return f"{CACHE_PREFIX}:index:{bucket}"
+
+
+def _stat_key(name: str) -> str:
+    return f"{CACHE_PREFIX}:stats:{name}"
+
+
+def _incr_stat(name: str) -> None:
+    cache = _cache()
+    key = _stat_key(name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_cached_answer(question: str, available_bookings: Optional[List[Dict]] = None) -> Optional[str]:
+    """
+    Tìm câu trả lời đã cache cho câu hỏi. Trả về None nếu không có.
+    """
+    if not settings.CHAT_CACHE_ENABLED:
+        return None
+
+    normalized = normalize_question(question)
+    if not normalized:
+        return None
+
+    cache = _cache()
+    bucket = _bucket(available_bookings)
+
+    answer = cache.get(_answer_key(bucket, normalized))
+    if answer is not None:
+        _incr_stat(STAT_EXACT_HIT)
+        return answer
+
+    if settings.CHAT_CACHE_SIMILARITY_THRESHOLD < 1:
+        best_key, best_score = None, 0.0
+        numbers = number_tokens(normalized)
+        for cached_question, cached_key in cache.get(_index_key(bucket), []):
+            # Khác số người/giờ/ngày thì câu trả lời khác, dù câu chữ gần giống
+            if number_tokens(cached_question) != numbers:
+                continue
+            score = ngram_similarity(normalized, cached_question)
+            if score > best_score:
+                best_key, best_score = cached_key, score
+        if best_key and best_score >= settings.CHAT_CACHE_SIMILARITY_THRESHOLD:
+            answer = cache.get(best_key)
+            if answer is not None:
+                _incr_stat(STAT_SIMILAR_HIT)
+                return answer
+
+    _incr_stat(STAT_MISS)
+    return None
+
+
+def store_answer(question: str, answer: str, available_bookings: Optional[List[Dict]] = None) -> None:
+    """
+    Lưu câu trả lời vào cache và thêm câu hỏi vào index của tầng so khớp gần đúng
+    """
+    if not settings.CHAT_CACHE_ENABLED or not answer:
+        return
+
+    normalized = normalize_question(question)
+    if not normalized:
+        return
+
+    cache = _cache()
+    bucket = _bucket(available_bookings)
+    key = _answer_key(bucket, normalized)
+    cache.set(key, answer, timeout=settings.CHAT_CACHE_TTL)
+
+    index_key = _index_key(bucket)
+    index = [item for item in cache.get(index_key, []) if item[1] != key]
+    index.append((normalized, key))
+    cache.set(index_key, index[-settings.CHAT_CACHE_INDEX_SIZE:], timeout=settings.CHAT_CACHE_TTL)
+    _incr_stat(STAT_STORE)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Thống kê hit-rate của cache
+    """
+    cache = _cache()
+    values = cache.get_many([_stat_key(name) for name in STAT_NAMES])
+    stats = {name: values.get(_stat_key(name), 0) for name in STAT_NAMES}
+    lookups = stats[STAT_EXACT_HIT] + stats[STAT_SIMILAR_HIT] + stats[STAT_MISS]
+    hits = stats[STAT_EXACT_HIT] + stats[STAT_SIMILAR_HIT]
+    stats['lookups'] = lookups
+    stats['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats() -> None:
+    _cache().delete_many([_stat_key(name) for name in STAT_NAMES])
@@ -3,20 +3,28 @@ Service xử lý logic chatbot với chat history và lệnh tùy chỉnh
 """
 from dataclasses import dataclass
 import json
+import logging
+import uuid
 from typing import Any, Dict, List, Optional
 from datetime import date
 from collections import defaultdict
 
 from django.conf import settings
-from openai import OpenAI
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
 
 from apps.booking.models import Booking
+from apps.chat.llm_client import LLMUnavailableError, get_llm_client
 from apps.chat.models import ChatSession, ChatMessage
+from apps.chat.response_cache import fold_accents, get_cached_answer, normalize_question, store_answer
+from apps.jobs.services import enqueue
 from apps.sport_center.models import SportField
+from apps.sport_center.search import area_filter
 from apps.user.models import User
 from apps.utils.enum_type import StatusBookingEnum, StatusFieldEnum
 
-client = OpenAI(api_key=settings.FPT_API_KEY, base_url=settings.FPT_URL_API)
+logger = logging.getLogger(__name__)
 
 SYSTEM_CONTEXT = """
 Bạn là chatbot hỗ trợ khách hàng của trang web DaiHiep Sport.
@@ -112,12 +120,67 @@ Khi người dùng muốn đặt sân, bạn cần hướng dẫn họ:
 
 
 
+def resolve_session(session_id: Optional[str], user: Optional[User]) -> ChatSession:
+    """
+    Lấy session theo session_id (1 query). Session mới chỉ được khởi tạo trong bộ nhớ,
+    việc INSERT dồn vào save_chat_turn cùng transaction với messages.
+    - Không có/không tìm thấy session_id: tạo session mới
+    - Session thuộc user khác (user đã đổi tài khoản): tạo session mới
+    - Session anonymous: gán user hiện tại (lưu khi save_chat_turn)
+    """
+    session = None
+    if session_id:
+        try:
+            session = ChatSession.objects.filter(session_id=session_id).first()
+        except (ValidationError, ValueError):
+            session = None
+
+    if session is None or (user and session.user_id and session.user_id != user.pk):
+        return ChatSession(user=user, session_id=uuid.uuid4())
+
+    if user and not session.user_id:
+        session.user = user
+    return session
+
+
+def save_chat_turn(session: ChatSession, question: str, answer: str) -> None:
+    """
+    Ghi một lượt chat trong 1 transaction: upsert session + bulk_create 2 messages
+    """
+    with transaction.atomic():
+        if session.pk is None:
+            session.save()
+        else:
+            ChatSession.objects.filter(pk=session.pk).update(user=session.user_id, updated_at=timezone.now())
+        ChatMessage.objects.bulk_create([
+            ChatMessage(session_id=session.pk, role="user", content=question),
+            ChatMessage(session_id=session.pk, role="assistant", content=answer),
+        ])
+
+
+def persist_chat_turn(session: ChatSession, question: str, answer: str) -> None:
+    """
+    Lưu lượt chat. Nếu bật CHAT_DEFER_PERSIST thì messages được ghi ở hàng đợi nền sau khi trả response;
+    session mới vẫn được tạo ngay để request tiếp theo tìm thấy session_id.
+    """
+    if not settings.CHAT_DEFER_PERSIST:
+        save_chat_turn(session, question, answer)
+        return
+
+    if session.pk is None:
+        session.save()
+    enqueue('chat.save_chat_turn', args=(session.pk, question, answer), user=session.user)
+
+
 def load_chat_history(session: ChatSession, limit: int = 20) -> List[Dict[str, str]]:
     """
     Load lịch sử chat từ database
     Trả về danh sách messages theo format OpenAI: [{"role": "user", "content": "..."}, ...]
     """
-    messages = ChatMessage.objects.filter(session=session).order_by('created_at')[:limit]
+    if session.pk is None:
+        return []
+
+    messages = ChatMessage.objects.filter(session=session).order_by('created_at', 'id')[:limit]
     
     history = []
     for msg in messages:
@@ -158,11 +221,8 @@ def get_available_bookings(booking_date: Optional[str] = None, address_filter: O
 
         # 3. Lọc theo địa chỉ nếu có
         if address_filter and address_filter.strip():
-            bookings = bookings.filter(
-                sport_field__sport_center__address__icontains=address_filter
-            ) | bookings.filter(
-                sport_field__address__icontains=address_filter
-            )
+            # Tên quận/huyện: so sánh bằng trên cột district; địa chỉ khác: tìm không dấu (index trigram/FTS5)
+            bookings = bookings.filter(area_filter(address_filter))
 
         # 4. Group by (sport_center, booking_date) -> sport_field -> rental_slot
         # Structure: {(center_id, booking_date): {center_info, fields: {field_id: {field_info, slots: set()}}}}
@@ -513,6 +573,53 @@ def create_booking_from_intent(
         return {'error': f'Lỗi khi đặt sân: {str(e)}'}
 
 
+def build_fallback_answer(question: str, available_bookings: Optional[List[Dict]] = None, limit: int = 5) -> str:
+    """
+    Câu trả lời dự phòng theo luật khi không gọi được LLM:
+    liệt kê sân trống (ưu tiên trung tâm có tên/địa chỉ xuất hiện trong câu hỏi) và hướng dẫn đặt sân
+    """
+    # Chỉ giữ sân còn khung giờ trống, trung tâm không còn sân nào thì bỏ
+    available_bookings = [
+        {**item, 'sport_field': [field for field in item.get('sport_field') or [] if field.get('rental_slot')]}
+        for item in available_bookings or []
+    ]
+    available_bookings = [item for item in available_bookings if item['sport_field']]
+    if not available_bookings:
+        return (
+            "Xin lỗi, trợ lý AI đang tạm thời quá tải và hiện chưa có sân trống nào trong hệ thống. "
+            "Bạn vui lòng thử lại sau ít phút nhé!"
+        )
+
+    folded_question = fold_accents(normalize_question(question))
+
+    def mentioned(text):
+        # Tên/địa chỉ rỗng là chuỗi con của mọi câu hỏi -> không tính là khớp
+        term = fold_accents(normalize_question(text or ''))
+        return bool(term) and term in folded_question
+
+    matched = [
+        item for item in available_bookings
+        if mentioned(item['sport_center'].get('name')) or mentioned(item['sport_center'].get('address'))
+    ]
+    centers = (matched or available_bookings)[:limit]
+
+    lines = []
+    for item in centers:
+        fields = ", ".join(
+            f"{field['name']} ({', '.join(slot.split(' - ')[0] for slot in field['rental_slot'])})"
+            for field in item['sport_field']
+        )
+        lines.append(f"{item['sport_center']['name']} ngày {item['booking_date']}: {fields}")
+
+    example = centers[0]
+    example_slot = example['sport_field'][0]['rental_slot'][0]
+    return (
+        "Trợ lý AI đang tạm thời quá tải, dưới đây là các sân còn trống:\n"
+        + "\n".join(lines)
+        + f"\nĐể đặt sân, bạn vui lòng nhắn: 'Tôi đặt {example['sport_center']['name']} lúc {example_slot} - xác nhận'"
+    )
+
+
 def ask_chatbot(
     question: str,
     session: ChatSession,
@@ -537,23 +644,31 @@ def ask_chatbot(
     """
     # Load chat history từ database
     chat_history = load_chat_history(session)
-    
+
+    # Chỉ dùng cache cho câu hỏi không phụ thuộc ngữ cảnh (session chưa có lịch sử, không có booking history)
+    cacheable = not chat_history and not booking_history
+    if cacheable:
+        cached_answer = get_cached_answer(question, available_bookings)
+        if cached_answer is not None:
+            return cached_answer
+
     # Xây dựng messages
     messages = build_messages(question, chat_history, booking_history, available_bookings)
-    
+
     try:
-        resp = client.chat.completions.create(
-            model=settings.FPT_MODEL_NAME,
-            messages=messages,
-            temperature=0.8,
-            max_tokens=2048,
-            top_p=1,
-            presence_penalty=0,
-            frequency_penalty=0
-        )
-        
-        answer = resp.choices[0].message.content
-        
+        try:
+            answer = get_llm_client().chat(
+                messages,
+                temperature=0.8,
+                max_tokens=2048,
+                top_p=1,
+                presence_penalty=0,
+                frequency_penalty=0
+            )
+        except LLMUnavailableError:
+            # LLM lỗi/quá tải: trả lời dự phòng từ dữ liệu sân trống, không cache
+            return build_fallback_answer(question, available_bookings)
+
         # Kiểm tra xem có booking intent không
         booking_intent = parse_booking_intent(answer, available_bookings)
         if booking_intent and user:
@@ -575,7 +690,10 @@ def ask_chatbot(
                 # Giữ nguyên câu trả lời của AI nhưng thêm thông báo lỗi
                 error_msg = booking_result.get('error', 'Không thể đặt sân')
                 return f"{answer}\n\n⚠️ Lỗi: {error_msg}"
-        
+
+        if cacheable and not booking_intent:
+            store_answer(question, answer, available_bookings)
+
         return answer
     
     except Exception as e:
@@ -0,0 +1,39 @@
+"""
+Task nền của chatbot (đăng ký vào hàng đợi apps.jobs)
+"""
+from apps.chat.models import ChatSession
+from apps.chat.services import ask_chatbot, get_available_bookings, save_chat_turn
+from apps.jobs.registry import task
+from apps.user.models import User
+
+
+@task(name='chat.save_chat_turn', max_attempts=5, priority=5, queue='chat')
+def save_chat_turn_task(session_pk, question, answer):
+    """
+    Ghi messages của lượt chat (chế độ CHAT_DEFER_PERSIST)
+    """
+    save_chat_turn(ChatSession.objects.get(pk=session_pk), question, answer)
+
+
+@task(name='chat.answer_question', max_attempts=1, priority=5, queue='chat')
+def answer_question_task(session_pk, question, user_id=None):
+    """
+    Gọi LLM và lưu lượt chat ngoài request (chế độ async của /api/chat/).
+    Không retry vì LLM client đã tự retry và có câu trả lời dự phòng
+    """
+    session = ChatSession.objects.get(pk=session_pk)
+    user = User.objects.filter(pk=user_id).first() if user_id else None
+    answer = ask_chatbot(
+        question=question,
+        session=session,
+        booking_history=None,
+        available_bookings=get_available_bookings(),
+        command_context=None,
+        user=user,
+    )
+    save_chat_turn(session, question, answer)
+    return {
+        "session_id": str(session.session_id),
+        "question": question,
+        "answer": answer,
+    }
@@ -0,0 +1,274 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.chat.llm_client import CircuitBreaker, LLMClient, LLMUnavailableError
+from apps.chat.models import ChatMessage, ChatSession
+from apps.chat.response_cache import (
+    get_cache_stats, get_cached_answer, normalize_question, ngram_similarity, reset_cache_stats, store_answer,
+)
+from apps.chat.services import build_fallback_answer, resolve_session, save_chat_turn
+from apps.user.models import User
+from apps.utils.enum_type import RoleSystemEnum
+
+AVAILABLE = [{"sport_center": {"id": 1, "name": "Center 1"}, "sport_field": [], "price": 100}]
+
+
+@override_settings(CHAT_CACHE_ENABLED=True, CHAT_CACHE_SIMILARITY_THRESHOLD=0.7)
+class ChatResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+
+    def test_normalize_question(self):
+        self.assertEqual(normalize_question("  Giá   sân bao nhiêu?? "), "giá sân bao nhiêu")
+
+    def test_exact_hit_after_store(self):
+        self.assertIsNone(get_cached_answer("Giá sân bao nhiêu?", AVAILABLE))
+        store_answer("Giá sân bao nhiêu?", "100k/giờ", AVAILABLE)
+        self.assertEqual(get_cached_answer("giá sân  bao nhiêu", AVAILABLE), "100k/giờ")
+
+        stats = get_cache_stats()
+        self.assertEqual(stats["exact_hit"], 1)
+        self.assertEqual(stats["miss"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_similar_hit(self):
+        store_answer("làm sao để đặt sân", "Nhắn: tôi đặt ... - xác nhận", AVAILABLE)
+        self.assertGreater(ngram_similarity("làm sao để đặt sân", "lam sao de dat san vay"), 0.7)
+        self.assertEqual(get_cached_answer("lam sao de dat san vay", AVAILABLE), "Nhắn: tôi đặt ... - xác nhận")
+        self.assertEqual(get_cache_stats()["similar_hit"], 1)
+
+    def test_similar_requires_same_numbers(self):
+        store_answer("sân cho 5 người lúc 17:00", "Sân A", AVAILABLE)
+        self.assertGreater(ngram_similarity("sân cho 5 người lúc 17:00", "sân cho 7 người lúc 17:00"), 0.7)
+        self.assertIsNone(get_cached_answer("sân cho 7 người lúc 17:00", AVAILABLE))
+        self.assertIsNone(get_cached_answer("sân cho 5 người lúc 19:00", AVAILABLE))
+        self.assertEqual(get_cached_answer("san cho 5 nguoi luc 17:00", AVAILABLE), "Sân A")
+
+    def test_availability_change_invalidates(self):
+        store_answer("Giá sân bao nhiêu?", "100k/giờ", AVAILABLE)
+        changed = [{**AVAILABLE[0], "price": 120}]
+        self.assertIsNone(get_cached_answer("Giá sân bao nhiêu?", changed))
+
+    @override_settings(CHAT_CACHE_ENABLED=False)
+    def test_disabled(self):
+        store_answer("Giá sân bao nhiêu?", "100k/giờ", AVAILABLE)
+        self.assertIsNone(get_cached_answer("Giá sân bao nhiêu?", AVAILABLE))
+
+
+def _create_user(username):
+    return User.objects.create(
+        email=f"{username}@example.com",
+        username=username,
+        full_name=username,
+        role=RoleSystemEnum.USER.value,
+        is_active=True,
+    )
+
+
+class ChatTurnPersistenceTests(TestCase):
+    def setUp(self):
+        self.user = _create_user("chat_user")
+
+    def test_new_session_saved_with_messages(self):
+        session = resolve_session(None, self.user)
+        self.assertIsNone(session.pk)
+
+        with self.assertNumQueries(4):  # SAVEPOINT/BEGIN + INSERT session + bulk INSERT messages + RELEASE
+            save_chat_turn(session, "xin chào", "chào bạn")
+
+        self.assertEqual(ChatSession.objects.filter(user=self.user).count(), 1)
+        roles = list(ChatMessage.objects.filter(session=session).order_by('created_at', 'id').values_list('role', flat=True))
+        self.assertEqual(roles, ["user", "assistant"])
+
+    def test_existing_session_is_touched(self):
+        session = ChatSession.objects.create(user=None)
+        resolved = resolve_session(str(session.session_id), self.user)
+        self.assertEqual(resolved.pk, session.pk)
+
+        save_chat_turn(resolved, "hỏi", "đáp")
+        session.refresh_from_db()
+        self.assertEqual(session.user_id, self.user.pk)
+        self.assertEqual(session.messages.count(), 2)
+
+    def test_session_of_other_user_or_invalid_id(self):
+        other = ChatSession.objects.create(user=_create_user("other_user"))
+        self.assertIsNone(resolve_session(str(other.session_id), self.user).pk)
+        self.assertIsNone(resolve_session("not-a-uuid", self.user).pk)
+
+
+class ChatSessionsApiTests(APITestCase):
+    def setUp(self):
+        self.user = _create_user("sessions_user")
+        for index in range(5):
+            session = ChatSession(user=self.user)
+            save_chat_turn(session, f"câu hỏi {index}", f"trả lời {index}")
+        self.client.force_authenticate(user=self.user)
+
+    def test_constant_queries_and_cursor_pagination(self):
+        url = reverse("chat-sessions")
+        # 1 query cho trang + 1 COUNT cho total
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"limit": 3})
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(len(payload["sessions"]), 3)
+        self.assertEqual(payload["total"], 5)
+        self.assertEqual(payload["sessions"][0]["message_count"], 2)
+        self.assertEqual(payload["sessions"][0]["last_message"], "trả lời 4")
+        self.assertEqual(payload["sessions"][0]["last_message_role"], "assistant")
+
+        response = self.client.get(payload["next"])
+        self.assertEqual(len(response.json()["sessions"]), 2)
+        self.assertIsNone(response.json()["next"])
+
+
+class ChatHistoryApiTests(APITestCase):
+    def setUp(self):
+        self.user = _create_user("history_user")
+        self.session = ChatSession(user=self.user)
+        for index in range(3):
+            save_chat_turn(self.session, f"q{index}", f"a{index}")
+        self.ids = list(self.session.messages.order_by('id').values_list('id', flat=True))
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("chat-history")
+
+    def _get(self, **params):
+        response = self.client.get(self.url, {"session_id": str(self.session.session_id), **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_latest_page_then_older(self):
+        payload = self._get(limit=4)
+        self.assertEqual([m["id"] for m in payload["messages"]], self.ids[2:])
+        self.assertTrue(payload["has_more"])
+
+        payload = self._get(limit=4, before=payload["first_id"])
+        self.assertEqual([m["id"] for m in payload["messages"]], self.ids[:2])
+        self.assertFalse(payload["has_more"])
+
+    def test_incremental_sync(self):
+        payload = self._get(after=self.ids[3])
+        self.assertEqual([m["content"] for m in payload["messages"]], ["q2", "a2"])
+        self.assertEqual(self._get(after=self.ids[-1])["messages"], [])
+
+    def test_invalid_params(self):
+        response = self.client.get(self.url, {"session_id": str(self.session.session_id), "since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+
+class _StubLLMHandler(BaseHTTPRequestHandler):
+    """
+    Stub server giả lập endpoint /chat/completions tương thích OpenAI
+    """
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        server.calls += 1
+        status_code = server.statuses.pop(0) if server.statuses else 200
+        if status_code == 200:
+            body = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "xin chào từ stub"},
+                    "finish_reason": "stop",
+                }],
+            }
+        else:
+            body = {"error": {"message": "upstream error", "type": "server_error"}}
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class LLMClientStubServerTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubLLMHandler)
+        self.server.calls = 0
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.now = 0.0
+        self.client = LLMClient(
+            api_key="test",
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}/v1",
+            model="stub",
+            connect_timeout=1,
+            read_timeout=2,
+            max_retries=1,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: self.now),
+            sleep=lambda seconds: None,
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_success_and_retry(self):
+        self.assertEqual(self.client.chat([{"role": "user", "content": "hi"}]), "xin chào từ stub")
+
+        self.server.statuses = [500]
+        self.assertEqual(self.client.chat([{"role": "user", "content": "hi"}]), "xin chào từ stub")
+        metrics = self.client.metrics.snapshot()
+        self.assertEqual(metrics["retries"], 1)
+        self.assertEqual(metrics["successes"], 2)
+        self.assertEqual(metrics["latency_ms"]["samples"], 3)
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        self.server.statuses = [500] * 4
+        for _ in range(2):
+            with self.assertRaises(LLMUnavailableError):
+                self.client.chat([{"role": "user", "content": "hi"}])
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.OPEN)
+
+        calls = self.server.calls
+        with self.assertRaises(LLMUnavailableError):
+            self.client.chat([{"role": "user", "content": "hi"}])
+        self.assertEqual(self.server.calls, calls)
+        self.assertEqual(self.client.metrics.snapshot()["short_circuited"], 1)
+
+        self.now += 10
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.client.chat([{"role": "user", "content": "hi"}]), "xin chào từ stub")
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_fallback_answer_lists_available_slots(self):
+        available = [{
+            "sport_center": {"id": 1, "name": "Sân Hòa Xuân", "address": "Cẩm Lệ"},
+            "sport_field": [{"id": 1, "name": "A1", "sport_type": "FOOTBALL", "rental_slot": ["17:30 - 18:30"]}],
+            "booking_date": "2025-01-01",
+            "status": "PENDING",
+            "price": 100,
+        }]
+        answer = build_fallback_answer("sân trống ở cẩm lệ", available)
+        self.assertIn("Sân Hòa Xuân ngày 2025-01-01: A1 (17:30)", answer)
+        self.assertIn("Tôi đặt Sân Hòa Xuân lúc 17:30 - 18:30 - xác nhận", answer)
+
+    def test_fallback_answer_skips_empty_address_and_full_centers(self):
+        available = [
+            {"sport_center": {"id": 1, "name": "Sân Kín", "address": ""}, "booking_date": "2025-01-01",
+             "sport_field": [{"id": 1, "name": "K1", "rental_slot": []}]},
+            {"sport_center": {"id": 2, "name": "Sân Trống", "address": ""}, "booking_date": "2025-01-01",
+             "sport_field": []},
+            {"sport_center": {"id": 3, "name": "Sân Hòa Xuân", "address": "Cẩm Lệ"}, "booking_date": "2025-01-01",
+             "sport_field": [{"id": 2, "name": "A1", "rental_slot": ["17:30 - 18:30"]}]},
+        ]
+        answer = build_fallback_answer("sân trống ở hải châu", available)
+        self.assertNotIn("Sân Kín", answer)
+        self.assertIn("Tôi đặt Sân Hòa Xuân lúc 17:30 - 18:30 - xác nhận", answer)
+        self.assertIn("chưa có sân trống", build_fallback_answer("sân trống", available[:2]))
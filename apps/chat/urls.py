@@ -1,9 +1,10 @@
 from django.urls import path
-from apps.chat.views import ChatbotViewSet, ChatHistoryViewSet, ChatSessionsViewSet
+from apps.chat.views import ChatbotViewSet, ChatHistoryViewSet, ChatSessionsViewSet, ChatMetricsViewSet
 
 urlpatterns = [
     path('chat/', ChatbotViewSet.as_view(), name='chatbot'),
     path('chat/history/', ChatHistoryViewSet.as_view(), name='chat-history'),
     path('chat/sessions/', ChatSessionsViewSet.as_view(), name='chat-sessions'),
+    path('chat/metrics/', ChatMetricsViewSet.as_view(), name='chat-metrics'),
 ]
 
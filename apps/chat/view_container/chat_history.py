@@ -6,7 +6,13 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from rest_framework.pagination import CursorPagination
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Substr
 
 from apps.depends.oauth2 import IsUser
 from apps.chat.models import ChatSession, ChatMessage
@@ -18,12 +24,17 @@ class ChatHistoryViewSet(APIView):
     Endpoint: /api/chat/history/
     """
     permission_classes = [IsUser]
+    default_limit = 50
+    max_limit = 200
 
     @swagger_auto_schema(
         operation_summary="Lấy lịch sử chat của một session",
         operation_description=(
-            "Lấy danh sách tất cả messages trong một session chat.\n\n"
-            "Yêu cầu: session_id (UUID)"
+            "Lấy messages trong một session chat theo trang (cursor theo message id).\n\n"
+            "- Không có `before`/`after`/`since`: trang mới nhất\n"
+            "- `before`: các messages cũ hơn message id này (tải thêm lịch sử)\n"
+            "- `after` hoặc `since`: các messages mới hơn message id/thời điểm này (đồng bộ tăng dần)\n\n"
+            "Messages luôn trả về theo thứ tự cũ -> mới. Yêu cầu: session_id (UUID)"
         ),
         manual_parameters=[
             openapi.Parameter(
@@ -33,6 +44,34 @@ class ChatHistoryViewSet(APIView):
                 type=openapi.TYPE_STRING,
                 required=True,
             ),
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description="Số messages mỗi trang (mặc định 50, tối đa 200)",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'before',
+                openapi.IN_QUERY,
+                description="Lấy các messages có id nhỏ hơn giá trị này",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'after',
+                openapi.IN_QUERY,
+                description="Lấy các messages có id lớn hơn giá trị này",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'since',
+                openapi.IN_QUERY,
+                description="Lấy các messages tạo sau thời điểm này (ISO 8601)",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -53,15 +92,20 @@ class ChatHistoryViewSet(APIView):
                                 }
                             )
                         ),
+                        'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'has_more': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                        'first_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'last_id': openapi.Schema(type=openapi.TYPE_INTEGER),
                     }
                 )
             ),
+            400: "Tham số không hợp lệ",
             404: "Không tìm thấy session"
         }
     )
     def get(self, request):
         """
-        GET /api/chat/history/?session_id=<uuid>
+        GET /api/chat/history/?session_id=<uuid>&limit=<n>&before=<id>|after=<id>|since=<datetime>
         Lấy lịch sử chat của một session
         """
         user = request.user if request.user.is_authenticated else None
@@ -72,27 +116,66 @@ class ChatHistoryViewSet(APIView):
                 {"error": "Thiếu tham số 'session_id'"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        try:
+            limit = min(int(request.query_params.get("limit", self.default_limit)), self.max_limit)
+            before = request.query_params.get("before")
+            before = int(before) if before else None
+            after = request.query_params.get("after")
+            after = int(after) if after else None
+        except ValueError:
+            return Response(
+                {"error": "Tham số 'limit', 'before', 'after' phải là số nguyên"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(limit, 1)
+
+        since = request.query_params.get("since")
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                return Response(
+                    {"error": "Tham số 'since' phải theo định dạng ISO 8601"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
         
         try:
             session = ChatSession.objects.get(session_id=session_id)
-        except ChatSession.DoesNotExist:
+        except (ChatSession.DoesNotExist, ValidationError):
             return Response(
                 {"error": "Không tìm thấy session"},
                 status=status.HTTP_404_NOT_FOUND
             )
         
         # Kiểm tra quyền: user chỉ có thể xem session của chính mình
-        if user and session.user and session.user != user:
+        if user and session.user_id and session.user_id != user.pk:
             return Response(
                 {"error": "Không có quyền truy cập session này"},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Lấy tất cả messages của session
-        messages = ChatMessage.objects.filter(session=session).order_by('created_at')
+        messages = ChatMessage.objects.filter(session=session).only('id', 'role', 'content', 'created_at')
+        if after is not None or since is not None:
+            # Đồng bộ tăng dần: lấy các messages mới hơn, cũ -> mới
+            if after is not None:
+                messages = messages.filter(id__gt=after)
+            if since is not None:
+                messages = messages.filter(created_at__gt=since)
+            page = list(messages.order_by('id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+        else:
+            # Trang mới nhất hoặc cũ hơn `before`: lấy mới -> cũ rồi đảo lại
+            if before is not None:
+                messages = messages.filter(id__lt=before)
+            page = list(messages.order_by('-id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit][::-1]
         
         messages_data = []
-        for msg in messages:
+        for msg in page:
             messages_data.append({
                 "id": msg.id,
                 "role": msg.role,
@@ -103,23 +186,54 @@ class ChatHistoryViewSet(APIView):
         return Response({
             "session_id": str(session.session_id),
             "messages": messages_data,
-            "total": len(messages_data)
+            "total": len(messages_data),
+            "has_more": has_more,
+            "first_id": messages_data[0]["id"] if messages_data else None,
+            "last_id": messages_data[-1]["id"] if messages_data else None,
         })
 
 
+class ChatSessionCursorPagination(CursorPagination):
+    """
+    Phân trang cursor cho danh sách sessions (mới cập nhật trước)
+    """
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-updated_at', '-id')
+
+
 class ChatSessionsViewSet(APIView):
     """
     API lấy danh sách sessions của user
     Endpoint: /api/chat/sessions/
     """
     permission_classes = [IsUser]
+    pagination_class = ChatSessionCursorPagination
+    preview_length = 100
 
     @swagger_auto_schema(
         operation_summary="Lấy danh sách sessions của user",
         operation_description=(
-            "Lấy danh sách tất cả chat sessions của user hiện tại.\n\n"
-            "Mỗi session bao gồm: session_id, số lượng messages, thời gian tạo"
+            "Lấy danh sách chat sessions của user hiện tại (phân trang cursor).\n\n"
+            "Mỗi session bao gồm: session_id, số lượng messages, tin nhắn cuối, thời gian tạo"
         ),
+        manual_parameters=[
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor trang tiếp theo/trước đó (lấy từ `next`/`previous`)",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description="Số session mỗi trang (mặc định 20, tối đa 100)",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+        ],
         responses={
             200: openapi.Response(
                 description="Danh sách sessions",
@@ -133,11 +247,17 @@ class ChatSessionsViewSet(APIView):
                                 properties={
                                     'session_id': openapi.Schema(type=openapi.TYPE_STRING),
                                     'message_count': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    'last_message': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'last_message_role': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'last_message_at': openapi.Schema(type=openapi.TYPE_STRING),
                                     'created_at': openapi.Schema(type=openapi.TYPE_STRING),
                                     'updated_at': openapi.Schema(type=openapi.TYPE_STRING),
                                 }
                             )
                         ),
+                        'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'next': openapi.Schema(type=openapi.TYPE_STRING),
+                        'previous': openapi.Schema(type=openapi.TYPE_STRING),
                     }
                 )
             ),
@@ -145,7 +265,7 @@ class ChatSessionsViewSet(APIView):
     )
     def get(self, request):
         """
-        GET /api/chat/sessions/
+        GET /api/chat/sessions/?cursor=<cursor>&limit=<n>
         Lấy danh sách sessions của user
         """
         user = request.user if request.user.is_authenticated else None
@@ -156,21 +276,36 @@ class ChatSessionsViewSet(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        # Lấy tất cả sessions của user
-        sessions = ChatSession.objects.filter(user=user).order_by('-updated_at')
-        
+        # 1 query: đếm messages + tin nhắn cuối (Subquery) cho từng session
+        last_message = ChatMessage.objects.filter(session=OuterRef('pk')).order_by('-created_at', '-id')
+        sessions = ChatSession.objects.filter(user=user).annotate(
+            message_count=Count('messages'),
+            last_message=Subquery(
+                last_message.annotate(preview=Substr('content', 1, self.preview_length)).values('preview')[:1]
+            ),
+            last_message_role=Subquery(last_message.values('role')[:1]),
+            last_message_at=Subquery(last_message.values('created_at')[:1]),
+        )
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(sessions, request, view=self)
+
         sessions_data = []
-        for session in sessions:
-            message_count = ChatMessage.objects.filter(session=session).count()
+        for session in page:
             sessions_data.append({
                 "session_id": str(session.session_id),
-                "message_count": message_count,
+                "message_count": session.message_count,
+                "last_message": session.last_message,
+                "last_message_role": session.last_message_role,
+                "last_message_at": session.last_message_at.isoformat() if session.last_message_at else None,
                 "created_at": session.created_at.isoformat() if session.created_at else None,
                 "updated_at": session.updated_at.isoformat() if session.updated_at else None,
             })
         
         return Response({
             "sessions": sessions_data,
-            "total": len(sessions_data)
+            # Tổng số session của user (như trước khi phân trang), COUNT trên index user_id
+            "total": ChatSession.objects.filter(user=user).count(),
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
         })
-
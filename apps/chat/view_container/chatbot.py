@@ -1,11 +1,6 @@
 """
 View xử lý API chatbot với chat history đầy đủ
 """
-import uuid
-from django_ratelimit.decorators import ratelimit
-from django.utils.decorators import method_decorator
-from django.conf import settings
-
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -13,21 +8,26 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 from apps.depends.oauth2 import IsUser
-from apps.chat.models import ChatSession, ChatMessage
-from apps.chat.services import ask_chatbot, get_available_bookings, parse_user_booking_intent, create_booking_from_intent
+from apps.depends.throttling import ChatThrottle
+from apps.chat.services import (
+    ask_chatbot, get_available_bookings, parse_user_booking_intent, create_booking_from_intent,
+    resolve_session, persist_chat_turn
+)
 from apps.booking.models import Booking
+from apps.jobs.services import enqueue
+
+
+def _is_true(value) -> bool:
+    return str(value).lower() in ('1', 'true', 'yes') if value is not None else False
 
 
-@method_decorator(
-    ratelimit(key='user', rate=f'{settings.CHAT_LIMIT_PER_MINUTE}/m', block=True),
-    name='post'
-)
 class ChatbotViewSet(APIView):
     """
     API Chatbot với chat history đầy đủ
     Endpoint: /api/chat/
     """
     permission_classes = [IsUser]
+    throttle_classes = [ChatThrottle]
 
     @swagger_auto_schema(
         operation_summary="Chat với chatbot AI",
@@ -35,7 +35,9 @@ class ChatbotViewSet(APIView):
             "Chatbot hỗ trợ khách hàng DaiHiep Sport sử dụng FPT AI.\n\n"
             "Chatbot sẽ nhớ lịch sử cuộc trò chuyện trong cùng một session.\n"
             "Nếu không có session_id, hệ thống sẽ tạo session mới.\n"
-            "Nếu có session_id, chatbot sẽ tiếp tục cuộc trò chuyện từ lịch sử trước đó."
+            "Nếu có session_id, chatbot sẽ tiếp tục cuộc trò chuyện từ lịch sử trước đó.\n"
+            "Với async=true, câu hỏi được xử lý ở hàng đợi nền: API trả về 202 kèm job_id, "
+            "lấy câu trả lời qua /api/jobs/<job_id>/."
         ),
         manual_parameters=[
             openapi.Parameter(
@@ -52,6 +54,13 @@ class ChatbotViewSet(APIView):
                 type=openapi.TYPE_STRING,
                 required=False,
             ),
+            openapi.Parameter(
+                'async',
+                openapi.IN_QUERY,
+                description="true: xử lý ở hàng đợi nền, trả về job_id",
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+            ),
         ],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
@@ -64,6 +73,10 @@ class ChatbotViewSet(APIView):
                     type=openapi.TYPE_STRING,
                     description='ID phiên chat (UUID)'
                 ),
+                'async': openapi.Schema(
+                    type=openapi.TYPE_BOOLEAN,
+                    description='Xử lý ở hàng đợi nền'
+                ),
             }
         ),
         responses={
@@ -78,6 +91,7 @@ class ChatbotViewSet(APIView):
                     }
                 )
             ),
+            202: "Đã đưa câu hỏi vào hàng đợi (async=true), trả về job_id",
             400: "Thiếu tham số 'q'"
         }
     )
@@ -96,38 +110,10 @@ class ChatbotViewSet(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Lấy hoặc tạo session
+        # Lấy hoặc khởi tạo session (session mới được lưu cùng transaction với messages)
         session_id = request.data.get("session_id") or request.query_params.get("session_id")
-        
-        if session_id:
-            try:
-                # Tìm session theo session_id
-                session = ChatSession.objects.get(session_id=session_id)
-                # Kiểm tra quyền: nếu user không khớp, tạo session mới (user đã đổi tài khoản)
-                if user and session.user and session.user != user:
-                    # User đã đổi tài khoản, tạo session mới
-                    session = ChatSession.objects.create(
-                        user=user,
-                        session_id=uuid.uuid4()
-                    )
-                elif user and not session.user:
-                    # Session cũ là anonymous, gán user mới vào
-                    session.user = user
-                    session.save()
-            except ChatSession.DoesNotExist:
-                # Nếu không tìm thấy, tạo session mới
-                session = ChatSession.objects.create(
-                    user=user,
-                    session_id=uuid.uuid4()
-                )
-        else:
-            # Tạo session mới
-            session = ChatSession.objects.create(
-                user=user,
-                session_id=uuid.uuid4()
-            )
+        session = resolve_session(session_id, user)
 
-        
         # Lấy dữ liệu booking available (sân trống) - luôn lấy để chatbot có thể trả lời
         available_bookings = get_available_bookings()
         
@@ -153,6 +139,17 @@ class ChatbotViewSet(APIView):
             else:
                 error_msg = booking_result.get('error', 'Không thể đặt sân')
                 answer = f"❌ {error_msg}\n\nVui lòng kiểm tra lại thông tin hoặc chọn khung giờ khác."
+        elif _is_true(request.data.get("async", request.query_params.get("async"))):
+            # Gọi LLM ở hàng đợi nền, client poll /api/jobs/<job_id>/ để lấy câu trả lời
+            if session.pk is None:
+                session.save()
+            job = enqueue('chat.answer_question', args=(session.pk, question, user.id if user else None), user=user)
+            return Response({
+                "session_id": str(session.session_id),
+                "question": question,
+                "job_id": str(job.job_id),
+                "status": job.status,
+            }, status=status.HTTP_202_ACCEPTED)
         else:
             # Gọi chatbot service với chat history và available bookings
             answer = ask_chatbot(
@@ -164,9 +161,8 @@ class ChatbotViewSet(APIView):
                 user=user,
             )
         
-        # Lưu message vào database
-        ChatMessage.objects.create(session=session, role="user", content=question)
-        ChatMessage.objects.create(session=session, role="assistant", content=answer)
+        # Lưu session + messages trong 1 transaction (hoặc đẩy vào hàng đợi nền nếu CHAT_DEFER_PERSIST)
+        persist_chat_turn(session, question, answer)
         
         return Response({
             "session_id": str(session.session_id),
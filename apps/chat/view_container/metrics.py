@@ -0,0 +1,32 @@
+"""
+View xem thống kê vận hành của chatbot (cache câu trả lời, LLM client)
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from drf_yasg.utils import swagger_auto_schema
+
+from apps.depends.oauth2 import IsAdmin
+from apps.chat.llm_client import get_llm_metrics
+from apps.chat.response_cache import get_cache_stats
+
+
+class ChatMetricsViewSet(APIView):
+    """
+    API thống kê chatbot cho admin
+    Endpoint: /api/chat/metrics/
+    """
+    permission_classes = [IsAdmin]
+
+    @swagger_auto_schema(
+        operation_summary="Thống kê chatbot",
+        operation_description=(
+            "Số lần hit/miss và hit-rate của cache câu trả lời chatbot; "
+            "số request, lỗi, retry, độ trễ và trạng thái circuit breaker của LLM client (trong process hiện tại)."
+        ),
+        responses={200: "OK"},
+    )
+    def get(self, request):
+        return Response({
+            "response_cache": get_cache_stats(),
+            "llm": get_llm_metrics(),
+        })
@@ -1,3 +1,3 @@
 from apps.chat.view_container.chatbot import *
 from apps.chat.view_container.chat_history import *
-
+from apps.chat.view_container.metrics import *
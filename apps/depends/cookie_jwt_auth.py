@@ -2,11 +2,89 @@
 Cookie-based JWT Authentication for Django REST Framework
 """
 import uuid
+from functools import lru_cache
+
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.module_loading import import_string
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
+from apps.depends.token_revocation import is_token_revoked
+
+
+USER_CACHE_KEY = 'auth:user:{}'
+
+
+@lru_cache(maxsize=None)
+def resolve_token_classes(token_class_paths):
+    """
+    import_string các AUTH_TOKEN_CLASSES 1 lần (cache theo tuple đường dẫn)
+    """
+    return tuple(import_string(path) for path in token_class_paths)
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+def load_user(user_model, user_id):
+    """
+    Lấy user theo id. AUTH_USER_CACHE_TTL > 0: chỉ cache id/role/is_active/is_delete (không cache
+    password hash...), trả TokenUser, field khác load khi view cần. Cache bị xóa khi User được lưu/xóa (apps.user.signals)
+    """
+    from apps.user.models import TOKEN_USER_CLAIMS, TokenUser
+    ttl = settings.AUTH_USER_CACHE_TTL
+    if not ttl:
+        user = get_user_or_invalid(user_model, user_id)
+    else:
+        key = USER_CACHE_KEY.format(user_id)
+        claims = cache.get(key)
+        if claims is None:
+            user = get_user_or_invalid(user_model, user_id)
+            cache.set(key, {name: getattr(user, name) for name in TOKEN_USER_CLAIMS}, ttl)
+        else:
+            user = TokenUser.from_claims(user_id, claims)
+
+    if not user.is_active:
+        raise InvalidToken('User is inactive')
+    return user
+
+
+def get_user_or_invalid(user_model, user_id):
+    try:
+        return user_model.objects.get(**{settings.SIMPLE_JWT['USER_ID_FIELD']: user_id})
+    except user_model.DoesNotExist:
+        raise InvalidToken('User not found')
+
+
+def token_user_from_claims(user_id, validated_token):
+    """
+    Dựng TokenUser từ claim role/is_active/is_delete (không query DB).
+    Token cấp trước khi có claim thì trả None để load User như cũ
+    """
+    from apps.user.models import TOKEN_USER_CLAIMS, TokenUser
+    claims = {name: validated_token.get(name) for name in TOKEN_USER_CLAIMS}
+    if None in claims.values():
+        return None
+    if not claims['is_active'] or claims['is_delete']:
+        raise InvalidToken('User is inactive')
+    return TokenUser.from_claims(user_id, claims)
+
+
+def parse_user_id(validated_token):
+    try:
+        user_id = validated_token[settings.SIMPLE_JWT['USER_ID_CLAIM']]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+
+    try:
+        if isinstance(user_id, str):
+            user_id = uuid.UUID(user_id)
+    except (ValueError, TypeError):
+        raise InvalidToken('Invalid user ID format')
+    return user_id
+
 
 class CookieJWTAuthentication(JWTAuthentication):
     """
@@ -46,16 +124,19 @@ class CookieJWTAuthentication(JWTAuthentication):
         wrapper object.
         """
         messages = []
-        for AuthTokenPath in settings.SIMPLE_JWT['AUTH_TOKEN_CLASSES']:
-            AuthToken = import_string(AuthTokenPath)  # convert từ string sang class thật
+        for AuthToken in resolve_token_classes(tuple(settings.SIMPLE_JWT['AUTH_TOKEN_CLASSES'])):
             try:
-                return AuthToken(raw_token)
+                token = AuthToken(raw_token)
             except TokenError as e:
                 messages.append({
                     'token_class': AuthToken.__name__,
                     'token_type': AuthToken.token_type,
                     'message': e.args[0]
                 })
+                continue
+            if is_token_revoked(token):
+                raise InvalidToken('Token has been revoked')
+            return token
 
         raise InvalidToken({
             'detail': 'Given token not valid for any token type',
@@ -65,27 +146,32 @@ class CookieJWTAuthentication(JWTAuthentication):
     def get_user_from_token(self, validated_token):
         """
         Attempts to find and return a user using the given validated token.
-        """
-        try:
-            user_id = validated_token[settings.SIMPLE_JWT['USER_ID_CLAIM']]
-        except KeyError:
-            raise InvalidToken('Token contained no recognizable user identification')
+        AUTH_TOKEN_USER_CLAIMS bật: quyền được kiểm tra từ claim, User chỉ load khi view cần field khác
+        """
+        user_id = parse_user_id(validated_token)
+        if settings.AUTH_TOKEN_USER_CLAIMS:
+            user = token_user_from_claims(user_id, validated_token)
+            if user is not None:
+                return user
+        return load_user(self.user_model, user_id)
 
-        try:
-            if isinstance(user_id, str):
-                user_id = uuid.UUID(user_id)
-        except (ValueError, TypeError):
-            raise InvalidToken('Invalid user ID format')
 
-        try:
-            user = self.user_model.objects.get(**{settings.SIMPLE_JWT['USER_ID_FIELD']: user_id})
-        except self.user_model.DoesNotExist:
-            raise InvalidToken('User not found')
+class HeaderJWTAuthentication(CookieJWTAuthentication):
+    """
+    Fallback for API clients: `Authorization: Bearer <token>` header, with the same
+    revocation check and user lookup as the cookie authentication
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
 
-        if not user.is_active:
-            raise InvalidToken('User is inactive')
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
 
-        return user
+        return self.get_user(raw_token), raw_token
 
 
 class CookieRefreshJWTAuthentication(JWTAuthentication):
@@ -121,6 +207,8 @@ class CookieRefreshJWTAuthentication(JWTAuthentication):
         
         try:
             refresh_token = RefreshToken(raw_token)
+            if is_token_revoked(refresh_token):
+                raise InvalidToken('Token has been revoked')
             access_token = refresh_token.access_token
             return self.get_user_from_token(access_token)
         except TokenError as e:
@@ -130,24 +218,5 @@ class CookieRefreshJWTAuthentication(JWTAuthentication):
         """
         Attempts to find and return a user using the given validated token.
         """
-        try:
-            user_id = validated_token[settings.SIMPLE_JWT['USER_ID_CLAIM']]
-        except KeyError:
-            raise InvalidToken('Token contained no recognizable user identification')
-
-        try:
-            if isinstance(user_id, str):
-                user_id = uuid.UUID(user_id)
-        except (ValueError, TypeError):
-            raise InvalidToken('Invalid user ID format')
-
-        try:
-            user = self.user_model.objects.get(**{settings.SIMPLE_JWT['USER_ID_FIELD']: user_id})
-        except self.user_model.DoesNotExist:
-            raise InvalidToken('User not found')
-
-        if not user.is_active:
-            raise InvalidToken('User is inactive')
-
-        return user
+        return load_user(self.user_model, parse_user_id(validated_token))
 
@@ -0,0 +1,131 @@
+"""
+Sliding-window DRF throttles stored in the shared cache.
+
+Each (scope, client) keeps one counter per fixed window; the request count over the last
+`duration` seconds is estimated as `previous * (1 - elapsed / duration) + current`, so a
+burst at a window boundary cannot double the allowed rate. Counters use atomic cache
+`incr`, so limits hold across processes when CACHES['default'] is shared (Redis). If the
+shared cache is unreachable, the local-memory cache is used for the current process instead.
+"""
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    scope = None
+    # Chỉ giới hạn các method này (None = tất cả)
+    methods = None
+
+    def __init__(self):
+        self.num_requests, self.duration = SimpleRateThrottle.parse_rate(None, self.get_rate())
+        self.retry_after = None
+
+    def get_rate(self):
+        return settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][self.scope]
+
+    def get_ident_key(self, request, view):
+        """
+        Client identifier for this scope; None skips throttling
+        """
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        if self.methods is not None and request.method not in self.methods:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+
+        now = time.time()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        prefix = f"throttle:{self.scope}:{ident}"
+        cache = caches['default']
+        try:
+            current, previous = self.count(cache, prefix, window)
+        except Exception as exc:
+            logger.warning("Shared throttle cache unavailable, using local memory: %s", exc)
+            cache = caches['local']
+            current, previous = self.count(cache, prefix, window)
+
+        # current đã gồm request này
+        if previous * (1 - elapsed / self.duration) + current <= self.num_requests:
+            return True
+
+        # Request bị từ chối không được tính
+        try:
+            cache.decr(f"{prefix}:{window}")
+        except Exception:
+            pass
+        if current > self.num_requests or previous == 0:
+            # Window hiện tại đã đầy: chờ sang window sau
+            wait = self.duration - elapsed
+        else:
+            # Chờ tới khi phần của window trước giảm đủ để nhận thêm 1 request
+            wait = self.duration * (1 - (self.num_requests - current) / previous) - elapsed
+        self.retry_after = max(1, math.ceil(wait))
+        return False
+
+    def count(self, cache, prefix, window):
+        key = f"{prefix}:{window}"
+        # add() không ghi đè nếu đã có; key sống 2 window để làm "previous" của window sau
+        cache.add(key, 0, timeout=self.duration * 2)
+        current = cache.incr(key)
+        previous = cache.get(f"{prefix}:{window - 1}", 0)
+        return current, previous
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    scope = 'login_ip'
+
+
+class LoginUsernameThrottle(SlidingWindowThrottle):
+    """
+    Giới hạn theo cặp (username, IP): dò mật khẩu 1 tài khoản từ 1 IP.
+    Không đếm theo username riêng: ai biết username cũng khóa được chủ tài khoản ở mọi IP.
+    Dò từ nhiều tài khoản/IP do LoginIPThrottle chặn
+    """
+    scope = 'login_user'
+
+    def get_ident_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        username = str(username or '').strip().lower()
+        if not username:
+            return None
+        return hashlib.sha1(f"{username}|{self.get_ident(request)}".encode()).hexdigest()
+
+
+class RegisterThrottle(SlidingWindowThrottle):
+    scope = 'register'
+
+
+class VerifyCodeThrottle(SlidingWindowThrottle):
+    scope = 'verify_code'
+
+
+class UserOrIPThrottle(SlidingWindowThrottle):
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class BookingWriteThrottle(UserOrIPThrottle):
+    scope = 'booking_write'
+    methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class ChatThrottle(UserOrIPThrottle):
+    scope = 'chat'
+    methods = ('POST',)
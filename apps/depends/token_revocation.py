@@ -0,0 +1,125 @@
+"""
+Revoked JWT lookup without a DB query per request.
+
+Revoked JTIs live in the RevokedToken table; each process keeps them in a bloom filter
+(fast "not revoked" answer for almost every token) backed by an exact set (no false positives).
+New rows are picked up incrementally every TOKEN_REVOCATION_REFRESH seconds (re-reading the last
+TOKEN_REVOCATION_REFRESH_MARGIN seconds, so rows committed late are not skipped) and the filter is
+rebuilt every TOKEN_REVOCATION_REBUILD seconds to drop expired entries.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.utils import timezone as django_timezone
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k vị trí từ 2 nửa của 1 digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._jtis = set()
+        self._bloom = self._new_bloom(0)
+        self._read_since = None
+        self._next_refresh = 0.0
+        self._next_rebuild = 0.0
+
+    @staticmethod
+    def _new_bloom(size):
+        return BloomFilter(max(1024, size * 2), settings.TOKEN_REVOCATION_ERROR_RATE)
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return jti in self._bloom and jti in self._jtis
+
+    def add(self, jti):
+        with self._lock:
+            self._add(jti)
+
+    def _add(self, jti):
+        if jti in self._jtis:
+            return
+        self._jtis.add(jti)
+        if self._bloom.count >= self._bloom.capacity:
+            self._bloom = self._new_bloom(len(self._jtis))
+            for known in self._jtis:
+                self._bloom.add(known)
+        else:
+            self._bloom.add(jti)
+
+    def refresh(self):
+        from apps.user.models import RevokedToken
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_refresh:
+                # Thread khác vừa refresh xong
+                return
+            read_at = django_timezone.now()
+            rows = RevokedToken.objects.filter(expires_at__gt=read_at)
+            if now >= self._next_rebuild or self._read_since is None:
+                jtis = set(rows.values_list('jti', flat=True).iterator(chunk_size=5000))
+                bloom = self._new_bloom(len(jtis))
+                for jti in jtis:
+                    bloom.add(jti)
+                self._jtis, self._bloom = jtis, bloom
+                self._next_rebuild = now + settings.TOKEN_REVOCATION_REBUILD
+            else:
+                # Không lọc theo id > id lớn nhất đã đọc: row có id nhỏ hơn có thể commit sau.
+                # Đọc lại cả khoảng MARGIN giây trước lần đọc trước (thêm jti đã có thì bỏ qua)
+                since = self._read_since - timedelta(seconds=settings.TOKEN_REVOCATION_REFRESH_MARGIN)
+                for jti in rows.filter(created_at__gte=since).values_list('jti', flat=True):
+                    self._add(jti)
+            self._read_since = read_at
+            self._next_refresh = now + settings.TOKEN_REVOCATION_REFRESH
+
+
+revocation_list = RevocationList()
+
+
+def is_token_revoked(token):
+    jti = token.get(settings.SIMPLE_JWT['JTI_CLAIM'])
+    return bool(jti) and revocation_list.is_revoked(jti)
+
+
+def revoke_token(token, user=None):
+    """
+    Thu hồi token (AccessToken/RefreshToken đã validate) đến khi hết hạn
+    """
+    from apps.user.models import RevokedToken
+    jti = token[settings.SIMPLE_JWT['JTI_CLAIM']]
+    RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'token_type': token.get(settings.SIMPLE_JWT['TOKEN_TYPE_CLAIM'], ''),
+        'user': user,
+        'expires_at': datetime.fromtimestamp(token['exp'], tz=timezone.utc),
+    })
+    revocation_list.add(jti)
@@ -34,6 +34,9 @@ class FakeUserView(APIView):
         first_names_male = ['Trần Văn', 'Phạm Văn', 'Vũ Văn', 'Bùi Văn', 'Nguyễn Văn', 'Lê Văn', 'Hoàng Văn', 'Đặng Văn']
         last_names_male = ['Nam', 'Đức', 'Hùng', 'Tuấn', 'Dũng', 'Long', 'Minh', 'Quang', 'Sơn', 'Thành', 'Bảo', 'Khang']
 
+        # Hash 1 lần, dùng chung cho mọi user giả (hash mất hàng trăm ms mỗi lần)
+        password_hash = make_password('12345678')
+
         for i in range(1, count + 1):
             username = f"user_{i:02d}"
             email = f"{username}@gmail.com"
@@ -66,7 +69,7 @@ class FakeUserView(APIView):
                 username=username,
                 email=email,
                 full_name=full_name,
-                password=make_password('12345678'),
+                password=password_hash,
                 role=RoleSystemEnum.USER.value,
                 is_active=True,
             )
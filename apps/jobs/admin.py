@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.utils.enum_type import StatusJobEnum
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'name', 'queue', 'priority', 'status', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['job_id', 'name']
+    readonly_fields = ['job_id', 'created_at', 'updated_at', 'finished_at', 'locked_at', 'locked_by']
+    actions = ['retry_jobs']
+
+    @admin.action(description='Chạy lại các job đã chọn')
+    def retry_jobs(self, request, queryset):
+        queryset.exclude(status=StatusJobEnum.RUNNING).update(
+            status=StatusJobEnum.PENDING, attempts=0, run_at=timezone.now(), finished_at=None,
+        )
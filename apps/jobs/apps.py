@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self):
+        # Import `tasks.py` của mọi app để đăng ký task vào registry
+        autodiscover_modules('tasks')
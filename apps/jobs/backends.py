@@ -0,0 +1,88 @@
+"""
+Backend quyết định job được thực thi ở đâu sau khi đã ghi vào bảng Job:
+- database: worker `python manage.py run_jobs` poll bảng Job (mặc định, không cần thêm hạ tầng)
+- immediate: chạy ngay trong process sau khi transaction commit (dev/test)
+- celery: gửi job_id sang Celery (Redis/RabbitMQ broker); chỉ import celery khi backend này được dùng
+
+Bảng Job luôn là nguồn sự thật cho trạng thái/kết quả, nên API status giống nhau với mọi backend.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+CELERY_TASK_NAME = 'apps.jobs.execute'
+
+
+class BaseJobBackend:
+    def dispatch(self, job, countdown: float = 0) -> None:
+        """
+        Báo cho nơi thực thi biết có job mới (hoặc job được retry sau `countdown` giây)
+        """
+        raise NotImplementedError
+
+
+class DatabaseJobBackend(BaseJobBackend):
+    def dispatch(self, job, countdown: float = 0) -> None:
+        # Worker tự poll bảng Job theo run_at, không cần làm gì thêm
+        pass
+
+
+class ImmediateJobBackend(BaseJobBackend):
+    def dispatch(self, job, countdown: float = 0) -> None:
+        if countdown > 0:
+            # Lần retry để lại cho worker run_jobs (nếu có) xử lý theo run_at
+            return
+        from apps.jobs.services import run_job
+        transaction.on_commit(lambda: run_job(job.pk, worker_name='immediate'))
+
+
+class CeleryJobBackend(BaseJobBackend):
+    def __init__(self):
+        try:
+            from celery import current_app
+        except ImportError as exc:
+            raise ImproperlyConfigured("JOB_BACKEND='celery' cần cài đặt package celery") from exc
+        self.app = current_app
+
+    def dispatch(self, job, countdown: float = 0) -> None:
+        options = {'queue': job.queue, 'priority': max(0, min(9, job.priority))}
+        if countdown > 0:
+            options['countdown'] = countdown
+        transaction.on_commit(lambda: self.app.send_task(CELERY_TASK_NAME, args=[job.pk], **options))
+
+
+def register_celery_task(app):
+    """
+    Đăng ký task thực thi Job trong Celery app của worker:
+
+        from apps.jobs.backends import register_celery_task
+        register_celery_task(celery_app)
+    """
+    from apps.jobs.services import run_job
+
+    @app.task(name=CELERY_TASK_NAME, ignore_result=True)
+    def execute(job_pk):
+        run_job(job_pk, worker_name='celery')
+
+    return execute
+
+
+BACKENDS = {
+    'database': DatabaseJobBackend,
+    'immediate': ImmediateJobBackend,
+    'celery': CeleryJobBackend,
+}
+
+_backend = None
+_backend_key = None
+
+
+def get_backend() -> BaseJobBackend:
+    global _backend, _backend_key
+    key = settings.JOB_BACKEND
+    if _backend is None or _backend_key != key:
+        backend_class = BACKENDS.get(key) or import_string(key)
+        _backend = backend_class()
+        _backend_key = key
+    return _backend
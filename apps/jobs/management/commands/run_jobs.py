@@ -0,0 +1,54 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.services import default_worker_name, requeue_stale_jobs, work
+
+
+class Command(BaseCommand):
+    help = "Chạy worker xử lý hàng đợi job nền (JOB_BACKEND='database')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Số thread worker")
+        parser.add_argument('--queue', action='append', dest='queues', help="Chỉ xử lý queue này (lặp lại được)")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Số giây chờ khi hàng đợi trống")
+        parser.add_argument('--burst', action='store_true', help="Xử lý hết job đến hạn rồi thoát")
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping workers after current jobs...")
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        processed = []
+        base_name = default_worker_name()
+
+        def run(index):
+            processed.append(work(
+                f"{base_name}-{index}",
+                queues=options['queues'],
+                stop_event=stop_event,
+                poll_interval=options['poll_interval'],
+                exit_when_empty=options['burst'],
+            ))
+
+        threads = [
+            threading.Thread(target=run, args=(index,), name=f"job-worker-{index}", daemon=True)
+            for index in range(max(1, options['workers']))
+        ]
+        for thread in threads:
+            thread.start()
+        # join có timeout để main thread vẫn nhận được tín hiệu dừng
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {sum(processed)} job(s)"))
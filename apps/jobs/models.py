@@ -0,0 +1,67 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from apps.utils.enum_type import StatusJobEnum
+
+
+class Job(models.Model):
+    """
+    Một job trong hàng đợi nền.
+    Worker lấy job PENDING có run_at <= now theo thứ tự priority giảm dần, rồi run_at, rồi id
+    """
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    priority = models.SmallIntegerField(default=0)
+
+    status = models.CharField(max_length=20, choices=StatusJobEnum.choices(), default=StatusJobEnum.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='jobs'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'queue', '-priority', 'run_at'], name='jobs_job_claim_idx'),
+            models.Index(fields=['status', 'locked_at'], name='jobs_job_stale_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job({self.name}) - {self.status}"
+
+    def to_dict(self):
+        return {
+            "job_id": str(self.job_id),
+            "name": self.name,
+            "queue": self.queue,
+            "priority": self.priority,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "run_at": self.run_at,
+            "result": self.result,
+            "last_error": self.last_error.strip().splitlines()[-1] if self.last_error else None,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
@@ -0,0 +1,61 @@
+"""
+Registry các task chạy nền. Khai báo task trong `tasks.py` của app bằng decorator `@task`:
+
+    @task(name='user.send_html_mail', max_attempts=5)
+    def send_html_mail(subject, html_message, recipient_list): ...
+
+    send_html_mail.delay(subject, html, [email])   # đưa vào hàng đợi
+    send_html_mail(subject, html, [email])         # gọi trực tiếp (đồng bộ)
+"""
+from typing import Callable, Dict, Optional
+
+_registry: Dict[str, 'Task'] = {}
+
+
+class Task:
+    def __init__(self, func: Callable, name: str, max_attempts: Optional[int] = None,
+                 priority: int = 0, queue: str = 'default'):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.priority = priority
+        self.queue = queue
+        self.__doc__ = func.__doc__
+        self.__name__ = func.__name__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Đưa task vào hàng đợi với các tham số mặc định của task, trả về Job
+        """
+        return self.enqueue(args=args, kwargs=kwargs)
+
+    def enqueue(self, args=(), kwargs=None, **options):
+        from apps.jobs.services import enqueue
+        return enqueue(self.name, args=args, kwargs=kwargs, **options)
+
+
+def task(name: Optional[str] = None, max_attempts: Optional[int] = None, priority: int = 0, queue: str = 'default'):
+    """
+    Decorator đăng ký hàm làm task nền. Tham số của task phải serialize được JSON
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        if task_name in _registry and _registry[task_name].func is not func:
+            raise ValueError(f"Task '{task_name}' đã được đăng ký")
+        _registry[task_name] = Task(func, task_name, max_attempts=max_attempts, priority=priority, queue=queue)
+        return _registry[task_name]
+    return decorator
+
+
+def get_task(name: str) -> Task:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Task '{name}' chưa được đăng ký") from None
+
+
+def registered_tasks() -> Dict[str, Task]:
+    return dict(_registry)
@@ -0,0 +1,176 @@
+"""
+Đưa job vào hàng đợi, claim và thực thi job
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from apps.jobs.backends import get_backend
+from apps.jobs.models import Job
+from apps.jobs.registry import get_task
+from apps.utils.enum_type import StatusJobEnum
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name: str, args: Iterable = (), kwargs: Optional[dict] = None, priority: Optional[int] = None,
+            queue: Optional[str] = None, max_attempts: Optional[int] = None, countdown: float = 0,
+            user=None) -> Job:
+    """
+    Ghi job vào bảng Job (cùng transaction với request hiện tại) và báo cho backend.
+    `countdown`: số giây trì hoãn trước khi job được chạy
+    """
+    task = get_task(name)
+    job = Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=task.priority if priority is None else priority,
+        queue=queue or task.queue,
+        max_attempts=max_attempts or task.max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=countdown),
+        user=user if user is not None and user.pk else None,
+    )
+    get_backend().dispatch(job, countdown=countdown)
+    return job
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:100]
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Backoff lũy thừa theo số lần đã chạy: JOB_RETRY_BACKOFF * 2^(attempts-1), tối đa JOB_RETRY_BACKOFF_MAX
+    """
+    return min(settings.JOB_RETRY_BACKOFF_MAX, settings.JOB_RETRY_BACKOFF * (2 ** max(0, attempts - 1)))
+
+
+def _claim(queryset, worker_name: str) -> int:
+    # Claim lạc quan: chỉ 1 worker update được job còn PENDING, không cần khóa bảng
+    return queryset.filter(status=StatusJobEnum.PENDING).update(
+        status=StatusJobEnum.RUNNING,
+        attempts=F('attempts') + 1,
+        locked_at=timezone.now(),
+        locked_by=worker_name,
+        updated_at=timezone.now(),
+    )
+
+
+def claim_next_job(worker_name: str, queues: Optional[Iterable[str]] = None, batch: int = 10) -> Optional[Job]:
+    """
+    Lấy job đến hạn có priority cao nhất và đánh dấu RUNNING cho worker hiện tại
+    """
+    candidates = Job.objects.filter(status=StatusJobEnum.PENDING, run_at__lte=timezone.now())
+    if queues:
+        candidates = candidates.filter(queue__in=list(queues))
+    pks = list(candidates.order_by('-priority', 'run_at', 'id').values_list('pk', flat=True)[:batch])
+    for pk in pks:
+        if _claim(Job.objects.filter(pk=pk), worker_name):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def execute_job(job: Job) -> Job:
+    """
+    Chạy job đã được claim. Lỗi thì retry theo backoff cho đến khi hết max_attempts
+    """
+    now = timezone.now
+    retryable = True
+    try:
+        try:
+            task = get_task(job.name)
+        except LookupError:
+            retryable = False
+            raise
+        result = task.func(*job.args, **job.kwargs)
+        # Kết quả phải lưu được dạng JSON (datetime, Decimal, UUID... được chuyển sang chuỗi)
+        result = json.loads(json.dumps(result, cls=DjangoJSONEncoder))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        job.locked_by = ''
+        if retryable and job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            job.status = StatusJobEnum.PENDING
+            job.run_at = now() + timedelta(seconds=delay)
+            job.save(update_fields=['status', 'run_at', 'last_error', 'locked_at', 'locked_by', 'updated_at'])
+            logger.warning("Job %s (%s) failed, retry in %.1fs (attempt %s/%s)",
+                           job.job_id, job.name, delay, job.attempts, job.max_attempts)
+            get_backend().dispatch(job, countdown=delay)
+        else:
+            job.status = StatusJobEnum.FAILED
+            job.finished_at = now()
+            job.save(update_fields=['status', 'last_error', 'locked_at', 'locked_by', 'finished_at', 'updated_at'])
+            logger.error("Job %s (%s) failed permanently after %s attempt(s)", job.job_id, job.name, job.attempts)
+        return job
+
+    job.status = StatusJobEnum.SUCCEEDED
+    job.result = result
+    job.finished_at = now()
+    job.locked_at = None
+    job.save(update_fields=['status', 'result', 'finished_at', 'locked_at', 'updated_at'])
+    return job
+
+
+def run_job(job_pk: int, worker_name: Optional[str] = None) -> Optional[Job]:
+    """
+    Claim và chạy 1 job cụ thể (backend immediate/celery). Trả về None nếu job đã được worker khác lấy
+    """
+    if not _claim(Job.objects.filter(pk=job_pk), worker_name or default_worker_name()):
+        return None
+    return execute_job(Job.objects.get(pk=job_pk))
+
+
+def requeue_stale_jobs(timeout: Optional[int] = None) -> int:
+    """
+    Trả về hàng đợi các job RUNNING quá `timeout` giây (worker chết giữa chừng)
+    """
+    timeout = settings.JOB_STALE_TIMEOUT if timeout is None else timeout
+    stale = Job.objects.filter(status=StatusJobEnum.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=StatusJobEnum.FAILED, finished_at=timezone.now(), locked_at=None, locked_by='',
+        last_error='Worker stopped before the job finished', updated_at=timezone.now(),
+    )
+    requeued = stale.update(
+        status=StatusJobEnum.PENDING, run_at=timezone.now(), locked_at=None, locked_by='', updated_at=timezone.now(),
+    )
+    return failed + requeued
+
+
+def work(worker_name: str, queues: Optional[Iterable[str]] = None, stop_event: Optional[threading.Event] = None,
+         poll_interval: Optional[float] = None, exit_when_empty: bool = False) -> int:
+    """
+    Vòng lặp worker: claim -> execute cho đến khi `stop_event` được set
+    (hoặc hết job nếu `exit_when_empty`). Trả về số job đã xử lý
+    """
+    stop_event = stop_event or threading.Event()
+    poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    processed = 0
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            job = claim_next_job(worker_name, queues)
+        except Exception:
+            logger.exception("Worker %s could not claim a job", worker_name)
+            job = None
+        if job is None:
+            if exit_when_empty:
+                break
+            stop_event.wait(poll_interval)
+            continue
+        execute_job(job)
+        processed += 1
+    close_old_connections()
+    return processed
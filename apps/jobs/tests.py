@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.jobs.models import Job
+from apps.jobs.registry import task
+from apps.jobs.services import (
+    _claim, claim_next_job, enqueue, execute_job, requeue_stale_jobs, work,
+)
+from apps.user.models import User
+from apps.utils.enum_type import RoleSystemEnum, StatusJobEnum, TypeEmailEnum
+from apps.utils.send_mail import sent_mail_verification
+
+CALLS = []
+
+
+@task(name='tests.add')
+def add(a, b):
+    CALLS.append((a, b))
+    return {"sum": a + b}
+
+
+@task(name='tests.flaky', max_attempts=2)
+def flaky():
+    raise RuntimeError("boom")
+
+
+def _create_user(username, role=RoleSystemEnum.USER.value):
+    return User.objects.create(
+        email=f"{username}@example.com",
+        username=username,
+        full_name=username,
+        role=role,
+        is_active=True,
+    )
+
+
+@override_settings(JOB_BACKEND='database', JOB_RETRY_BACKOFF=10, JOB_RETRY_BACKOFF_MAX=60)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_claim_and_execute(self):
+        job = add.delay(1, 2)
+        self.assertEqual(job.status, StatusJobEnum.PENDING)
+
+        claimed = claim_next_job("worker-1")
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, StatusJobEnum.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        # Worker khác không claim lại được job đã RUNNING
+        self.assertEqual(_claim(Job.objects.filter(pk=job.pk), "worker-2"), 0)
+
+        execute_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusJobEnum.SUCCEEDED)
+        self.assertEqual(job.result, {"sum": 3})
+        self.assertIsNone(claim_next_job("worker-1"))
+
+    def test_priority_and_run_at(self):
+        low = enqueue('tests.add', args=(1, 1), priority=0)
+        high = enqueue('tests.add', args=(2, 2), priority=10)
+        enqueue('tests.add', args=(3, 3), priority=20, countdown=60)
+
+        self.assertEqual(work("worker-1", exit_when_empty=True), 2)
+        self.assertEqual(CALLS, [(2, 2), (1, 1)])
+        self.assertEqual(Job.objects.filter(pk__in=[low.pk, high.pk], status=StatusJobEnum.SUCCEEDED).count(), 2)
+
+    def test_retry_with_backoff_then_fail(self):
+        job = flaky.delay()
+        execute_job(claim_next_job("worker-1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusJobEnum.PENDING)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        execute_job(claim_next_job("worker-1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusJobEnum.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_requeue_stale_jobs(self):
+        job = add.delay(1, 2)
+        claim_next_job("worker-1")
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(timeout=60), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusJobEnum.PENDING)
+
+    @override_settings(JOB_BACKEND='immediate')
+    def test_immediate_backend_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = add.delay(2, 3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusJobEnum.SUCCEEDED)
+        self.assertEqual(CALLS, [(2, 3)])
+
+    def test_verification_mail_sent_by_worker(self):
+        user = _create_user("mail_user")
+        job = sent_mail_verification(user, TypeEmailEnum.REGISTER)
+        self.assertEqual(len(mail.outbox), 0)
+
+        work("worker-1", queues=['email'], exit_when_empty=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, StatusJobEnum.SUCCEEDED)
+        self.assertEqual(mail.outbox[0].to, ["mail_user@example.com"])
+
+
+class JobStatusApiTests(APITestCase):
+    def test_owner_and_admin_can_read_status(self):
+        owner = _create_user("job_owner")
+        job = enqueue('tests.add', args=(1, 2), user=owner)
+        url = reverse("job-status", kwargs={"job_id": job.job_id})
+
+        self.client.force_authenticate(user=owner)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], StatusJobEnum.PENDING)
+
+        self.client.force_authenticate(user=_create_user("job_other"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_authenticate(user=_create_user("job_admin", RoleSystemEnum.ADMIN.value))
+        self.assertEqual(self.client.get(url).status_code, 200)
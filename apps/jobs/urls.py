@@ -0,0 +1,6 @@
+from django.urls import path
+from apps.jobs.views import JobStatusViewSet
+
+urlpatterns = [
+    path('jobs/<uuid:job_id>/', JobStatusViewSet.as_view(), name='job-status'),
+]
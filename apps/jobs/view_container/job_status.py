@@ -0,0 +1,33 @@
+"""
+View xem trạng thái job nền
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+
+from apps.depends.oauth2 import IsUser
+from apps.jobs.models import Job
+from apps.utils.enum_type import RoleSystemEnum
+
+
+class JobStatusViewSet(APIView):
+    """
+    API xem trạng thái/kết quả job
+    Endpoint: /api/jobs/<job_id>/
+    """
+    permission_classes = [IsUser]
+
+    @swagger_auto_schema(
+        operation_summary="Trạng thái job nền",
+        operation_description="User chỉ xem được job của mình, ADMIN xem được mọi job.",
+        responses={200: "OK", 404: "Không tìm thấy job"},
+    )
+    def get(self, request, job_id):
+        jobs = Job.objects.filter(job_id=job_id)
+        if request.user.role != RoleSystemEnum.ADMIN:
+            jobs = jobs.filter(user_id=request.user.id)
+        job = jobs.first()
+        if job is None:
+            return Response({"error": "Không tìm thấy job"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job.to_dict())
@@ -0,0 +1 @@
+from apps.jobs.view_container.job_status import *
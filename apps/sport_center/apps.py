@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SportCenterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.sport_center'
+
+    def ready(self):
+        from PIL import Image
+
+        from apps.sport_center import signals  # noqa: F401
+
+        # Giới hạn số pixel PIL chịu decode (chống decompression bomb)
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
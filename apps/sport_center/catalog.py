@@ -0,0 +1,55 @@
+"""
+Catalog of sport centers with nested fields and image variants, built with a fixed number of queries.
+
+One query for the page of centers, one for their fields and one for the images of both, whatever
+the page size. The ETag comes from max(updated_at) + count of the centers matching the filters and
+of their fields (one aggregate query, see SportCatalogView): field changes and image changes touch
+the owning center/field (refresh_counters, touch_image_owners), so it holds across processes.
+"""
+from django.db.models import Exists, OuterRef
+
+from apps.sport_center.models import ImageSport, SportCenter, SportField
+
+CENTER_VALUES = ('id', 'name', 'address', 'district', 'latitude', 'longitude', 'total_field', 'active_field',
+                 'image_count', 'min_price', 'max_price')
+FIELD_VALUES = ('id', 'sport_center_id', 'name', 'address', 'district', 'sport_type', 'price', 'status')
+
+
+def catalog_centers(district='', sport_type=''):
+    queryset = SportCenter.objects.all()
+    if district:
+        queryset = queryset.filter(district=district)
+    if sport_type:
+        queryset = queryset.filter(
+            Exists(SportField.objects.filter(sport_center=OuterRef('pk'), sport_type=sport_type)))
+    return queryset
+
+
+def build_catalog(limit=20, offset=0, district='', sport_type=''):
+    """
+    {'results': [center + fields[] + images[]], 'next_offset': int | None} trong 3 query
+    """
+    centers_queryset = catalog_centers(district, sport_type).order_by('-created_at', '-id')
+    fields_queryset = SportField.objects.order_by('sport_center_id', 'name', 'id')
+    if sport_type:
+        fields_queryset = fields_queryset.filter(sport_type=sport_type)
+
+    # Lấy thêm 1 row để biết còn trang sau, không cần COUNT
+    centers = list(centers_queryset.values(*CENTER_VALUES)[offset:offset + limit + 1])
+    has_more = len(centers) > limit
+    centers = centers[:limit]
+    center_ids = [center['id'] for center in centers]
+    fields = list(fields_queryset.filter(sport_center__in=center_ids).values(*FIELD_VALUES)) if center_ids else []
+    field_ids = [field['id'] for field in fields]
+
+    image_maps = ImageSport.objects.variant_maps((SportCenter, center_ids), (SportField, field_ids))
+    center_images, field_images = image_maps[SportCenter], image_maps[SportField]
+
+    fields_by_center = {}
+    for field in fields:
+        field['images'] = field_images.get(field['id'], [])
+        fields_by_center.setdefault(field.pop('sport_center_id'), []).append(field)
+    for center in centers:
+        center['images'] = center_images.get(center['id'], [])
+        center['fields'] = fields_by_center.get(center['id'], [])
+    return {'results': centers, 'next_offset': offset + limit if has_more else None}
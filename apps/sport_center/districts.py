@@ -0,0 +1,45 @@
+"""
+Đà Nẵng district normalization: free-text address / area query -> DistrictEnum value.
+
+Aliases are compared after fold_text, so accents, case and punctuation do not matter
+("Q. Hải Châu", "quan hai chau", "HaiChau" -> HAI_CHAU).
+"""
+from apps.utils.enum_type import DistrictEnum
+from apps.utils.text_search import find_last_phrase, fold_text
+
+DISTRICT_ALIASES = {
+    DistrictEnum.HAI_CHAU: ('Hải Châu', 'HaiChau'),
+    DistrictEnum.THANH_KHE: ('Thanh Khê', 'ThanhKhe'),
+    DistrictEnum.SON_TRA: ('Sơn Trà', 'SonTra'),
+    DistrictEnum.NGU_HANH_SON: ('Ngũ Hành Sơn', 'NguHanhSon', 'NHS'),
+    DistrictEnum.LIEN_CHIEU: ('Liên Chiểu', 'LienChieu'),
+    DistrictEnum.CAM_LE: ('Cẩm Lệ', 'CamLe'),
+    DistrictEnum.HOA_VANG: ('Hòa Vang', 'Hoà Vang', 'HoaVang'),
+    DistrictEnum.HOANG_SA: ('Hoàng Sa', 'HoangSa'),
+}
+# Tiền tố đơn vị hành chính được bỏ qua khi so khớp nguyên câu truy vấn
+DISTRICT_PREFIXES = ('quan', 'q', 'huyen', 'h', 'district')
+
+ALIAS_TO_DISTRICT = {
+    fold_text(alias): district.value
+    for district, aliases in DISTRICT_ALIASES.items()
+    for alias in (*aliases, district.value)
+}
+
+
+def parse_district(address) -> str:
+    """
+    Quận/huyện xuất hiện cuối cùng trong địa chỉ, '' nếu không nhận ra
+    """
+    alias = find_last_phrase(fold_text(address), ALIAS_TO_DISTRICT)
+    return ALIAS_TO_DISTRICT[alias] if alias else ''
+
+
+def normalize_district(query) -> str:
+    """
+    Giá trị DistrictEnum nếu cả câu truy vấn là tên 1 quận/huyện (vd. "Quận Hải Châu", "HAI_CHAU"), ngược lại ''
+    """
+    words = fold_text(query).split()
+    if len(words) > 1 and words[0] in DISTRICT_PREFIXES:
+        words = words[1:]
+    return ALIAS_TO_DISTRICT.get(' '.join(words), '')
@@ -0,0 +1,81 @@
+"""
+Gazetteer geocoding and "nearest center" radius search for SportCenter.
+
+Addresses are geocoded offline against a CSV gazetteer (settings.SPORT_CENTER_GAZETTEER,
+district-level for Đà Nẵng by default); owners can always set exact coordinates instead.
+Radius queries scan only the geohash cells covering the query's bounding box (index range
+scans on SportCenter.geohash), then order the survivors by haversine distance.
+"""
+import csv
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from apps.booking.models import Booking
+from apps.sport_center.models import SportCenter
+from apps.utils.enum_type import StatusBookingEnum, StatusFieldEnum
+from apps.utils.geo import bounding_box, covering_geohashes, haversine_km
+from apps.utils.text_search import find_last_phrase, fold_text
+
+
+@lru_cache(maxsize=8)
+def load_gazetteer(path):
+    """
+    {tên đã bỏ dấu: (latitude, longitude)} từ file CSV có header name,latitude,longitude
+    """
+    with open(path, newline='', encoding='utf-8') as gazetteer:
+        return {
+            fold_text(row['name']): (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(gazetteer) if fold_text(row.get('name'))
+        }
+
+
+def geocode_address(address, gazetteer_path=None):
+    """
+    (latitude, longitude) của địa danh trong gazetteer xuất hiện (cuối cùng) trong địa chỉ, None nếu không khớp
+    """
+    places = load_gazetteer(gazetteer_path or settings.SPORT_CENTER_GAZETTEER)
+    name = find_last_phrase(fold_text(address), places)
+    return places[name] if name else None
+
+
+def nearby_centers(latitude, longitude, radius_km, queryset=None):
+    """
+    Các trung tâm trong bán kính radius_km, gần nhất trước (gán thêm `distance_km`)
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    cells = Q()
+    for prefix in covering_geohashes(box):
+        # '~' đứng sau mọi ký tự geohash: range scan trên index thay cho LIKE 'prefix%'
+        cells |= Q(geohash__gte=prefix, geohash__lt=f"{prefix}~")
+    queryset = SportCenter.objects.all() if queryset is None else queryset
+    candidates = queryset.filter(cells, latitude__range=box[:2], longitude__range=box[2:])
+
+    centers = []
+    for center in candidates:
+        center.distance_km = haversine_km(latitude, longitude, center.latitude, center.longitude)
+        if center.distance_km <= radius_km:
+            centers.append(center)
+    centers.sort(key=lambda center: center.distance_km)
+    return centers
+
+
+def availability_by_center(center_ids, booking_date):
+    """
+    {center_id: {'available_slots': n, 'available_fields': m}} (booking PENDING của sân ACTIVE) trong 1 query
+    """
+    rows = (
+        Booking.objects
+        .filter(status=StatusBookingEnum.PENDING.value, booking_date=booking_date,
+                sport_field__status=StatusFieldEnum.ACTIVE.value, sport_field__sport_center__in=center_ids)
+        .values('sport_field__sport_center')
+        .annotate(available_slots=Count('id'), available_fields=Count('sport_field', distinct=True))
+    )
+    availability = defaultdict(lambda: {'available_slots': 0, 'available_fields': 0})
+    for row in rows:
+        availability[row['sport_field__sport_center']] = {
+            'available_slots': row['available_slots'], 'available_fields': row['available_fields'],
+        }
+    return availability
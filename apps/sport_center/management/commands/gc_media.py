@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.sport_center.models import referenced_media_paths
+
+MEDIA_DIRS = ('images', 'images/preview', 'images/variants')
+# Số file mỗi lô stat() giao cho 1 thread
+STAT_BATCH_SIZE = 500
+
+
+def list_directory(media_root, directory):
+    """
+    Tên file trong 1 thư mục (không đệ quy), đường dẫn tương đối MEDIA_ROOT.
+    scandir lấy loại file từ chính lần đọc thư mục, không cần stat()
+    """
+    try:
+        with os.scandir(os.path.join(media_root, directory)) as entries:
+            # Bỏ qua file ẩn (vd. manifest của regenerate_previews)
+            return [f"{directory}/{entry.name}" for entry in entries
+                    if not entry.name.startswith('.') and entry.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def stat_files(media_root, paths):
+    """
+    [(path, size, mtime)] của 1 lô file; file bị xóa trong lúc quét thì bỏ qua
+    """
+    files = []
+    for path in paths:
+        try:
+            stat_result = os.stat(os.path.join(media_root, path))
+        except FileNotFoundError:
+            continue
+        files.append((path, stat_result.st_size, stat_result.st_mtime))
+    return files
+
+
+class Command(BaseCommand):
+    help = "Xóa file ảnh trong MEDIA_ROOT không còn được ImageBlob/ImageSport tham chiếu (file mồ côi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Số thread stat/xóa file")
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help="Chỉ xóa file cũ hơn N phút (tránh xóa file của upload đang lưu)")
+        parser.add_argument('--dry-run', action='store_true', help="Chỉ liệt kê, không xóa")
+
+    def handle(self, *args, **options):
+        media_root = settings.MEDIA_ROOT
+        workers = max(1, options['workers'])
+        started = time.perf_counter()
+
+        paths = [path for directory in MEDIA_DIRS for path in list_directory(media_root, directory)]
+        # stat() chia theo lô file (không theo thư mục) để các thread nhận việc đều nhau
+        batches = [paths[start:start + STAT_BATCH_SIZE] for start in range(0, len(paths), STAT_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            files = [file for batch in pool.map(lambda batch: stat_files(media_root, batch), batches)
+                     for file in batch]
+        # Lấy tham chiếu sau khi quét: row commit trong lúc quét vẫn được tính
+        referenced = referenced_media_paths()
+        cutoff = time.time() - options['grace_minutes'] * 60
+        orphans = [(path, size) for path, size, mtime in files if path not in referenced and mtime < cutoff]
+        freed = sum(size for _, size in orphans)
+
+        if options['dry_run']:
+            for path, _ in orphans:
+                self.stdout.write(path)
+        elif orphans:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda orphan: self.remove(media_root, orphan[0]), orphans))
+
+        self.stdout.write(
+            f"scanned={len(files)} referenced={len(referenced)} orphans={len(orphans)} "
+            f"{'would free' if options['dry_run'] else 'freed'}={freed / (1024 * 1024):.1f}MB "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def remove(self, media_root, path):
+        try:
+            os.remove(os.path.join(media_root, path))
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            self.stderr.write(f"[x] {path}: {exc}")
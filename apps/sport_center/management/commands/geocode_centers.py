@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sport_center.geocoding import geocode_address, load_gazetteer
+from apps.sport_center.models import SportCenter
+
+
+class Command(BaseCommand):
+    help = "Gán latitude/longitude cho trung tâm từ gazetteer (CSV name,latitude,longitude) theo địa chỉ"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gazetteer', default=None, help="File CSV gazetteer (mặc định SPORT_CENTER_GAZETTEER)")
+        parser.add_argument('--overwrite', action='store_true', help="Geocode lại cả trung tâm đã có tọa độ")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Chỉ in kết quả, không ghi DB")
+
+    def handle(self, *args, **options):
+        path = options['gazetteer'] or settings.SPORT_CENTER_GAZETTEER
+        try:
+            places = load_gazetteer(path)
+        except (OSError, KeyError, ValueError) as exc:
+            raise CommandError(f"Cannot read gazetteer {path}: {exc}")
+
+        queryset = SportCenter.objects.only('id', 'address', 'latitude', 'longitude', 'geohash').order_by('id')
+        if not options['overwrite']:
+            queryset = queryset.filter(latitude__isnull=True)
+
+        matched, unmatched, batch = 0, [], []
+        for center in queryset.iterator(chunk_size=options['batch_size']):
+            location = geocode_address(center.address, path)
+            if location is None:
+                unmatched.append(center)
+                continue
+            center.latitude, center.longitude = location
+            # bulk_update không gọi save(): tự tính geohash
+            center.geohash = center.compute_geohash()
+            matched += 1
+            batch.append(center)
+            if len(batch) >= options['batch_size']:
+                self.flush(batch, options['dry_run'])
+                batch = []
+        self.flush(batch, options['dry_run'])
+
+        for center in unmatched:
+            self.stdout.write(f"[?] #{center.id} {center.address}")
+        self.stdout.write(
+            f"gazetteer={len(places)} places, geocoded={matched}, unmatched={len(unmatched)}"
+            f"{' (dry run)' if options['dry_run'] else ''}"
+        )
+
+    @staticmethod
+    def flush(batch, dry_run):
+        if batch and not dry_run:
+            SportCenter.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.sport_center.models import SportCenter
+
+
+class Command(BaseCommand):
+    help = "Tính lại bộ đếm của SportCenter (total_field, active_field, image_count, min_price, max_price)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Số trung tâm mỗi câu UPDATE")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        started = time.perf_counter()
+        updated, last_id = 0, 0
+        while True:
+            # Chia theo khoảng id để mỗi câu UPDATE chỉ khóa 1 phần bảng
+            ids = list(SportCenter.objects.filter(pk__gt=last_id).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            updated += SportCenter.objects.filter(pk__in=ids).refresh_counters()
+            last_id = ids[-1]
+        self.stdout.write(f"updated={updated} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,183 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.sport_center.models import ImageBlob, ImageSport, touch_image_owners
+from apps.utils.enum_type import StatusPreviewEnum
+from apps.utils.image_processing import preview_name, regenerate_derivatives
+
+VALID_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tiff")
+MANIFEST_NAME = 'images/preview/.manifest.json'
+
+
+class Command(BaseCommand):
+    help = "Tạo lại preview (và variants) cho ảnh trong media/images bằng process pool, bỏ qua ảnh không đổi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Số process (mặc định = số core)")
+        parser.add_argument('--check', choices=['mtime', 'hash'], default='mtime',
+                            help="mtime: bỏ qua nếu preview mới hơn ảnh gốc; hash: bỏ qua nếu sha256 ảnh gốc không đổi")
+        parser.add_argument('--force', action='store_true', help="Tạo lại tất cả")
+        parser.add_argument('--variants', action='store_true', help="Tạo cả variants responsive (IMAGE_VARIANT_*)")
+        parser.add_argument('--no-db', action='store_true', help="Không cập nhật ImageSport.preview trong DB")
+
+    def handle(self, *args, **options):
+        media_root = settings.MEDIA_ROOT
+        images_dir = os.path.join(media_root, 'images')
+        if not os.path.isdir(images_dir):
+            self.stderr.write(f"Images directory not found: {images_dir}")
+            return
+
+        for sub_dir in ('preview', 'variants'):
+            os.makedirs(os.path.join(images_dir, sub_dir), exist_ok=True)
+
+        max_size = (settings.IMAGE_PREVIEW_MAX_SIZE, settings.IMAGE_PREVIEW_MAX_SIZE)
+        widths = settings.IMAGE_VARIANT_WIDTHS if options['variants'] else []
+        # Đổi cấu hình preview/variants thì manifest cũ không còn giá trị
+        profile = f"p{max_size[0]}q{settings.IMAGE_PREVIEW_QUALITY}"
+        if widths:
+            profile += (f"|v{','.join(map(str, widths))}:{','.join(settings.IMAGE_VARIANT_FORMATS)}"
+                        f"q{settings.IMAGE_VARIANT_QUALITY}")
+
+        manifest_path = os.path.join(media_root, MANIFEST_NAME)
+        manifest = self.load_manifest(manifest_path)
+        check_hash = options['check'] == 'hash'
+
+        jobs, results = [], []
+        started = time.perf_counter()
+        with os.scandir(images_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(VALID_EXTENSIONS):
+                    continue
+                name = f"images/{entry.name}"
+                known = manifest.get(name)
+                # Preview cũ (chưa có trong manifest) được tin theo mtime; khác profile thì tạo lại
+                stale_profile = known is not None and known.get('profile') != profile
+                known = {} if known is None or stale_profile else known
+                if (not options['force'] and not check_hash and not stale_profile
+                        and self.preview_is_fresh(media_root, entry, known, widths)):
+                    results.append({'name': name, 'status': 'skipped', 'bytes_read': 0})
+                    continue
+                jobs.append({
+                    'media_root': media_root,
+                    'name': name,
+                    'max_size': max_size,
+                    'quality': settings.IMAGE_PREVIEW_QUALITY,
+                    'widths': widths,
+                    'formats': settings.IMAGE_VARIANT_FORMATS,
+                    'variant_quality': settings.IMAGE_VARIANT_QUALITY,
+                    'max_pixels': settings.IMAGE_MAX_PIXELS,
+                    'check_hash': check_hash,
+                    'known_sha256': None if options['force'] or not self.preview_exists(media_root, entry)
+                    else known.get('sha256'),
+                })
+
+        workers = max(1, options['workers'])
+        self.stdout.write(f"{len(jobs)} image(s) to process with {workers} worker(s), {len(results)} up to date")
+        if jobs:
+            chunksize = max(1, min(64, len(jobs) // (workers * 4)))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for index, result in enumerate(pool.map(regenerate_derivatives, jobs, chunksize=chunksize), 1):
+                    results.append(result)
+                    if result['status'] == 'failed':
+                        self.stderr.write(f"[x] {result['name']}: {result['error']}")
+                    if index % 1000 == 0:
+                        self.report(results, started, prefix=f"{index}/{len(jobs)} ")
+
+        for result in results:
+            if result['status'] == 'generated':
+                manifest[result['name']] = {
+                    'profile': profile,
+                    'sha256': result.get('sha256'),
+                    'preview': result['preview'],
+                    'variants': result['variants'],
+                }
+        self.save_manifest(manifest_path, manifest)
+
+        if not options['no_db']:
+            updated = self.backfill(results, manifest, bool(widths))
+            self.stdout.write(f"Updated {updated} ImageSport row(s)")
+        self.report(results, started)
+
+    @staticmethod
+    def preview_path(media_root, entry):
+        return os.path.join(media_root, 'images', 'preview', preview_name(entry.name))
+
+    def preview_exists(self, media_root, entry):
+        return os.path.exists(self.preview_path(media_root, entry))
+
+    def preview_is_fresh(self, media_root, entry, known, widths):
+        try:
+            fresh = os.stat(self.preview_path(media_root, entry)).st_mtime >= entry.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        # Variants chỉ được coi là có khi manifest ghi nhận lần chạy cùng cấu hình
+        return fresh and (not widths or bool(known.get('variants')))
+
+    @staticmethod
+    def load_manifest(path):
+        try:
+            with open(path) as manifest_file:
+                return json.load(manifest_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def save_manifest(path, manifest):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def backfill(results, manifest, with_variants, batch_size=1000):
+        """
+        Ghi đường dẫn preview/variants vào ImageBlob/ImageSport theo từng batch (bulk_update)
+        """
+        outputs = {}
+        for result in results:
+            if result['status'] == 'failed':
+                continue
+            known = manifest.get(result['name'], {})
+            outputs[result['name']] = {
+                'preview': result.get('preview') or known.get('preview') or f"images/preview/{preview_name(result['name'])}",
+                'variants': result.get('variants') if 'variants' in result else known.get('variants'),
+            }
+
+        names = list(outputs)
+        updated = 0
+        for start in range(0, len(names), batch_size):
+            for model in (ImageBlob, ImageSport):
+                changed = []
+                fields = ('content_type', 'object_id') if model is ImageSport else ()
+                for image in model.objects.filter(file__in=names[start:start + batch_size]).only(
+                        'id', 'file', 'preview', 'preview_status', 'variants', *fields):
+                    output = outputs[image.file.name]
+                    variants = output['variants'] if with_variants and output['variants'] is not None else image.variants
+                    if (image.preview.name, image.preview_status, image.variants) == (
+                            output['preview'], StatusPreviewEnum.READY, variants):
+                        continue
+                    image.preview = output['preview']
+                    image.preview_status = StatusPreviewEnum.READY
+                    image.variants = variants
+                    changed.append(image)
+                model.objects.bulk_update(changed, ['preview', 'preview_status', 'variants'], batch_size=500)
+                if model is ImageSport:
+                    updated += len(changed)
+                    touch_image_owners({(image.content_type_id, image.object_id) for image in changed})
+        return updated
+
+    def report(self, results, started, prefix=''):
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        counts = {status: sum(1 for result in results if result['status'] == status)
+                  for status in ('generated', 'skipped', 'failed')}
+        processed = counts['generated'] + counts['failed']
+        megabytes = sum(result.get('bytes_read', 0) for result in results) / (1024 * 1024)
+        self.stdout.write(
+            f"{prefix}generated={counts['generated']} skipped={counts['skipped']} failed={counts['failed']} "
+            f"in {elapsed:.1f}s ({processed / elapsed:.1f} images/s, {megabytes / elapsed:.1f} MB/s)"
+        )
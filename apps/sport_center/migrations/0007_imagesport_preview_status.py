@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:37
+
+import apps.utils.enum_type
+from django.db import migrations, models
+
+
+def mark_existing_previews_ready(apps, schema_editor):
+    # Ảnh cũ đã có preview tạo đồng bộ lúc upload
+    ImageSport = apps.get_model('sport_center', 'ImageSport')
+    ImageSport.objects.exclude(preview__isnull=True).exclude(preview='').update(preview_status='READY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0006_alter_sportfield_sport_center'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagesport',
+            name='preview_status',
+            field=models.CharField(choices=[('PENDING', 'PENDING'), ('READY', 'READY'), ('FAILED', 'FAILED')], default=apps.utils.enum_type.StatusPreviewEnum['PENDING'], max_length=20),
+        ),
+        migrations.RunPython(mark_existing_previews_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0007_imagesport_preview_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagesport',
+            name='variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
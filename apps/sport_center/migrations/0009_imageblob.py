@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:42
+
+import apps.utils.enum_type
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0008_imagesport_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.ImageField(upload_to='images/')),
+                ('preview', models.ImageField(null=True, upload_to='images/preview/')),
+                ('preview_status', models.CharField(choices=[('PENDING', 'PENDING'), ('READY', 'READY'), ('FAILED', 'FAILED')], default=apps.utils.enum_type.StatusPreviewEnum['PENDING'], max_length=20)),
+                ('variants', models.JSONField(blank=True, default=list)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='imagesport',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='images', to='sport_center.imageblob'),
+        ),
+    ]
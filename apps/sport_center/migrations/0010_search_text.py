@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:57
+
+from django.db import migrations, models
+
+from apps.utils.text_search import fold_text
+
+
+def fill_search_text(apps, schema_editor):
+    for model_name in ('SportCenter', 'SportField'):
+        model = apps.get_model('sport_center', model_name)
+        rows = list(model.objects.using(schema_editor.connection.alias).only('id', 'name', 'address'))
+        for row in rows:
+            row.search_name, row.search_address = fold_text(row.name), fold_text(row.address)
+        model.objects.using(schema_editor.connection.alias).bulk_update(
+            rows, ['search_name', 'search_address'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0009_imageblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sportcenter',
+            name='search_address',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='sportfield',
+            name='search_address',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='sportfield',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0010_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sportcenter',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
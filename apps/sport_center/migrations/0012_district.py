@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+from apps.sport_center.districts import parse_district
+
+
+def fill_district(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    SportCenter = apps.get_model('sport_center', 'SportCenter')
+    SportField = apps.get_model('sport_center', 'SportField')
+    centers = list(SportCenter.objects.using(alias).only('id', 'address'))
+    for center in centers:
+        center.district = parse_district(center.address)
+    SportCenter.objects.using(alias).bulk_update(centers, ['district'], batch_size=500)
+
+    center_districts = {center.id: center.district for center in centers}
+    fields = list(SportField.objects.using(alias).only('id', 'address', 'sport_center_id'))
+    for field in fields:
+        field.district = parse_district(field.address) or center_districts.get(field.sport_center_id, '')
+    SportField.objects.using(alias).bulk_update(fields, ['district'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0011_sportcenter_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sportcenter',
+            name='district',
+            field=models.CharField(blank=True, choices=[('HAI_CHAU', 'HAI_CHAU'), ('THANH_KHE', 'THANH_KHE'), ('SON_TRA', 'SON_TRA'), ('NGU_HANH_SON', 'NGU_HANH_SON'), ('LIEN_CHIEU', 'LIEN_CHIEU'), ('CAM_LE', 'CAM_LE'), ('HOA_VANG', 'HOA_VANG'), ('HOANG_SA', 'HOANG_SA')], db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='sportfield',
+            name='district',
+            field=models.CharField(blank=True, choices=[('HAI_CHAU', 'HAI_CHAU'), ('THANH_KHE', 'THANH_KHE'), ('SON_TRA', 'SON_TRA'), ('NGU_HANH_SON', 'NGU_HANH_SON'), ('LIEN_CHIEU', 'LIEN_CHIEU'), ('CAM_LE', 'CAM_LE'), ('HOA_VANG', 'HOA_VANG'), ('HOANG_SA', 'HOANG_SA')], db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_district, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:04
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    SportCenter = apps.get_model('sport_center', 'SportCenter')
+    SportField = apps.get_model('sport_center', 'SportField')
+    ImageSport = apps.get_model('sport_center', 'ImageSport')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    center_ct = ContentType.objects.using(alias).filter(app_label='sport_center', model='sportcenter').first()
+    fields = SportField.objects.using(alias).filter(sport_center=OuterRef('pk')).order_by().values('sport_center')
+    images = (ImageSport.objects.using(alias).filter(content_type=center_ct, object_id=OuterRef('pk'))
+              .order_by().values('object_id'))
+    SportCenter.objects.using(alias).update(
+        total_field=Coalesce(Subquery(fields.annotate(total=Count('id')).values('total')), 0),
+        active_field=Coalesce(Subquery(fields.filter(status='ACTIVE').annotate(total=Count('id')).values('total')), 0),
+        image_count=Coalesce(Subquery(images.annotate(total=Count('id')).values('total')), 0),
+        min_price=Subquery(fields.annotate(price_min=Min('price')).values('price_min')),
+        max_price=Subquery(fields.annotate(price_max=Max('price')).values('price_max')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0012_district'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sportcenter',
+            name='active_field',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='max_price',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='min_price',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sportcenter',
+            name='total_field',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
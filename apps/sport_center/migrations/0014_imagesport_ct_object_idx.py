@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('sport_center', '0013_sportcenter_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='imagesport',
+            index=models.Index(fields=['content_type', 'object_id'], name='imagesport_ct_object_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:20
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from apps.sport_center.search import create_search_index, drop_search_index
+
+
+class PostgresTrigramExtension(TrigramExtension):
+    # TrigramExtension bỏ qua DB khác khi migrate, nhưng khi rollback vẫn query pg_extension
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_center', '0014_imagesport_ct_object_idx'),
+    ]
+
+    operations = [
+        # pg_trgm cho index GIN trigram; SQLite dùng bảng FTS5 (create_search_index)
+        PostgresTrigramExtension(),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,34 +1,131 @@
-from io import BytesIO
+import hashlib
+import os
 
-from PIL import Image
+from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.base import ContentFile
-from django.db import models
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 
 from apps.user.models import User
-from apps.utils.enum_type import StatusFieldEnum, SportTypeEnum
+from apps.sport_center.districts import parse_district
+from apps.utils.enum_type import DistrictEnum, StatusFieldEnum, SportTypeEnum, StatusPreviewEnum
+from apps.utils.geo import geohash_encode
+from apps.utils.image_processing import load_image, preview_name, render_variants, resize_preview, variant_name
+from apps.utils.mapping_data import MappingData
+from apps.utils.text_search import fold_text
 
 
-class SportCenter(models.Model):
+class SearchTextMixin(models.Model):
+    """
+    Cột chuẩn hóa từ name/address: bản bỏ dấu (index trigram/FTS5, xem apps.sport_center.search)
+    và quận/huyện (lọc khu vực bằng so sánh bằng, xem apps.sport_center.districts)
+    """
+    search_name = models.CharField(max_length=255, blank=True, default='', editable=False)
+    search_address = models.CharField(max_length=255, blank=True, default='', editable=False)
+    district = models.CharField(max_length=32, choices=DistrictEnum.choices(), blank=True, default='',
+                                db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.search_name, self.search_address = fold_text(self.name), fold_text(self.address)
+        self.district = self.compute_district()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_name', 'search_address', 'district'}
+        super().save(*args, **kwargs)
+
+    def compute_district(self):
+        return parse_district(self.address)
+
+
+class SportCenterQuerySet(models.QuerySet):
+    def refresh_counters(self):
+        """
+        Tính lại bộ đếm (số sân, sân ACTIVE, số ảnh, giá min/max) của các trung tâm trong queryset, 1 câu UPDATE
+        (đổi cả updated_at: ETag theo max updated_at của endpoint đọc đổi theo sân/ảnh)
+        Returns: số trung tâm đã cập nhật
+        """
+        fields = SportField.objects.filter(sport_center=OuterRef('pk')).order_by().values('sport_center')
+        images = (ImageSport.objects.filter(content_type_id=content_type_ids(SportCenter)[SportCenter],
+                                            object_id=OuterRef('pk')).order_by().values('object_id'))
+        return self.update(
+            total_field=Coalesce(Subquery(fields.annotate(total=Count('id')).values('total')), 0),
+            active_field=Coalesce(Subquery(fields.filter(status=StatusFieldEnum.ACTIVE.value)
+                                           .annotate(total=Count('id')).values('total')), 0),
+            image_count=Coalesce(Subquery(images.annotate(total=Count('id')).values('total')), 0),
+            min_price=Subquery(fields.annotate(price_min=Min('price')).values('price_min')),
+            max_price=Subquery(fields.annotate(price_max=Max('price')).values('price_max')),
+            updated_at=timezone.now(),
+        )
+
+
+class SportCenter(SearchTextMixin, models.Model):
     owner = models.ForeignKey(User, null=False, blank=True, on_delete=models.CASCADE)
     name = models.CharField(max_length=255, null=False, blank=True)
     address = models.CharField(max_length=255, null=False, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Tính từ latitude/longitude khi save; index cho truy vấn bán kính (apps.sport_center.geocoding)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
+    # Bộ đếm phi chuẩn hóa: cập nhật qua signal (apps.sport_center.signals), tính lại bằng rebuild_center_counters
+    total_field = models.PositiveIntegerField(default=0, editable=False)
+    active_field = models.PositiveIntegerField(default=0, editable=False)
+    image_count = models.PositiveIntegerField(default=0, editable=False)
+    min_price = models.FloatField(null=True, blank=True, db_index=True, editable=False)
+    max_price = models.FloatField(null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SportCenterQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding and (update_fields is None or 'address' in update_fields):
+            self.sync_field_districts()
+
+    def sync_field_districts(self):
+        """
+        Sân không ghi quận/huyện trong địa chỉ riêng thì theo quận/huyện của trung tâm
+        """
+        changed = []
+        for field in self.sportfield_set.only('id', 'address', 'district', 'sport_center_id'):
+            district = field.compute_district(center=self)
+            if field.district != district:
+                field.district = district
+                changed.append(field)
+        SportField.objects.bulk_update(changed, ['district'])
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return ''
+        return geohash_encode(self.latitude, self.longitude)
+
     def to_dict(self):
         return {
             "id": self.id,
             "owner": self.owner.full_name if self.owner else "None",
             "name": self.name,
             "address": self.address,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
         }
 
-class SportField(models.Model):
+class SportField(SearchTextMixin, models.Model):
     sport_center = models.ForeignKey(SportCenter, blank=True, on_delete=models.CASCADE)
     name = models.CharField(max_length=255, null=False, blank=True)
     address = models.CharField(max_length=255, null=False, blank=True)
@@ -39,6 +136,17 @@ class SportField(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Trung tâm lúc load: sân chuyển trung tâm thì cập nhật bộ đếm của cả trung tâm cũ
+        instance._loaded_sport_center_id = instance.__dict__.get('sport_center_id')
+        return instance
+
+    def compute_district(self, center=None):
+        center = center or (self.sport_center if self.sport_center_id else None)
+        return parse_district(self.address) or (center.district if center else '')
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -50,50 +158,283 @@ class SportField(models.Model):
         }
 
 
-class ImageSport(models.Model):
+class ImageMediaMixin(models.Model):
+    """
+    File gốc + preview + variants responsive (dùng chung cho ImageBlob và ImageSport)
+    """
     file = models.ImageField(upload_to='images/')
     preview = models.ImageField(upload_to='images/preview/', null=True)
-    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    object_id = models.PositiveIntegerField()
-    content_object = GenericForeignKey('content_type', 'object_id')
+    preview_status = models.CharField(max_length=20, choices=StatusPreviewEnum.choices(),
+                                      default=StatusPreviewEnum.PENDING)
+    # [{"width": 400, "height": 300, "format": "webp", "bytes": 18234, "path": "images/variants/x_400w.webp"}, ...]
+    variants = models.JSONField(default=list, blank=True)
 
-    def save(self, *args, **kwargs):
-        if self.file and not self.preview:
-            self.preview = self.create_preview(self.file)
-        super().save(*args, **kwargs)
+    class Meta:
+        abstract = True
 
-    def create_preview(self, image_field, max_size=(700, 700), quality=70):
+    def generate_preview(self, max_size=None, quality=None):
         """
+        Tạo preview JPEG và các variant responsive (IMAGE_VARIANT_WIDTHS x IMAGE_VARIANT_FORMATS)
+        từ file gốc (chỉ decode 1 lần), sau đó đánh dấu READY
         Args:
-            image_field: ImageField object
-            max_size: Kích thước tối đa (width, height)
-            quality: Chất lượng ảnh (1-100), thấp hơn = nhẹ hơn
+            max_size: Kích thước tối đa của preview (width, height)
+            quality: Chất lượng preview (1-100), thấp hơn = nhẹ hơn
+        """
+        max_size = max_size or (settings.IMAGE_PREVIEW_MAX_SIZE, settings.IMAGE_PREVIEW_MAX_SIZE)
+        quality = quality or settings.IMAGE_PREVIEW_QUALITY
+        widths = settings.IMAGE_VARIANT_WIDTHS
+        with self.file.open('rb') as source:
+            image = load_image(source, (max(widths + [max_size[0]]), max_size[1]))
+
+        self.preview.save(preview_name(self.file.name), ContentFile(resize_preview(image, max_size, quality)), save=False)
+        self.delete_variant_files()
+        self.variants = []
+        for variant in render_variants(image, widths, settings.IMAGE_VARIANT_FORMATS, settings.IMAGE_VARIANT_QUALITY):
+            content = variant.pop('content')
+            name = variant_name(self.file.name, variant['width'], variant['format'])
+            variant['path'] = default_storage.save(f"images/variants/{name}", ContentFile(content))
+            self.variants.append(variant)
+        self.preview_status = StatusPreviewEnum.READY
+        self.save(update_fields=['preview', 'preview_status', 'variants'])
+
+    def delete_variant_files(self):
+        for variant in self.variants or []:
+            default_storage.delete(variant['path'])
+
+    def media_paths(self):
+        """
+        Đường dẫn (tương đối MEDIA_ROOT) của file gốc, preview và các variant
         """
-        try:
-            img = Image.open(image_field)
+        paths = [str(self.file)] if self.file else []
+        if self.preview:
+            paths.append(str(self.preview))
+        paths.extend(variant['path'] for variant in self.variants or [])
+        return paths
 
-            # Chuyển đổi RGBA sang RGB nếu cần (cho JPEG)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
+    @property
+    def preview_url(self):
+        """
+        Preview chưa sẵn sàng (đang tạo hoặc lỗi) thì dùng tạm file gốc
+        """
+        if self.preview_status == StatusPreviewEnum.READY and self.preview:
+            return self.preview.name
+        return self.file.name
 
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
 
-            thumb_io = BytesIO()
-            img.save(thumb_io, format='JPEG', quality=quality, optimize=True)
-            thumb_io.seek(0)
+class ImageBlobManager(models.Manager):
+    def store(self, upload):
+        """
+        Lưu ảnh upload theo sha256 nội dung. Ảnh đã có thì chỉ tăng ref_count (không ghi file, không encode lại)
+        Returns: (blob, created)
+        """
+        digest = hashlib.sha256()
+        for chunk in upload.chunks():
+            digest.update(chunk)
+        sha256 = digest.hexdigest()
+        upload.seek(0)
 
-            original_name = image_field.name.split('/')[-1]
-            name_parts = original_name.rsplit('.', 1)
-            preview_name = f"{name_parts[0]}_preview.jpg"
+        for _ in range(2):
+            if self.filter(sha256=sha256).update(ref_count=F('ref_count') + 1):
+                return self.get(sha256=sha256), False
+            extension = os.path.splitext(upload.name or '')[1].lower() or '.jpg'
+            blob = self.model(sha256=sha256, size=upload.size or 0, ref_count=1)
+            blob.file.save(f"{sha256}{extension}", upload, save=False)
+            try:
+                with transaction.atomic():
+                    blob.save()
+                return blob, True
+            except IntegrityError:
+                # Request khác vừa lưu cùng nội dung: bỏ file vừa ghi, dùng blob đã có
+                default_storage.delete(blob.file.name)
+        raise IntegrityError(f"Cannot store image blob {sha256}")
 
-            return ContentFile(thumb_io.read(), name=preview_name)
+    def release(self, counts):
+        """
+        Giảm ref_count theo {blob_id: số ImageSport vừa xóa}; blob về 0 thì xóa (1 query)
+        Returns: đường dẫn file của các blob đã xóa (cần xóa khỏi disk)
+        """
+        by_count = {}
+        for blob_id, count in counts.items():
+            by_count.setdefault(count, []).append(blob_id)
+        # Mỗi mức giảm 1 câu UPDATE (thường chỉ có 1-2 mức)
+        for count, blob_ids in by_count.items():
+            self.filter(pk__in=blob_ids).update(ref_count=Greatest(F('ref_count') - count, 0))
+        orphans = list(self.select_for_update().filter(pk__in=counts, ref_count=0)
+                       .only('file', 'preview', 'variants'))
+        if orphans:
+            self.filter(pk__in=[blob.pk for blob in orphans]).delete()
+        return [path for blob in orphans for path in blob.media_paths()]
 
-        except Exception as e:
-            print(f"Error creating preview: {e}")
-            return None
+
+class ImageBlob(ImageMediaMixin):
+    """
+    Nội dung ảnh lưu 1 lần theo sha256, dùng chung cho mọi ImageSport có cùng nội dung
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ImageBlobManager()
+
+    def schedule_preview(self):
+        from apps.jobs.services import enqueue
+        return enqueue('sport_center.generate_blob_preview', args=(self.pk,))
+
+    def generate_preview(self, max_size=None, quality=None):
+        super().generate_preview(max_size, quality)
+        # Đồng bộ preview/variants sang mọi ImageSport dùng blob này
+        if self.images.update(preview=self.preview.name, preview_status=self.preview_status, variants=self.variants):
+            self.images.all().touch_owners()
+
+
+IMAGE_MAP_VALUES = ('id', 'content_type_id', 'object_id', 'file', 'preview', 'preview_status', 'variants')
+
+
+def content_type_ids(*model_classes):
+    """
+    {model: content_type_id}; ContentTypeManager cache theo process nên chỉ query ở lần gọi đầu
+    """
+    content_types = ContentType.objects.get_for_models(*model_classes)
+    return {model: content_type.id for model, content_type in content_types.items()}
+
+
+def touch_image_owners(owners):
+    """
+    Đổi updated_at của trung tâm/sân có ảnh vừa thêm/đổi/xóa (ảnh không có updated_at riêng)
+    Args: owners: các cặp (content_type_id, object_id)
+    """
+    ct_ids = content_type_ids(SportCenter, SportField)
+    now = timezone.now()
+    for model in (SportCenter, SportField):
+        ids = {object_id for content_type_id, object_id in owners if content_type_id == ct_ids[model]}
+        if ids:
+            model.objects.filter(pk__in=ids).update(updated_at=now)
+
+
+class ImageSportQuerySet(models.QuerySet):
+    def touch_owners(self):
+        touch_image_owners(set(self.values_list('content_type_id', 'object_id')))
+
+    def for_objects(self, *targets):
+        """
+        Ảnh của nhiều loại đối tượng, dùng index (content_type, object_id)
+        Args: targets: các cặp (model, ids)
+        """
+        ct_ids = content_type_ids(*(model for model, _ in targets))
+        condition = Q()
+        for model, ids in targets:
+            ids = list(ids)
+            if ids:
+                condition |= Q(content_type_id=ct_ids[model], object_id__in=ids)
+        return self.filter(condition) if condition else self.none()
+
+    def variant_maps(self, *targets):
+        """
+        Ảnh (preview/variants/srcset) của mọi model trong 1 query, 0 query nếu không có id nào
+        Args: targets: các cặp (model, ids)
+        Returns: {model: {object_id: [image_info]}}
+        """
+        ct_ids = content_type_ids(*(model for model, _ in targets))
+        targets = [(model, list(ids)) for model, ids in targets]
+        images_by_type = {ct_ids[model]: [] for model, _ in targets}
+        for image in self.for_objects(*targets).order_by('id').values(*IMAGE_MAP_VALUES):
+            images_by_type[image['content_type_id']].append(image)
+        return {model: MappingData(obj_images=images_by_type[ct_ids[model]]).mapping_img() for model, _ in targets}
+
+    def delete_with_media(self):
+        """
+        Xóa hàng loạt ảnh: 1 câu DELETE cho ImageSport, ref_count blob giảm theo nhóm,
+        file trên disk được xóa ở job nền 'sport_center.delete_media_files'
+        Returns: số ImageSport đã xóa
+        """
+        from apps.jobs.services import enqueue
+        with transaction.atomic():
+            # Ảnh cũ (chưa có blob) giữ file riêng
+            paths = [path for image in self.filter(blob__isnull=True).only('file', 'preview', 'variants')
+                     for path in image.media_paths()]
+            counts, center_ids, field_owners = {}, set(), set()
+            center_ct_id = content_type_ids(SportCenter)[SportCenter]
+            for blob_id, content_type_id, object_id in self.values_list('blob_id', 'content_type_id', 'object_id'):
+                if blob_id is not None:
+                    counts[blob_id] = counts.get(blob_id, 0) + 1
+                if content_type_id == center_ct_id:
+                    center_ids.add(object_id)
+                else:
+                    field_owners.add((content_type_id, object_id))
+            deleted, _ = self.delete()
+            if counts:
+                paths += ImageBlob.objects.release(counts)
+            if center_ids:
+                # DELETE hàng loạt không gửi signal: cập nhật image_count (và updated_at) tại đây
+                SportCenter.objects.filter(pk__in=center_ids).refresh_counters()
+            if field_owners:
+                touch_image_owners(field_owners)
+            if paths:
+                # Job được ghi trong cùng transaction: rollback thì file cũng không bị xóa
+                enqueue('sport_center.delete_media_files', args=(paths,), queue='images')
+        return deleted
+
+
+class ImageSport(ImageMediaMixin):
+    blob = models.ForeignKey(ImageBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='images')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    objects = ImageSportQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Ảnh luôn được lấy theo đối tượng (generic FK): (content_type, object_id IN ...)
+            models.Index(fields=['content_type', 'object_id'], name='imagesport_ct_object_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        blob_created = False
+        if is_new and self.file and not self.file._committed and self.blob_id is None:
+            # File upload mới: lưu theo nội dung, trùng nội dung thì dùng lại file/preview/variants đã có
+            self.blob, blob_created = ImageBlob.objects.store(self.file)
+            self.file = self.blob.file.name
+            self.preview = self.blob.preview.name or None
+            self.preview_status = self.blob.preview_status
+            self.variants = self.blob.variants
+        super().save(*args, **kwargs)
+        # Preview được tạo ở hàng đợi nền, request upload chỉ lưu file gốc
+        if blob_created:
+            self.blob.schedule_preview()
+        elif is_new and not self.blob_id and self.file and not self.preview \
+                and self.preview_status == StatusPreviewEnum.PENDING:
+            self.schedule_preview()
+
+    def schedule_preview(self):
+        from apps.jobs.services import enqueue
+        return enqueue('sport_center.generate_image_preview', args=(self.pk,))
+
+    def delete_with_media(self):
+        """
+        Xóa ảnh; file trên disk (blob chỉ khi không còn ImageSport nào tham chiếu) xóa ở job nền
+        """
+        return ImageSport.objects.filter(pk=self.pk).delete_with_media()
 
 
+def referenced_media_paths(paths=None):
+    """
+    Tập đường dẫn media (file gốc, preview, variants) đang được ImageBlob/ImageSport tham chiếu
+    Args:
+        paths: Chỉ kiểm tra các đường dẫn này (file/preview); None = lấy toàn bộ
+    """
+    referenced = set()
+    for model in (ImageBlob, ImageSport):
+        queryset = model.objects.all()
+        if paths is not None:
+            queryset = queryset.filter(models.Q(file__in=paths) | models.Q(preview__in=paths))
+        for file, preview, variants in queryset.values_list('file', 'preview', 'variants').iterator(chunk_size=2000):
+            referenced.add(file)
+            if preview:
+                referenced.add(preview)
+            referenced.update(variant['path'] for variant in variants or [])
+    if paths is not None:
+        referenced &= set(paths)
+    return referenced
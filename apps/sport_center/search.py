@@ -0,0 +1,192 @@
+"""
+Ranked, accent-insensitive search over SportCenter / SportField (search_name, search_address).
+
+PostgreSQL: GIN trigram indexes (pg_trgm) serve both substring (LIKE) and fuzzy (`%>`) matches,
+ranked by word_similarity. SQLite: an external-content FTS5 table with the trigram tokenizer,
+kept in sync by triggers, returns candidates that are scored in Python. Other backends and
+queries shorter than a trigram fall back to a substring match on the folded columns.
+The index objects are created by migration 0015_search_index, see create_search_index.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from apps.sport_center.districts import normalize_district
+from apps.utils.text_search import fold_text, trigrams, word_similarity
+
+SEARCH_COLUMNS = ('search_name', 'search_address')
+
+
+def search_queryset(queryset, query, columns=SEARCH_COLUMNS):
+    """
+    Lọc queryset theo query (bỏ dấu, gần đúng) trên các cột search_*,
+    annotate `search_rank` (0..1, cao = khớp hơn)
+    """
+    folded = fold_text(query)
+    if not folded:
+        return queryset
+    connection = connections[queryset.db]
+    if len(folded) >= 3 and connection.vendor == 'postgresql':
+        return _trigram_search(queryset, folded, columns)
+    if len(folded) >= 3 and connection.vendor == 'sqlite' and has_fts_table(connection.alias, fts_table(queryset.model)):
+        scores = _fts_scores(connection, queryset, folded, columns)
+        rank = Case(*[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+                    default=Value(0.0), output_field=FloatField())
+        return queryset.filter(pk__in=list(scores)).annotate(search_rank=rank)
+
+    condition = Q()
+    for column in columns:
+        condition |= Q(**{f'{column}__contains': folded})
+    return queryset.filter(condition).annotate(search_rank=Value(1.0, output_field=FloatField()))
+
+
+def search_ids(model, query, columns=SEARCH_COLUMNS):
+    """
+    Subquery id các row khớp (dùng cho filter qua quan hệ, vd. sport_field__sport_center__in=...)
+    """
+    return search_queryset(model.objects.all(), query, columns).values('pk')
+
+
+def area_filter(query, field_path='sport_field'):
+    """
+    Q lọc khu vực qua quan hệ tới SportField: query là tên quận/huyện -> so sánh bằng trên cột
+    district có index (sân không ghi quận/huyện thì theo trung tâm); ngược lại tìm không dấu
+    trên search_address của trung tâm hoặc sân
+    """
+    from apps.sport_center.models import SportCenter, SportField
+
+    district = normalize_district(query)
+    if district:
+        return Q(**{f'{field_path}__district': district})
+    return (Q(**{f'{field_path}__sport_center__in': search_ids(SportCenter, query, ('search_address',))})
+            | Q(**{f'{field_path}__in': search_ids(SportField, query, ('search_address',))}))
+
+
+def _trigram_search(queryset, folded, columns):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    condition = Q()
+    for column in columns:
+        # Cả LIKE '%...%' và %> đều dùng được index gin_trgm_ops
+        condition |= Q(**{f'{column}__contains': folded}) | Q(TrigramWordSimilar(F(column), Value(folded)))
+    similarities = [TrigramWordSimilarity(Value(folded), column) for column in columns]
+    rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    # Cùng ngưỡng với nhánh SQLite (_fts_scores): LIKE khớp nhưng độ giống thấp thì bỏ
+    return queryset.filter(condition).annotate(search_rank=rank).filter(
+        search_rank__gte=settings.SEARCH_MIN_SIMILARITY)
+
+
+def _fts_scores(connection, queryset, folded, columns):
+    """
+    {id: score} của tối đa SEARCH_MAX_CANDIDATES ứng viên FTS5 (chung >= 1 trigram) thuộc queryset,
+    chấm điểm bằng word_similarity và bỏ những row dưới SEARCH_MIN_SIMILARITY
+    """
+    table = fts_table(queryset.model)
+    match = '{%s} : (%s)' % (' '.join(columns), ' OR '.join(f'"{gram}"' for gram in sorted(trigrams(folded))))
+    # Filter khác của queryset áp dụng ngay trong truy vấn ứng viên: LIMIT tính sau khi lọc,
+    # row khớp không bị đẩy khỏi SEARCH_MAX_CANDIDATES bởi row sẽ bị lọc bỏ
+    subquery, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, {", ".join(columns)} FROM {table} WHERE {table} MATCH %s AND rowid IN ({subquery}) '
+            f'ORDER BY rank LIMIT %s',
+            [match, *params, settings.SEARCH_MAX_CANDIDATES],
+        )
+        rows = cursor.fetchall()
+    scores = {}
+    for row_id, *texts in rows:
+        score = max(word_similarity(folded, text or '') for text in texts)
+        if score >= settings.SEARCH_MIN_SIMILARITY:
+            scores[row_id] = score
+    return scores
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+@lru_cache(maxsize=None)
+def has_fts_table(alias, table):
+    return table in connections[alias].introspection.table_names()
+
+
+def create_search_index(apps, schema_editor):
+    """
+    RunPython của migration 0015_search_index: index GIN trigram (PostgreSQL) / bảng FTS5 + trigger (SQLite).
+    Migration sau này đổi cấu trúc SportCenter/SportField trên SQLite tạo lại bảng và làm mất trigger
+    -> thêm lại RunPython(create_search_index, ...) sau thao tác đó
+    """
+    connection = schema_editor.connection
+    for model in search_models(apps):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            for index in trigram_indexes(model):
+                # Index đã tạo bởi bản cũ (hook post_migrate) thì giữ nguyên
+                if index.name not in existing:
+                    schema_editor.add_index(model, index)
+        elif connection.vendor == 'sqlite':
+            _create_fts_table(connection, model)
+    has_fts_table.cache_clear()
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    for model in search_models(apps):
+        if connection.vendor == 'postgresql':
+            for index in trigram_indexes(model):
+                schema_editor.remove_index(model, index)
+        elif connection.vendor == 'sqlite':
+            fts = fts_table(model)
+            for name in _fts_triggers(model):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+    has_fts_table.cache_clear()
+
+
+def search_models(apps):
+    return [apps.get_model('sport_center', name) for name in ('SportCenter', 'SportField')]
+
+
+def trigram_indexes(model):
+    from django.contrib.postgres.indexes import GinIndex
+
+    # gin_trgm_ops phục vụ cả LIKE '%...%' và %>
+    return [GinIndex(fields=[column], opclasses=['gin_trgm_ops'], name=f'{model._meta.db_table}_{column}_trgm')
+            for column in SEARCH_COLUMNS]
+
+
+def _fts_triggers(model):
+    table, fts = model._meta.db_table, fts_table(model)
+    columns = ', '.join(SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    return {
+        f'{fts}_ai': f'AFTER INSERT ON {table} BEGIN '
+                     f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END',
+        f'{fts}_ad': f'AFTER DELETE ON {table} BEGIN '
+                     f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f'{fts}_au': f'AFTER UPDATE ON {table} BEGIN '
+                     f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                     f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END',
+    }
+
+
+def _create_fts_table(connection, model):
+    table, fts = model._meta.db_table, fts_table(model)
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({', '.join(SEARCH_COLUMNS)}, "
+                f"content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+        except OperationalError:
+            # SQLite < 3.34 không có tokenizer trigram: dùng so khớp chuỗi con trên cột search_*
+            return
+        for name, body in _fts_triggers(model).items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
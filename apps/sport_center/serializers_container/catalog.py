@@ -0,0 +1,18 @@
+from apps.sport_center.districts import normalize_district
+from apps.user.serializer_container import serializers
+from apps.utils.enum_type import SportTypeEnum
+
+
+class CatalogQuerySerializer(serializers.Serializer):
+    """
+    Query params của GET /api/catalog/
+    """
+    limit = serializers.IntegerField(default=20, min_value=1, max_value=100)
+    offset = serializers.IntegerField(default=0, min_value=0)
+    district = serializers.CharField(required=False, default='', allow_blank=True)
+    sport_type = serializers.ChoiceField(choices=SportTypeEnum.choices(), required=False, default='')
+
+    @staticmethod
+    def validate_district(value):
+        # Nhận tên quận/huyện có dấu/không dấu; tên không nhận ra -> không có kết quả
+        return (normalize_district(value) or '-') if value else ''
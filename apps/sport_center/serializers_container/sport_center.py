@@ -1,39 +1,25 @@
-from django.contrib.contenttypes.models import ContentType
-
-from apps.sport_center.models import SportCenter, ImageSport
+from apps.sport_center.geocoding import geocode_address
+from apps.sport_center.models import SportCenter, ImageSport, content_type_ids
 from apps.user.serializer_container import (
-    Q, serializers, RoleSystemEnum, AppStatus, Response, status, os, settings, delete_file
+    Q, serializers, RoleSystemEnum, AppStatus, settings
 )
+from apps.utils.validate_data import validate_image_uploads
 
 
 def delete_sport_images(instance, instance_model):
-    instance_ct = ContentType.objects.get_for_model(instance_model)
-    # Get all ImageSport records related to this SportCenter
-    image_sports = ImageSport.objects.filter(
-        content_type=instance_ct,
-        object_id=instance.id
-    )
-    # Delete media files and ImageSport records
-    for image_sport in image_sports:
-        if image_sport.file:
-            # Get the full path to the file
-            file_path = os.path.join(settings.MEDIA_ROOT, str(image_sport.file))
-            file_path_pr = os.path.join(settings.MEDIA_ROOT, str(image_sport.preview))
-
-            delete_file(file_path)
-            delete_file(file_path_pr)
-
-        image_sport.delete()
+    # Delete all ImageSport records of this object in one query; files are removed by a background job
+    # (shared blob files only when no image references them any more)
+    return ImageSport.objects.for_objects((instance_model, [instance.id])).delete_with_media()
 
 
 class SportCenterDetailSerializer(serializers.ModelSerializer):
     images = serializers.SerializerMethodField()
     owner = serializers.SerializerMethodField()
-    total_field = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = SportCenter
-        fields = ['id', 'owner', 'images', 'name', 'address', 'total_field', 'created_at']
+        fields = ['id', 'owner', 'images', 'name', 'address', 'district', 'latitude', 'longitude', 'total_field',
+                  'active_field', 'image_count', 'min_price', 'max_price', 'created_at']
 
     def get_images(self, obj):
         image_map = self.context.get('image_map', {})
@@ -51,9 +37,24 @@ class SportCenterDetailSerializer(serializers.ModelSerializer):
 
 
 class SportCenterSerializer(serializers.ModelSerializer):
+    latitude = serializers.FloatField(required=False, allow_null=True, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, allow_null=True, min_value=-180, max_value=180)
+
     class Meta:
         model = SportCenter
-        fields = ['owner', 'name', 'address']
+        fields = ['owner', 'name', 'address', 'latitude', 'longitude']
+
+    def validate(self, attrs):
+        if ('latitude' in attrs) != ('longitude' in attrs) or \
+                (attrs.get('latitude') is None) != (attrs.get('longitude') is None):
+            raise serializers.ValidationError(AppStatus.INVALID_COORDINATES.message)
+        return attrs
+
+    @staticmethod
+    def fill_location(sport_center):
+        # Không nhập tọa độ: lấy tọa độ gần đúng từ gazetteer theo địa chỉ
+        if sport_center.latitude is None:
+            sport_center.latitude, sport_center.longitude = geocode_address(sport_center.address) or (None, None)
 
     def validate_create(self, validated_data):
         user = self.context['request'].user
@@ -68,24 +69,50 @@ class SportCenterSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def save_image(images, obj_model, object_id):
-        ct = ContentType.objects.get_for_model(obj_model)
+        ct_id = content_type_ids(obj_model)[obj_model]
         for img in images:
-            ImageSport.objects.create(file=img, content_type=ct, object_id=object_id)
+            ImageSport.objects.create(file=img, content_type_id=ct_id, object_id=object_id)
 
     def create(self, validated_data):
         self.validate_create(validated_data)
         images = self.context['request'].FILES.getlist('images')
-        sport_center = super().create(validated_data)
+        validate_image_uploads(images)
+        sport_center = SportCenter(**validated_data)
+        self.fill_location(sport_center)
+        sport_center.save()
         self.save_image(images, SportCenter, sport_center.id)
         return sport_center
 
     def update(self, instance, validated_data):
         user = self.context['request'].user
-        if user.role != RoleSystemEnum.ADMIN.value and user != instance.owner:
+        if user.role != RoleSystemEnum.ADMIN.value and instance.owner_id != user.id:
             raise serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
         images = self.context['request'].FILES.getlist('images')
+        validate_image_uploads(images)
         self.save_image(images, SportCenter, instance.id)
+        if validated_data.get('address', instance.address) != instance.address and 'latitude' not in validated_data:
+            # Đổi địa chỉ mà không gửi tọa độ mới: tọa độ cũ không còn đúng
+            instance.latitude = instance.longitude = None
         for field, value in validated_data.items():
             setattr(instance, field, value)
+        self.fill_location(instance)
         instance.save()
-        return Response(status=status.HTTP_200_OK, data={"detail": "Update center successfully"})
+        return instance
+
+
+class NearbySportCenterSerializer(serializers.Serializer):
+    """
+    Query params của GET /api/sport_center/nearby
+    """
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(default=5, min_value=0.1)
+    booking_date = serializers.DateField(required=False)
+    available_only = serializers.BooleanField(default=False)
+    limit = serializers.IntegerField(default=20, min_value=1, max_value=100)
+
+    @staticmethod
+    def validate_radius_km(value):
+        if value > settings.NEARBY_MAX_RADIUS_KM:
+            raise serializers.ValidationError(AppStatus.RADIUS_TOO_LARGE.message)
+        return value
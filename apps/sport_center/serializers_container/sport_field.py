@@ -1,9 +1,8 @@
-from django.contrib.contenttypes.models import ContentType
-
-from apps.sport_center.models import SportField, ImageSport, SportCenter
+from apps.sport_center.models import SportField, ImageSport, SportCenter, content_type_ids
 from apps.user.serializer_container import (
-    serializers, RoleSystemEnum, AppStatus, Response, status, os, settings
+    serializers, RoleSystemEnum, AppStatus, Response, status
 )
+from apps.utils.validate_data import validate_image_uploads
 
 
 class SportFieldDetailSerializer(serializers.ModelSerializer):
@@ -12,7 +11,7 @@ class SportFieldDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SportField
-        fields = ['id', 'sport_center', 'center_info', 'images', 'name', 'address', 'sport_type', 'price',
+        fields = ['id', 'sport_center', 'center_info', 'images', 'name', 'address', 'district', 'sport_type', 'price',
                   'status', 'created_at']
 
     def get_images(self, obj):
@@ -37,12 +36,12 @@ class SportFieldSerializer(serializers.ModelSerializer):
     def validate_permission(self, validated_data):
         sport_center = validated_data.get('sport_center', None)
         user = self.context['request'].user
-        if user.role != RoleSystemEnum.ADMIN.value and user != sport_center.owner:
+        if user.role != RoleSystemEnum.ADMIN.value and sport_center.owner_id != user.id:
             raise serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
 
     def validate_update(self, instance):
         user = self.context['request'].user
-        if user.role != RoleSystemEnum.ADMIN.value and user != instance.sport_center.owner:
+        if user.role != RoleSystemEnum.ADMIN.value and instance.sport_center.owner_id != user.id:
             raise serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
 
     def validate_create(self, validated_data):
@@ -55,13 +54,14 @@ class SportFieldSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def save_image(images, obj_model, obj_id):
-        ct = ContentType.objects.get_for_model(obj_model)
+        ct_id = content_type_ids(obj_model)[obj_model]
         for img in images:
-            ImageSport.objects.create(file=img, content_type=ct, object_id=obj_id)
+            ImageSport.objects.create(file=img, content_type_id=ct_id, object_id=obj_id)
 
     def create(self, validated_data):
         self.validate_create(validated_data)
         images = self.context['request'].FILES.getlist('images')
+        validate_image_uploads(images)
         validated_data['address'] = validated_data.get('sport_center').address
         sport_field = super().create(validated_data)
         self.save_image(images, SportField, sport_field.id)
@@ -70,6 +70,7 @@ class SportFieldSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         self.validate_update(instance)
         images = self.context['request'].FILES.getlist('images')
+        validate_image_uploads(images)
         self.save_image(images, SportField, instance.id)
         for field, value in validated_data.items():
             setattr(instance, field, value)
@@ -82,26 +83,16 @@ class ImageSportDeleteSerializer(serializers.ModelSerializer):
         model = ImageSport
         fields = ['id']
 
-    @staticmethod
-    def delete_file(instance):
-        file_path = os.path.join(settings.MEDIA_ROOT, str(instance.file))
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except OSError as e:
-                print(f"Error deleting file {file_path}: {e}")
-
     def validate_permission(self, instance):
         user = self.context['request'].user
         if user.role != RoleSystemEnum.ADMIN.value:
             model_sport = instance.content_type.model
-            if model_sport == 'sportfield' and user != SportField.objects.get(id=instance.object_id).sport_center.owner:
+            if model_sport == 'sportfield' and SportField.objects.get(id=instance.object_id).sport_center.owner_id != user.id:
                 return serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
-            elif model_sport == 'sportcenter' and user != SportCenter.objects.get(id=instance.object_id).owner:
+            elif model_sport == 'sportcenter' and SportCenter.objects.get(id=instance.object_id).owner_id != user.id:
                 return serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
 
     def delete(self, instance):
         self.validate_permission(instance)
-        self.delete_file(instance)
-        instance.delete()
+        instance.delete_with_media()
         return Response(status=status.HTTP_204_NO_CONTENT)
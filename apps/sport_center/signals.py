@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.sport_center.models import ImageSport, SportCenter, SportField, content_type_ids, touch_image_owners
+
+
+def refresh_counters_on_field_change(sender, instance, **kwargs):
+    # Thêm/xóa sân, đổi giá/trạng thái/trung tâm -> total_field, active_field, min/max price
+    center_ids = {instance.sport_center_id, getattr(instance, '_loaded_sport_center_id', None)} - {None}
+    SportCenter.objects.filter(pk__in=center_ids).refresh_counters()
+    instance._loaded_sport_center_id = instance.sport_center_id
+
+
+def refresh_owner_on_image_save(sender, instance, created, **kwargs):
+    # Xóa ảnh đi qua ImageSportQuerySet.delete_with_media (tự cập nhật bộ đếm, không dùng post_delete
+    # để giữ DELETE hàng loạt trong 1 câu lệnh)
+    if created and instance.content_type_id == content_type_ids(SportCenter)[SportCenter]:
+        SportCenter.objects.filter(pk=instance.object_id).refresh_counters()
+    else:
+        touch_image_owners({(instance.content_type_id, instance.object_id)})
+
+
+post_save.connect(refresh_counters_on_field_change, sender=SportField, dispatch_uid='sport_center_counters_field_save')
+post_delete.connect(refresh_counters_on_field_change, sender=SportField,
+                    dispatch_uid='sport_center_counters_field_delete')
+post_save.connect(refresh_owner_on_image_save, sender=ImageSport, dispatch_uid='sport_center_counters_image')
@@ -0,0 +1,68 @@
+import logging
+
+from PIL import Image, UnidentifiedImageError
+from django.core.files.storage import default_storage
+
+from apps.jobs.registry import task
+from apps.sport_center.models import ImageBlob, ImageSport, referenced_media_paths
+from apps.utils.enum_type import StatusPreviewEnum
+
+logger = logging.getLogger(__name__)
+
+
+def _generate(image, failed_querysets):
+    if image.preview_status == StatusPreviewEnum.READY and image.preview:
+        return {"status": image.preview_status}
+    try:
+        image.generate_preview()
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError) as exc:
+        logger.warning("Cannot create preview for %s %s: %s", type(image).__name__, image.pk, exc)
+        for queryset in failed_querysets:
+            queryset.update(preview_status=StatusPreviewEnum.FAILED)
+            if queryset.model is ImageSport:
+                queryset.touch_owners()
+        return {"status": StatusPreviewEnum.FAILED.value}
+    return {"status": image.preview_status, "preview": image.preview.name}
+
+
+@task(name='sport_center.generate_blob_preview', max_attempts=3, queue='images')
+def generate_blob_preview(blob_id):
+    """
+    Tạo preview/variants 1 lần cho blob ảnh, dùng chung cho mọi ImageSport cùng nội dung.
+    File không phải ảnh hợp lệ thì đánh dấu FAILED (không retry)
+    """
+    blob = ImageBlob.objects.filter(pk=blob_id).first()
+    if blob is None:
+        # Ảnh đã bị xóa trước khi job chạy
+        return {"status": "DELETED"}
+    return _generate(blob, [ImageBlob.objects.filter(pk=blob_id), ImageSport.objects.filter(blob_id=blob_id)])
+
+
+@task(name='sport_center.generate_image_preview', max_attempts=3, queue='images')
+def generate_image_preview(image_id):
+    """
+    Tạo preview cho ImageSport lưu trước khi có ImageBlob (file riêng, không dùng chung)
+    """
+    image = ImageSport.objects.filter(pk=image_id).first()
+    if image is None:
+        return {"status": "DELETED"}
+    if image.blob_id:
+        return generate_blob_preview(image.blob_id)
+    return _generate(image, [ImageSport.objects.filter(pk=image_id)])
+
+
+@task(name='sport_center.delete_media_files', max_attempts=3, queue='images')
+def delete_media_files(paths):
+    """
+    Xóa file ảnh (gốc/preview/variants) sau khi row đã bị xóa. Đường dẫn còn được DB tham chiếu thì giữ lại
+    (vd. upload mới trùng tên ngay sau khi xóa)
+    """
+    referenced = referenced_media_paths(paths)
+    deleted = 0
+    for path in paths:
+        if path in referenced:
+            continue
+        if default_storage.exists(path):
+            default_storage.delete(path)
+            deleted += 1
+    return {"deleted": deleted, "kept": len(referenced)}
@@ -1,3 +1,692 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.booking.models import Booking, RentalSlot
+from apps.jobs.models import Job
+from apps.jobs.services import work
+from apps.sport_center.districts import normalize_district, parse_district
+from apps.sport_center.geocoding import geocode_address
+from apps.sport_center.models import ImageBlob, ImageSport, SportCenter, SportField
+from apps.sport_center.search import area_filter, fts_table, search_queryset
+from apps.sport_center.serializers_container.sport_center import delete_sport_images
+from apps.user.models import User
+from apps.utils.enum_type import DistrictEnum, RoleSystemEnum, StatusFieldEnum, StatusPreviewEnum
+from apps.utils.geo import bounding_box, covering_geohashes, geohash_encode, haversine_km
+from apps.utils.image_processing import load_image, render_preview, variant_widths
+from apps.utils.mapping_data import MappingData
+from apps.utils.text_search import fold_text
+
+
+def make_image_bytes(size=(2000, 1500), image_format='JPEG', mode='RGB'):
+    output = BytesIO()
+    Image.new(mode, size, (200, 30, 30) if mode == 'RGB' else (200, 30, 30, 128)).save(output, format=image_format)
+    return output.getvalue()
+
+
+class ImagePreviewTestMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, JOB_BACKEND='database')
+        self.settings_override.enable()
+        owner = User.objects.create(
+            email="owner@example.com", username="owner", full_name="Owner",
+            role=RoleSystemEnum.OWNER.value, is_active=True,
+        )
+        self.center = SportCenter.objects.create(owner=owner, name="Center", address="Hải Châu")
+        self.center_ct = ContentType.objects.get_for_model(SportCenter)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, content, name='photo.jpg'):
+        return ImageSport.objects.create(
+            file=SimpleUploadedFile(name, content), content_type=self.center_ct, object_id=self.center.id,
+        )
+
+
+class ImagePreviewPipelineTests(ImagePreviewTestMixin, TestCase):
+    def test_upload_defers_preview_to_worker(self):
+        image = self.upload(make_image_bytes())
+        self.assertEqual(image.preview_status, StatusPreviewEnum.PENDING)
+        self.assertFalse(image.preview)
+        self.assertTrue(Job.objects.filter(name='sport_center.generate_blob_preview', queue='images').exists())
+        # Chưa có preview: API trả file gốc làm placeholder
+        self.assertEqual(image.preview_url, image.file.name)
+
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        image.refresh_from_db()
+        self.assertEqual(image.preview_status, StatusPreviewEnum.READY)
+        self.assertEqual(image.preview_url, image.preview.name)
+        with Image.open(image.preview.path) as preview:
+            self.assertEqual(preview.format, 'JPEG')
+            self.assertEqual(max(preview.size), 700)
+
+        self.assertEqual(
+            sorted((variant['format'], variant['width'], variant['height']) for variant in image.variants),
+            [('jpeg', 160, 120), ('jpeg', 400, 300), ('jpeg', 800, 600), ('jpeg', 1600, 1200),
+             ('webp', 160, 120), ('webp', 400, 300), ('webp', 800, 600), ('webp', 1600, 1200)],
+        )
+        for path in image.media_paths():
+            self.assertTrue(default_storage.exists(path))
+
+    def test_identical_uploads_share_blob(self):
+        content = make_image_bytes((900, 600))
+        first = self.upload(content, name='one.jpg')
+        second = self.upload(content, name='two.jpg')
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(ImageBlob.objects.get().ref_count, 2)
+        self.assertEqual(Job.objects.filter(name='sport_center.generate_blob_preview').count(), 1)
+
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        second.refresh_from_db()
+        self.assertEqual(second.preview_status, StatusPreviewEnum.READY)
+        # Upload thứ 3 sau khi preview đã có: dùng lại ngay, không tạo job mới
+        third = self.upload(content, name='three.jpg')
+        self.assertEqual((third.preview.name, third.variants), (second.preview.name, second.variants))
+        self.assertEqual(Job.objects.filter(name='sport_center.generate_blob_preview').count(), 1)
+
+        paths = second.media_paths()
+        first.delete_with_media()
+        third.delete_with_media()
+        self.assertTrue(all(default_storage.exists(path) for path in paths))
+        second.delete_with_media()
+        self.assertFalse(ImageBlob.objects.exists())
+        # File được xóa ở job nền
+        self.assertTrue(all(default_storage.exists(path) for path in paths))
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        self.assertFalse(any(default_storage.exists(path) for path in paths))
+
+    def test_invalid_image_marked_failed(self):
+        image = self.upload(b'not an image', name='broken.jpg')
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        image.refresh_from_db()
+        self.assertEqual(image.preview_status, StatusPreviewEnum.FAILED)
+
+    def test_mapping_falls_back_to_original(self):
+        images = [
+            {'id': 1, 'object_id': 5, 'file': 'images/a.jpg', 'preview': None,
+             'preview_status': StatusPreviewEnum.PENDING.value},
+            {'id': 2, 'object_id': 5, 'file': 'images/b.jpg', 'preview': 'images/preview/b_preview.jpg',
+             'preview_status': StatusPreviewEnum.READY.value},
+        ]
+        images[1]['variants'] = [
+            {'width': 400, 'height': 300, 'format': 'webp', 'bytes': 900, 'path': 'images/variants/b_400w.webp'},
+            {'width': 160, 'height': 120, 'format': 'webp', 'bytes': 300, 'path': 'images/variants/b_160w.webp'},
+        ]
+        image_map = MappingData(obj_images=images).mapping_img()
+        self.assertEqual([img['preview'] for img in image_map[5]], ['images/a.jpg', 'images/preview/b_preview.jpg'])
+        self.assertEqual(image_map[5][0]['srcset'], {})
+        self.assertEqual(
+            image_map[5][1]['srcset']['webp'], 'images/variants/b_160w.webp 160w, images/variants/b_400w.webp 400w'
+        )
+        self.assertEqual(image_map[5][1]['sources']['webp'][0]['bytes'], 300)
+
+    def test_variant_widths_do_not_upscale(self):
+        self.assertEqual(variant_widths(300, [160, 400, 800]), [160, 300])
+        self.assertEqual(variant_widths(100, [160, 400]), [100])
+        self.assertEqual(variant_widths(2000, [160, 400]), [160, 400])
+
+    def test_load_image_rejects_pixels_over_limit(self):
+        source = BytesIO(make_image_bytes((400, 300)))
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 400 * 300 - 1):
+            # Dưới 2 lần giới hạn PIL chỉ cảnh báo: load_image tự kiểm tra
+            with self.assertRaises(Image.DecompressionBombError):
+                load_image(source, (100, 100))
+
+    def test_render_preview_flattens_transparency(self):
+        content = render_preview(BytesIO(make_image_bytes((1200, 300), 'PNG', 'RGBA')))
+        with Image.open(BytesIO(content)) as preview:
+            self.assertEqual(preview.mode, 'RGB')
+            self.assertEqual(preview.size, (700, 175))
+
+
+class BulkImageDeleteTests(ImagePreviewTestMixin, TestCase):
+    def test_bulk_delete_defers_file_removal(self):
+        shared = make_image_bytes((300, 200))
+        images = [self.upload(shared), self.upload(shared), self.upload(make_image_bytes((320, 200)))]
+        ImageSport.objects.create(file='images/legacy.jpg', content_type=self.center_ct,
+                                  object_id=self.center.id, preview_status=StatusPreviewEnum.FAILED)
+        default_storage.save('images/legacy.jpg', ContentFile(shared))
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        for image in images:
+            image.refresh_from_db()
+        paths = [path for image in images for path in image.media_paths()] + ['images/legacy.jpg']
+
+        self.center.refresh_from_db()
+        self.assertEqual(self.center.image_count, 4)
+        # Số query cố định, không phụ thuộc số ảnh (gồm 1 UPDATE bộ đếm của trung tâm)
+        with self.assertNumQueries(13):
+            deleted = delete_sport_images(self.center, SportCenter)
+        self.assertEqual(deleted, 4)
+        self.center.refresh_from_db()
+        self.assertEqual(self.center.image_count, 0)
+        self.assertFalse(ImageSport.objects.exists())
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertTrue(all(default_storage.exists(path) for path in paths))
+
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        self.assertFalse(any(default_storage.exists(path) for path in paths))
+        self.assertEqual(Job.objects.get(name='sport_center.delete_media_files').result["deleted"], len(set(paths)))
+
+    def test_gc_media_removes_orphans_only(self):
+        image = self.upload(make_image_bytes((300, 200)))
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        image.refresh_from_db()
+        orphan = default_storage.save('images/orphan.jpg', ContentFile(b'x' * 10))
+        recent = default_storage.save('images/preview/recent_preview.jpg', ContentFile(b'x'))
+        old = time.time() - 2 * 3600
+        os.utime(default_storage.path(orphan), (old, old))
+
+        output = StringIO()
+        # Lô nhỏ: file được chia cho nhiều thread, kết quả như quét 1 lô
+        with mock.patch('apps.sport_center.management.commands.gc_media.STAT_BATCH_SIZE', 2):
+            call_command('gc_media', '--dry-run', '--workers', '3', stdout=output)
+        self.assertIn("orphans=1", output.getvalue())
+        self.assertIn(f"scanned={len(set(image.media_paths())) + 2}", output.getvalue())
+        self.assertTrue(default_storage.exists(orphan))
+
+        call_command('gc_media', stdout=StringIO())
+        self.assertFalse(default_storage.exists(orphan))
+        # File mới (có thể của upload đang lưu) được giữ lại
+        self.assertTrue(default_storage.exists(recent))
+        self.assertTrue(all(default_storage.exists(path) for path in image.media_paths()))
+
+
+class RegeneratePreviewsCommandTests(ImagePreviewTestMixin, TestCase):
+    def run_command(self, *args):
+        output = StringIO()
+        call_command('regenerate_previews', '--workers', '2', *args, stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def test_incremental_regeneration_and_backfill(self):
+        os.makedirs(os.path.join(self.media_root, 'images'))
+        for name in ('a.jpg', 'b.png'):
+            with open(os.path.join(self.media_root, 'images', name), 'wb') as source:
+                source.write(make_image_bytes((900, 600), 'PNG' if name.endswith('png') else 'JPEG'))
+        ImageSport.objects.bulk_create([
+            ImageSport(file='images/a.jpg', content_type=self.center_ct, object_id=self.center.id),
+        ])
+
+        output = self.run_command('--variants')
+        self.assertIn("generated=2 skipped=0 failed=0", output)
+        image = ImageSport.objects.get(file='images/a.jpg')
+        self.assertEqual(image.preview.name, 'images/preview/a_preview.jpg')
+        self.assertEqual(image.preview_status, StatusPreviewEnum.READY)
+        self.assertEqual(sorted({variant['width'] for variant in image.variants}), [160, 400, 800, 900])
+
+        self.assertIn("generated=0 skipped=2 failed=0", self.run_command('--variants'))
+        # Lần chạy hash đầu tiên chưa có sha256 trong manifest nên tạo lại, lần sau thì bỏ qua
+        self.assertIn("generated=2 skipped=0 failed=0", self.run_command('--variants', '--check', 'hash'))
+        self.assertIn("generated=0 skipped=2 failed=0", self.run_command('--variants', '--check', 'hash'))
+        self.assertIn("generated=2 skipped=0 failed=0", self.run_command('--variants', '--force'))
+
+
+class BoundedImageUploadTests(ImagePreviewTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create(
+            email="admin@example.com", username="admin", full_name="Admin",
+            role=RoleSystemEnum.ADMIN.value, is_active=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('sportcenter-list')
+
+    def create_center(self, name, images):
+        return self.client.post(self.url, {
+            'owner': self.admin.id, 'name': name, 'address': name,
+            'images': [SimpleUploadedFile(f"{index}.jpg", content) for index, content in enumerate(images)],
+        }, format='multipart')
+
+    def test_valid_upload(self):
+        response = self.create_center("Center A", [make_image_bytes((800, 600))])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ImageSport.objects.count(), 1)
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=2000)
+    def test_file_over_byte_cap_rejected_while_streaming(self):
+        response = self.create_center("Center B", [make_image_bytes((800, 600))])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("exceeds 2000 bytes", response.json()['detail'])
+        self.assertFalse(SportCenter.objects.filter(name="Center B").exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=100 * 100)
+    def test_dimensions_checked_from_header(self):
+        response = self.create_center("Center C", [make_image_bytes((800, 600))])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Image dimensions are too large.")
+        self.assertFalse(SportCenter.objects.filter(name="Center C").exists())
+
+    def test_non_image_rejected(self):
+        response = self.create_center("Center D", [b'not an image'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Invalid image file.")
+        self.assertFalse(ImageSport.objects.exists())
+
+
+class MediaServingTests(ImagePreviewTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.image = self.upload(make_image_bytes((400, 300)))
+        self.url = f"/media/{self.image.file.name}"
+        self.size = self.image.file.size
+
+    def test_cache_headers_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.image.file.open('rb').read())
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        # Tên file theo sha256 -> immutable
+        self.assertIn("immutable", response['Cache-Control'])
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f"bytes 0-9/{self.size}")
+        self.assertEqual(b''.join(response.streaming_content), self.image.file.open('rb').read()[:10])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b''.join(response.streaming_content), self.image.file.open('rb').read()[-5:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f"bytes={self.size}-").status_code, 416)
+        # If-Range không khớp ETag hiện tại -> trả cả file
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"').status_code, 200)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='nginx', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_offload_to_nginx(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f"/protected-media/{self.image.file.name}")
+        self.assertEqual(response.content, b'')
+        self.assertIn("ETag", response)
+
+    def test_missing_and_traversal(self):
+        self.assertEqual(self.client.get("/media/images/missing.jpg").status_code, 404)
+        for path in ("../manage.py", "images/../../manage.py", "images/%2e%2e/%2e%2e/manage.py"):
+            self.assertEqual(self.client.get(f"/media/{path}").status_code, 404, path)
+
+    def test_preview_not_immutable(self):
+        work("worker-1", queues=['images'], exit_when_empty=True)
+        self.image.refresh_from_db()
+        response = self.client.get(f"/media/{self.image.preview.name}")
+        self.assertEqual(response.status_code, 200)
+        # Preview giữ tên khi được tạo lại -> không immutable
+        self.assertNotIn("immutable", response['Cache-Control'])
+
+
+class SportCenterSearchTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create(
+            email="search@example.com", username="search", full_name="Search",
+            role=RoleSystemEnum.OWNER.value, is_active=True,
+        )
+        self.client.force_authenticate(user=self.owner)
+        self.phu_nhuan = SportCenter.objects.create(owner=self.owner, name="Sân Bóng Đá Phú Nhuận",
+                                                    address="12 Phan Đăng Lưu, Quận Phú Nhuận")
+        self.thu_duc = SportCenter.objects.create(owner=self.owner, name="Sân Cầu Lông Thủ Đức",
+                                                  address="5 Võ Văn Ngân, Thủ Đức")
+
+    def search(self, **params):
+        response = self.client.get(reverse('sportcenter-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()]
+
+    def test_fold_text(self):
+        self.assertEqual(fold_text("  Sân Bóng-Đá  QUẬN 1! "), "san bong da quan 1")
+        self.assertEqual(self.phu_nhuan.search_address, "12 phan dang luu quan phu nhuan")
+
+    def test_accent_insensitive_and_fuzzy(self):
+        self.assertEqual(self.search(name="san bong da"), [self.phu_nhuan.id])
+        self.assertEqual(self.search(address="THU ĐUC"), [self.thu_duc.id])
+        # Gõ sai 1 ký tự vẫn khớp
+        self.assertEqual(self.search(name="cau long thu dux"), [self.thu_duc.id])
+        self.assertEqual(self.search(name="tennis"), [])
+
+    def test_ranked_by_similarity(self):
+        other = SportCenter.objects.create(owner=self.owner, name="Sân Phú Nhuận 2", address="Phú Nhuận")
+        self.assertEqual(self.search(search="san phu nhuan")[0], other.id)
+        self.assertEqual(set(self.search(search="phu nhuan")), {self.phu_nhuan.id, other.id})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.thu_duc.name = "Sân Tennis Gò Vấp"
+        self.thu_duc.save(update_fields=['name'])
+        self.assertEqual(list(search_queryset(SportCenter.objects.all(), "tennis go vap").values_list('id', flat=True)),
+                         [self.thu_duc.id])
+        self.assertFalse(search_queryset(SportCenter.objects.all(), "cau long").exists())
+        self.phu_nhuan.delete()
+        self.assertFalse(search_queryset(SportCenter.objects.all(), "bong da").exists())
+
+    @skipUnless(connection.vendor == 'sqlite', "FTS5 chỉ dùng trên SQLite")
+    def test_migrations_create_fts_index(self):
+        # Migration đổi cấu trúc bảng trên SQLite làm mất trigger nếu không tạo lại
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                           ['sport_center_%_fts%'])
+            names = {row[0] for row in cursor.fetchall()}
+        for model in (SportCenter, SportField):
+            fts = fts_table(model)
+            self.assertTrue({fts, f'{fts}_ai', f'{fts}_ad', f'{fts}_au'} <= names, model)
+
+    @override_settings(SEARCH_MAX_CANDIDATES=1)
+    def test_candidate_limit_applied_after_filters(self):
+        other_owner = User.objects.create(email="other@example.com", username="other", full_name="Other",
+                                          role=RoleSystemEnum.OWNER.value, is_active=True)
+        SportCenter.objects.create(owner=other_owner, name="Sân Bóng Đá", address="Hải Châu")
+        queryset = SportCenter.objects.filter(owner=self.owner)
+        self.assertEqual(list(search_queryset(queryset, "san bong da").values_list('id', flat=True)),
+                         [self.phu_nhuan.id])
+
+    def test_field_filters(self):
+        field = SportField.objects.create(sport_center=self.thu_duc, name="Sân 1", address="Khu B", price=100000,
+                                          status=StatusFieldEnum.ACTIVE.value)
+        response = self.client.get(reverse('sportfield-list'), {'center_name': "thu duc"})
+        self.assertEqual([item['id'] for item in response.json()], [field.id])
+
+
+class NearbySportCenterTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(
+            email="geo@example.com", username="geo", full_name="Geo",
+            role=RoleSystemEnum.ADMIN.value, is_active=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('sportcenter-nearby')
+
+    def create_center(self, name, address, latitude=None, longitude=None):
+        return SportCenter.objects.create(owner=self.admin, name=name, address=address,
+                                          latitude=latitude, longitude=longitude)
+
+    def test_geohash_covering(self):
+        center = self.create_center("Hải Châu", "Hải Châu", 16.0470, 108.2120)
+        self.assertEqual(center.geohash, geohash_encode(16.0470, 108.2120))
+        box = bounding_box(16.05, 108.2, 5)
+        self.assertTrue(any(center.geohash.startswith(prefix) for prefix in covering_geohashes(box)))
+        self.assertAlmostEqual(haversine_km(16.0470, 108.2120, 16.0640, 108.1860), 3.33, places=1)
+
+    def test_geocode_from_gazetteer(self):
+        self.assertEqual(geocode_address("12 Ngũ Hành Sơn, Q. Sơn Trà, Đà Nẵng"), (16.08, 108.24))
+        self.assertIsNone(geocode_address("Quận 1, TP HCM"))
+
+        response = self.client.post(reverse('sportcenter-list'), {
+            'owner': self.admin.id, 'name': "Center", 'address': "45 Điện Biên Phủ, Thanh Khê"}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        center = SportCenter.objects.get(name="Center")
+        self.assertEqual((center.latitude, center.longitude), (16.064, 108.186))
+
+        unmatched = SportCenter.objects.create(owner=self.admin, name="Other", address="Hòa Vang")
+        call_command('geocode_centers', stdout=StringIO())
+        unmatched.refresh_from_db()
+        self.assertEqual((unmatched.latitude, unmatched.geohash), (15.999, geohash_encode(15.999, 108.138)))
+
+    def test_update_center_regeocodes_new_address(self):
+        center = self.create_center("Center", "Hải Châu", 16.0470, 108.2120)
+        response = self.client.put(reverse('sportcenter-detail', args=[center.id]), {
+            'owner': self.admin.id, 'name': "Center mới", 'address': "45 Điện Biên Phủ, Thanh Khê"}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], "Center mới")
+        center.refresh_from_db()
+        # Đổi địa chỉ không kèm tọa độ: tọa độ lấy lại theo địa chỉ mới
+        self.assertEqual((center.name, center.latitude, center.longitude), ("Center mới", 16.064, 108.186))
+
+    def test_nearby_ordered_by_distance_with_availability(self):
+        far = self.create_center("Far", "Hòa Vang", 15.9990, 108.1380)
+        near = self.create_center("Near", "Hải Châu", 16.0470, 108.2120)
+        mid = self.create_center("Mid", "Thanh Khê", 16.0640, 108.1860)
+        self.create_center("No location", "Quận 1")
+        field = SportField.objects.create(sport_center=mid, name="Sân 1", address="Khu A", price=100000,
+                                          status=StatusFieldEnum.ACTIVE.value)
+        slot = RentalSlot.objects.create(name="Slot", time_slot="06:00 - 07:00")
+        Booking.objects.create(sport_field=field, rental_slot=slot, price=100000, booking_date=date(2026, 5, 1))
+
+        params = {'lat': 16.0500, 'lng': 108.2100, 'radius_km': 5, 'booking_date': '2026-05-01'}
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url, params).json()
+        self.assertEqual([item['id'] for item in data], [near.id, mid.id])
+        self.assertEqual((data[1]['available_slots'], data[1]['available_fields']), (1, 1))
+        self.assertLess(data[0]['distance_km'], data[1]['distance_km'])
+
+        self.assertEqual([item['id'] for item in self.client.get(self.url, {**params, 'radius_km': 10}).json()],
+                         [near.id, mid.id, far.id])
+        self.assertEqual([item['id'] for item in self.client.get(self.url, {**params, 'available_only': 'true'}).json()],
+                         [mid.id])
+        self.assertEqual(self.client.get(self.url, {**params, 'radius_km': 500}).status_code, 400)
+
+
+class DistrictTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create(
+            email="district@example.com", username="district", full_name="District",
+            role=RoleSystemEnum.OWNER.value, is_active=True,
+        )
+        self.client.force_authenticate(user=self.owner)
+        self.hai_chau = SportCenter.objects.create(owner=self.owner, name="A", address="12 Lê Lợi, Q.Hải Châu, Đà Nẵng")
+        self.son_tra = SportCenter.objects.create(owner=self.owner, name="B", address="3 Ngũ Hành Sơn, quận Sơn Trà")
+        self.field = SportField.objects.create(sport_center=self.hai_chau, name="Sân 1", address="Khu B", price=1,
+                                               status=StatusFieldEnum.ACTIVE.value)
+
+    def test_parse_and_normalize(self):
+        self.assertEqual(parse_district("12 Lê Lợi, Q.Hải Châu, Đà Nẵng"), DistrictEnum.HAI_CHAU.value)
+        self.assertEqual(parse_district("3 Ngũ Hành Sơn, quận Sơn Trà"), DistrictEnum.SON_TRA.value)
+        self.assertEqual(parse_district("Quận 1, TP HCM"), '')
+        for query in ("Hải Châu", "quan hai chau", "Q. HẢI CHÂU", "HAI_CHAU", "haichau"):
+            self.assertEqual(normalize_district(query), DistrictEnum.HAI_CHAU.value, query)
+        self.assertEqual(normalize_district("12 Lê Lợi, Hải Châu"), '')
+
+    def test_field_inherits_center_district(self):
+        self.assertEqual(self.field.district, DistrictEnum.HAI_CHAU.value)
+        self.hai_chau.address = "1 Tôn Đức Thắng, Liên Chiểu"
+        self.hai_chau.save()
+        self.field.refresh_from_db()
+        self.assertEqual(self.field.district, DistrictEnum.LIEN_CHIEU.value)
+
+    def test_area_filters_use_district(self):
+        url = reverse('sportcenter-list')
+        self.assertEqual([item['id'] for item in self.client.get(url, {'district': "son tra"}).json()],
+                         [self.son_tra.id])
+        # "Ngũ Hành Sơn" chỉ là tên đường của trung tâm Sơn Trà
+        self.assertEqual(self.client.get(url, {'address': "Ngũ Hành Sơn"}).json(), [])
+        self.assertEqual([item['id'] for item in self.client.get(reverse('sportfield-list'),
+                                                                 {'district': "HAI_CHAU"}).json()],
+                         [self.field.id])
+
+        area = str(Booking.objects.filter(area_filter("Hải Châu")).query)
+        self.assertIn('"sport_center_sportfield"."district" = HAI_CHAU', area)
+        self.assertNotIn('LIKE', area)
+
+
+class SportCenterCounterTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create(
+            email="counter@example.com", username="counter", full_name="Counter",
+            role=RoleSystemEnum.OWNER.value, is_active=True,
+        )
+        self.client.force_authenticate(user=self.owner)
+        self.center = SportCenter.objects.create(owner=self.owner, name="A", address="Hải Châu")
+        self.other = SportCenter.objects.create(owner=self.owner, name="B", address="Sơn Trà")
+
+    def counters(self, center):
+        center.refresh_from_db()
+        return center.total_field, center.active_field, center.min_price, center.max_price
+
+    def test_counters_follow_field_changes(self):
+        cheap = SportField.objects.create(sport_center=self.center, name="1", address="", price=100,
+                                          status=StatusFieldEnum.ACTIVE.value)
+        SportField.objects.create(sport_center=self.center, name="2", address="", price=300)
+        self.assertEqual(self.counters(self.center), (2, 1, 100, 300))
+
+        # Load lại từ DB rồi chuyển sang trung tâm khác: cả 2 trung tâm được cập nhật
+        moved = SportField.objects.get(pk=cheap.pk)
+        moved.sport_center = self.other
+        moved.save()
+        self.assertEqual(self.counters(self.center), (1, 0, 300, 300))
+        self.assertEqual(self.counters(self.other), (1, 1, 100, 100))
+
+        moved.delete()
+        self.assertEqual(self.counters(self.other), (0, 0, None, None))
+
+    def test_list_sorts_by_counters_without_aggregation(self):
+        SportField.objects.create(sport_center=self.other, name="1", address="", price=50)
+        # Lệch bộ đếm (vd. ghi DB trực tiếp) -> rebuild_center_counters sửa lại
+        SportCenter.objects.update(total_field=7)
+        call_command('rebuild_center_counters', stdout=StringIO())
+        self.assertEqual(self.counters(self.other)[0], 1)
+        self.assertEqual(self.counters(self.center)[0], 0)
+
+        url = reverse('sportcenter-list')
+        # 1 query aggregate cho ETag + 1 query danh sách (không JOIN/GROUP BY sân) + 1 query ảnh
+        with self.assertNumQueries(3):
+            data = self.client.get(url, {'ordering': '-total_field'}).json()
+        self.assertEqual([(item['id'], item['total_field'], item['min_price']) for item in data],
+                         [(self.other.id, 1, 50), (self.center.id, 0, None)])
+
+    def test_list_images_do_not_depend_on_image_count(self):
+        ImageSport.objects.create(file='images/drift.jpg', content_type=ContentType.objects.get_for_model(SportCenter),
+                                  object_id=self.center.id, preview_status=StatusPreviewEnum.FAILED)
+        # Bộ đếm lệch (ghi DB trực tiếp): ảnh vẫn được trả về
+        SportCenter.objects.update(image_count=0)
+        data = self.client.get(reverse('sportcenter-list')).json()
+        images = {item['id']: item['images'] for item in data}
+        self.assertEqual(len(images[self.center.id]), 1)
+
+
+class SportCatalogTests(ImagePreviewTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_authenticate(user=self.center.owner)
+        self.url = reverse('sport_catalog')
+        self.field_ct = ContentType.objects.get_for_model(SportField)
+
+    def create_catalog(self, centers):
+        for index in range(centers):
+            center = SportCenter.objects.create(owner=self.center.owner, name=f"C{index}", address="Sơn Trà")
+            field = SportField.objects.create(sport_center=center, name="Sân 1", address="", price=100 + index)
+            ImageSport.objects.create(file=f'images/c{index}.jpg', content_type=self.center_ct, object_id=center.id,
+                                      preview_status=StatusPreviewEnum.FAILED)
+            ImageSport.objects.create(file=f'images/f{index}.jpg', content_type=self.field_ct, object_id=field.id,
+                                      preview_status=StatusPreviewEnum.FAILED)
+
+    def test_fixed_query_count(self):
+        self.create_catalog(2)
+        self.client.get(self.url)
+        # 1 query aggregate cho ETag + 3 query dựng catalog
+        with self.assertNumQueries(4):
+            small = self.client.get(self.url, {'limit': 1}).json()
+        self.create_catalog(8)
+        with self.assertNumQueries(4):
+            data = self.client.get(self.url, {'limit': 10}).json()
+        self.assertEqual(small['next_offset'], 1)
+        self.assertEqual((len(data['results']), data['next_offset']), (10, 10))
+        center = data['results'][0]
+        self.assertEqual((center['name'], center['total_field'], len(center['images'])), ("C7", 1, 1))
+        self.assertEqual(center['fields'][0]['images'][0]['preview'], 'images/f7.jpg')
+        self.assertEqual(len(self.client.get(self.url, {'district': "son tra"}).json()['results']), 10)
+        self.assertEqual(self.client.get(self.url, {'district': "Quận 1"}).json()['results'], [])
+
+    def test_conditional_get(self):
+        self.create_catalog(1)
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # ETag theo query params
+        self.assertNotEqual(self.client.get(self.url, {'limit': 5})['ETag'], etag)
+
+        # Validator lấy từ DB, không phụ thuộc cache của process
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        field = SportField.objects.get(sport_center__name="C0")
+        field.price = 500
+        field.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['fields'][0]['price'], 500)
+
+        # Preview của ảnh sân xong (job nền, process khác): ETag đổi theo updated_at của sân
+        etag = response['ETag']
+        ImageSport.objects.filter(object_id=field.id, content_type=self.field_ct).update(preview='images/f0_p.jpg')
+        ImageSport.objects.filter(object_id=field.id, content_type=self.field_ct).touch_owners()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = response['ETag']
+        ImageSport.objects.filter(content_type=self.field_ct).delete_with_media()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ImageVariantMapsTests(ImagePreviewTestMixin, TestCase):
+    def test_one_query_for_all_models(self):
+        field = SportField.objects.create(sport_center=self.center, name="Sân 1", address="", price=100)
+        field_ct = ContentType.objects.get_for_model(SportField)
+        ImageSport.objects.create(file='images/c.jpg', content_type=self.center_ct, object_id=self.center.id)
+        # object_id trùng id trung tâm nhưng khác content type: không được lẫn sang map của trung tâm
+        ImageSport.objects.create(file='images/f.jpg', content_type=field_ct, object_id=self.center.id)
+        ImageSport.objects.create(file='images/g.jpg', content_type=field_ct, object_id=field.id)
+        with self.assertNumQueries(1):
+            maps = ImageSport.objects.variant_maps((SportCenter, [self.center.id]), (SportField, [field.id]))
+        self.assertEqual([img['file'] for img in maps[SportCenter][self.center.id]], ['images/c.jpg'])
+        self.assertEqual(list(maps[SportField]), [field.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(ImageSport.objects.variant_maps((SportCenter, []))[SportCenter], {})
+
+
+class SportCenterConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(
+            email="etag@example.com", username="etag", full_name="Etag",
+            role=RoleSystemEnum.OWNER.value, is_active=True,
+        )
+        self.client.force_authenticate(user=self.owner)
+        self.center = SportCenter.objects.create(owner=self.owner, name="A", address="Hải Châu")
+        self.url = reverse('sportcenter-list')
+
+    def test_row_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Ghi last_login không đổi ETag, đổi thông tin chủ sân thì có
+        self.owner.last_login = timezone.now()
+        self.owner.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.owner.phone = "0905000000"
+        self.owner.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['owner']['phone'], "0905000000")
+
+        # Sửa sân của trung tâm khác không làm mất ETag trang chi tiết của trung tâm này
+        detail_url = reverse('sportcenter-detail', args=[self.center.id])
+        detail_etag = self.client.get(detail_url)['ETag']
+        other = SportCenter.objects.create(owner=self.owner, name="B", address="Sơn Trà")
+        SportField.objects.create(sport_center=other, name="1", address="", price=100)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+        SportField.objects.create(sport_center=self.center, name="1", address="", price=100)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+        # Action khác list/retrieve không có validator
+        self.assertNotIn('ETag', self.client.get(reverse('sportcenter-nearby'), {'lat': 16.06, 'lng': 108.22}))
@@ -4,7 +4,8 @@ from rest_framework import routers
 from apps.sport_center.views import (
     SportCenterViewSet,
     SportFieldViewSet,
-    ImageSportDeleteViewSet
+    ImageSportDeleteViewSet,
+    SportCatalogView
 )
 
 router_sport_center = routers.DefaultRouter(trailing_slash=False)
@@ -16,6 +17,7 @@ urlpatterns = [
     path('sport_center/', include(router_sport_center.urls)),
     path('sport_field/', include(router_sport_field.urls)),
     path('image_sport/<int:pk>/delete/', ImageSportDeleteViewSet.as_view(), name='delete_image_sport'),
+    path('catalog/', SportCatalogView.as_view(), name='sport_catalog'),
 ]
 
 
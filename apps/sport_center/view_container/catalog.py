@@ -0,0 +1,33 @@
+from apps.sport_center.catalog import build_catalog, catalog_centers
+from apps.sport_center.models import SportCenter
+from apps.sport_center.serializers import CatalogQuerySerializer
+from apps.user.view_container import (
+    APIView, Response, swagger_auto_schema, IsUser,
+)
+from apps.utils.http_cache import ConditionalGetMixin
+
+
+class SportCatalogView(ConditionalGetMixin, APIView):
+    """
+    Danh sách trung tâm kèm sân và ảnh (variants) trong 1 request, 3 query cố định
+    """
+    permission_classes = [IsUser]
+    # Đổi sân/ảnh cũng đổi updated_at của trung tâm/sân (bộ đếm, touch_image_owners)
+    last_modified_fields = ('updated_at', 'sportfield__updated_at')
+
+    def get_validator_queryset(self):
+        params = CatalogQuerySerializer(data=self.request.query_params)
+        if not params.is_valid():
+            return SportCenter.objects.none()
+        return catalog_centers(params.validated_data['district'], params.validated_data['sport_type'])
+
+    @swagger_auto_schema(
+        operation_summary="Catalog trung tâm + sân + ảnh",
+        operation_description="Trả về `results` (trung tâm, `fields[]`, `images[]`) và `next_offset`. "
+                              "Hỗ trợ ETag/If-None-Match: catalog không đổi thì trả 304",
+        query_serializer=CatalogQuerySerializer,
+    )
+    def get(self, request):
+        params = CatalogQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(build_catalog(**params.validated_data))
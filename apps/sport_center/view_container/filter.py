@@ -1,13 +1,44 @@
 from apps.sport_center.models import SportCenter, SportField
+from apps.sport_center.districts import normalize_district
+from apps.sport_center.search import search_ids, search_queryset
 from apps.user.view_container import (
-    filters,
+    filters, OrderingFilter,
 )
 
 
-class SportCenterFilter(filters.FilterSet):
+class SearchRankOrderingFilter(OrderingFilter):
+    """
+    Có tìm kiếm (annotate search_rank) mà client không truyền `ordering`: khớp nhất lên đầu
+    """
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset.order_by('-search_rank', *(self.get_default_ordering(view) or ()))
+        return super().filter_queryset(request, queryset, view)
+
+
+class AreaFilterMixin:
+    """
+    `district` nhận tên quận/huyện (có dấu hoặc không) hoặc giá trị DistrictEnum;
+    `address` là đúng tên 1 quận/huyện thì cũng lọc bằng cột district (có index)
+    """
+    def filter_district(self, queryset, name, value):
+        district = normalize_district(value)
+        return queryset.filter(district=district) if district else queryset.none()
+
+    def filter_search(self, queryset, name, value):
+        if name == 'search_address' and normalize_district(value):
+            return self.filter_district(queryset, name, value)
+        columns = (name,) if name.startswith('search_') else ('search_name', 'search_address')
+        return search_queryset(queryset, value, columns)
+
+
+class SportCenterFilter(AreaFilterMixin, filters.FilterSet):
     owner = filters.UUIDFilter(field_name='owner')
-    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
-    address = filters.CharFilter(field_name='address', lookup_expr='icontains')
+    # Tìm không dấu, gần đúng trên cột search_* (xem apps.sport_center.search)
+    name = filters.CharFilter(field_name='search_name', method='filter_search')
+    address = filters.CharFilter(field_name='search_address', method='filter_search')
+    search = filters.CharFilter(method='filter_search')
+    district = filters.CharFilter(method='filter_district')
 
     def __init__(self, *args, **kwargs):
         self.request = kwargs.get('request', None)
@@ -15,23 +46,28 @@ class SportCenterFilter(filters.FilterSet):
 
     class Meta:
         model = SportCenter
-        fields = ['owner', 'name', 'address']
+        fields = ['owner', 'name', 'address', 'search', 'district']
 
 
-class SportFieldFilter(filters.FilterSet):
+class SportFieldFilter(AreaFilterMixin, filters.FilterSet):
     sport_center = filters.NumberFilter(field_name='sport_center')
-    address = filters.CharFilter(field_name='address', lookup_expr='icontains')
+    address = filters.CharFilter(field_name='search_address', method='filter_search')
+    search = filters.CharFilter(method='filter_search')
+    district = filters.CharFilter(method='filter_district')
     sport_type = filters.CharFilter(field_name='sport_type')
     price = filters.NumberFilter(field_name='price')
     price_lte = filters.NumberFilter(field_name='price', lookup_expr='lte')
     status = filters.CharFilter(field_name='status')
 
-    center_name = filters.CharFilter(field_name='sport_center__name', lookup_expr='icontains')
+    center_name = filters.CharFilter(method='filter_center_name')
 
     def __init__(self, *args, **kwargs):
         self.request = kwargs.get('request', None)
         super().__init__(*args, **kwargs)
 
+    def filter_center_name(self, queryset, name, value):
+        return queryset.filter(sport_center__in=search_ids(SportCenter, value, ('search_name',)))
+
     class Meta:
         model = SportField
         fields = ['sport_center', 'sport_type', 'price', 'price_lte', 'status']
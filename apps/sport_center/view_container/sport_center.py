@@ -1,34 +1,34 @@
-from django.contrib.contenttypes.models import ContentType
+from apps.sport_center.geocoding import availability_by_center, nearby_centers
 from apps.sport_center.models import SportCenter, ImageSport
 from apps.sport_center.serializers import (
-    serializers, SportCenterDetailSerializer, SportCenterSerializer, ImageSportDeleteSerializer, delete_sport_images
+    serializers, SportCenterDetailSerializer, SportCenterSerializer, ImageSportDeleteSerializer, delete_sport_images,
+    NearbySportCenterSerializer
 )
-from apps.sport_center.view_container.filter import SportCenterFilter
+from apps.sport_center.view_container.filter import SportCenterFilter, SearchRankOrderingFilter
 from apps.user.view_container import (
     Response, swagger_auto_schema, IsUser, IsOwner, ModelViewSet, status,
-    LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, OrderingFilter, RoleSystemEnum,
-    AppStatus, openapi, DestroyAPIView, Count
+    LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, RoleSystemEnum,
+    AppStatus, openapi, DestroyAPIView, action, timezone
 )
-from apps.utils.mapping_data import MappingData
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class SportCenterViewSet(ModelViewSet):
+class SportCenterViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
     queryset = SportCenter.objects.all()
     pagination_class = LimitOffsetPagination
     parser_classes = [MultiPartParser, FormParser]
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchRankOrderingFilter]
     filterset_class = SportCenterFilter
-    ordering_fields = ['name', 'address', 'created_at']
+    ordering_fields = ['name', 'address', 'created_at', 'total_field', 'active_field', 'image_count',
+                       'min_price', 'max_price']
     ordering = ('-created_at',)
-    instance_ct = ContentType.objects.get_for_model(SportCenter)
+    # Đổi sân/ảnh cũng đổi updated_at của trung tâm/sân (bộ đếm, touch_image_owners)
+    last_modified_fields = ('updated_at', 'owner__updated_at')
 
     def get_queryset(self):
-        return (
-            SportCenter.objects
-            .select_related("owner")
-            .annotate(total_field=Count("sportfield"))
-        )
+        # total_field... là cột bộ đếm (cập nhật qua signal), không cần JOIN/GROUP BY
+        return SportCenter.objects.select_related("owner")
 
     def get_serializer_class(self):
         if self.action in ['create', 'update']:
@@ -61,22 +61,13 @@ class SportCenterViewSet(ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance_ct = ContentType.objects.get_for_model(SportCenter)
-        images = ImageSport.objects.filter(object_id=instance.id, content_type_id=instance_ct.id).values('id', 'preview', 'file')
-        image_map = {}
-        for img in images:
-            image_info = {
-                'id': img['id'],
-                'preview': img['preview'],
-                'file': img['file']
-            }
-            image_map.setdefault(instance.id, []).append(image_info)
+        image_map = ImageSport.objects.variant_maps((SportCenter, [instance.id]))[SportCenter]
         serializer = self.get_serializer(instance, context={'image_map': image_map})
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if request.user.role != RoleSystemEnum.ADMIN.value and request.user != instance.owner:
+        if request.user.role != RoleSystemEnum.ADMIN.value and instance.owner_id != request.user.id:
             raise serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
         delete_sport_images(instance, SportCenter)
         instance.delete()
@@ -85,29 +76,51 @@ class SportCenterViewSet(ModelViewSet):
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
-        if page is not None:
-            sport_center_ids = [obj.id for obj in page]
-        else:
-            sport_center_ids = list(queryset.values_list('id', flat=True))
+        centers = page if page is not None else list(queryset)
 
-        instance_ct = ContentType.objects.get_for_model(SportCenter)
-        images = (ImageSport.objects.filter(object_id__in=sport_center_ids, content_type_id=instance_ct.id)
-                  .values('id', 'object_id', 'preview', 'file'))
-        image_map = MappingData(obj_images=images).mapping_img()
+        # Lấy ảnh theo mọi id của trang: image_count chỉ dùng để sắp xếp, bộ đếm lệch không làm mất ảnh
+        sport_center_ids = [obj.id for obj in centers]
+        image_map = ImageSport.objects.variant_maps((SportCenter, sport_center_ids))[SportCenter]
 
-        serializer = self.get_serializer(
-            page if page is not None else queryset, many=True, context={'image_map': image_map})
+        serializer = self.get_serializer(centers, many=True, context={'image_map': image_map})
 
         if page is not None:
             return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
+    @swagger_auto_schema(
+        operation_summary="Tìm trung tâm gần nhất",
+        operation_description="Các trung tâm trong bán kính `radius_km` quanh (lat, lng), gần nhất trước, "
+                              "kèm số slot/sân còn trống của `booking_date` (mặc định hôm nay)",
+        query_serializer=NearbySportCenterSerializer,
+    )
+    @action(detail=False, methods=['get'], url_path='nearby')
+    def nearby(self, request):
+        params = NearbySportCenterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        centers = nearby_centers(data['lat'], data['lng'], data['radius_km'],
+                                 queryset=SportCenter.objects.select_related('owner'))
+        availability = availability_by_center([center.id for center in centers],
+                                              data.get('booking_date') or timezone.localdate())
+        if data['available_only']:
+            centers = [center for center in centers if availability[center.id]['available_slots']]
+        return Response([
+            {**center.to_dict(), 'distance_km': round(center.distance_km, 3), **availability[center.id]}
+            for center in centers[:data['limit']]
+        ])
+
 
 class ImageSportDeleteViewSet(DestroyAPIView):
     queryset = ImageSport.objects.all()
     Permission_classes = [IsOwner]
     serializer_class = ImageSportDeleteSerializer
 
+    def perform_destroy(self, instance):
+        # Giảm ref_count của blob dùng chung, chỉ xóa file khi không còn ảnh nào tham chiếu
+        instance.delete_with_media()
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(data=request.data)
@@ -1,26 +1,27 @@
-from django.contrib.contenttypes.models import ContentType
-from apps.sport_center.models import SportField, ImageSport, SportCenter
+from apps.sport_center.models import SportField, ImageSport
 from apps.sport_center.serializers import (
     serializers, SportFieldDetailSerializer, SportFieldSerializer, delete_sport_images
 )
-from apps.sport_center.view_container.filter import SportFieldFilter
+from apps.sport_center.view_container.filter import SportFieldFilter, SearchRankOrderingFilter
 from apps.user.view_container import (
     Response, swagger_auto_schema, IsUser, ModelViewSet, status,
-    LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, OrderingFilter, RoleSystemEnum,
+    LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, RoleSystemEnum,
     AppStatus, openapi
 )
-from apps.utils.mapping_data import MappingData
+from apps.utils.http_cache import ConditionalGetMixin
 
 
-class SportFieldViewSet(ModelViewSet):
+class SportFieldViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
     queryset = SportField.objects.all()
     pagination_class = LimitOffsetPagination
     parser_classes = [MultiPartParser, FormParser]
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchRankOrderingFilter]
     filterset_class = SportFieldFilter
     ordering_fields = ['name', 'address', 'price', 'created_at']
     ordering = ('-created_at',)
+    # Đổi sân/ảnh cũng đổi updated_at của trung tâm/sân (bộ đếm, touch_image_owners)
+    last_modified_fields = ('updated_at', 'sport_center__updated_at')
 
     def get_queryset(self):
         return SportField.objects.select_related('sport_center')
@@ -56,23 +57,13 @@ class SportFieldViewSet(ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance_ct = ContentType.objects.get_for_model(SportField)
-        images = (ImageSport.objects.filter(object_id=instance.id, content_type_id=instance_ct.id)
-                  .values('id', 'file', 'preview'))
-        image_map = {}
-        for img in images:
-            image_info = {
-                'id': img['id'],
-                'file': img['file'],
-                'preview': img['preview']
-            }
-            image_map.setdefault(instance.id, []).append(image_info)
+        image_map = ImageSport.objects.variant_maps((SportField, [instance.id]))[SportField]
         serializer = self.get_serializer(instance, context={'image_map': image_map})
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if request.user.role != RoleSystemEnum.ADMIN.value and request.user != instance.owner:
+        if request.user.role != RoleSystemEnum.ADMIN.value and instance.sport_center.owner_id != request.user.id:
             raise serializers.ValidationError(AppStatus.PERMISSION_DENIED.message)
         delete_sport_images(instance, SportField)
         instance.delete()
@@ -87,10 +78,7 @@ class SportFieldViewSet(ModelViewSet):
         else:
             sport_field_ids = list(queryset.values_list('id', flat=True))
 
-        instance_ct = ContentType.objects.get_for_model(SportField)
-        images = (ImageSport.objects.filter(object_id__in=sport_field_ids, content_type_id=instance_ct.id)
-                  .values('id', 'object_id', 'preview', 'file'))
-        image_map = MappingData(obj_images=images).mapping_img()
+        image_map = ImageSport.objects.variant_maps((SportField, sport_field_ids))[SportField]
 
         serializer = self.get_serializer(
             page if page is not None else queryset, many=True, context={'image_map': image_map})
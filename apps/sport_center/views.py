@@ -1,3 +1,5 @@
 from apps.sport_center.view_container.sport_center import *
 
 from apps.sport_center.view_container.sport_field import *
+
+from apps.sport_center.view_container.catalog import *
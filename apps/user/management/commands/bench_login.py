@@ -0,0 +1,99 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import resolve, reverse
+from django.utils.module_loading import import_string
+
+from apps.user.models import User
+from apps.utils.enum_type import RoleSystemEnum
+
+PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    help = "Đo tốc độ hash mật khẩu và số lượt đăng nhập/giây qua POST /api/auth/login/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Số lượt đăng nhập")
+        parser.add_argument('--concurrency', type=int, default=4, help="Số thread gửi request song song")
+        parser.add_argument('--hash-rounds', type=int, default=10, help="Số lần hash/verify để đo từng hasher")
+        parser.add_argument('--skip-login', action='store_true', help="Chỉ đo hasher")
+
+    def handle(self, *args, **options):
+        self.bench_hashers(options['hash_rounds'])
+        if not options['skip_login']:
+            self.bench_login(options['requests'], max(1, options['concurrency']))
+
+    def bench_hashers(self, rounds):
+        for index, path in enumerate(settings.PASSWORD_HASHERS):
+            hasher = import_string(path)()
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as exc:
+                # Thiếu thư viện (vd. argon2-cffi): hasher mặc định thì dừng, hasher khác chỉ bỏ qua
+                if index == 0:
+                    raise CommandError(
+                        f"Default password hasher {hasher.algorithm} is not usable ({exc}). "
+                        f"Install its library (argon2: `poetry install -E argon2`) or change PASSWORD_HASHER."
+                    )
+                self.stdout.write(f"{hasher.algorithm}: skipped ({exc})")
+                continue
+            hash_times = timed(lambda: hasher.encode(PASSWORD, hasher.salt()), rounds)
+            verify_times = timed(lambda: hasher.verify(PASSWORD, encoded), rounds)
+            self.stdout.write(
+                f"{hasher.algorithm}{' (default)' if index == 0 else ''}: {describe(hasher.safe_summary(encoded))} "
+                f"hash {statistics.median(hash_times) * 1000:.1f}ms, verify {statistics.median(verify_times) * 1000:.1f}ms "
+                f"=> ~{1 / statistics.median(verify_times):.1f} logins/s/core"
+            )
+
+    def bench_login(self, total, concurrency):
+        username = f"bench_{uuid.uuid4().hex[:12]}"
+        user = User.objects.create(
+            username=username, email=f"{username}@example.com", full_name="Bench",
+            password=make_password(PASSWORD), role=RoleSystemEnum.USER.value, is_active=True,
+        )
+        url = reverse('login_api')
+        # Bench đăng nhập liên tục cùng 1 user/IP: tắt throttle đăng nhập (login_user 5/phút) trong lúc đo
+        view_class = resolve(url).func.view_class
+        throttle_classes, view_class.throttle_classes = view_class.throttle_classes, []
+
+        def login(_):
+            started = time.perf_counter()
+            response = Client().post(url, {'username': username, 'password': PASSWORD})
+            if response.status_code != 200:
+                raise CommandError(f"Login failed with status {response.status_code}: {response.content[:200]!r}")
+            return time.perf_counter() - started
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = sorted(pool.map(login, range(total)))
+            elapsed = time.perf_counter() - started
+        finally:
+            view_class.throttle_classes = throttle_classes
+            user.delete()
+
+        self.stdout.write(
+            f"login: {total} requests, concurrency {concurrency} ({get_hasher().algorithm}): "
+            f"{total / elapsed:.1f} logins/s, p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+            f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:.0f}ms"
+        )
+
+
+def timed(function, rounds):
+    times = []
+    for _ in range(max(1, rounds)):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def describe(summary):
+    return ', '.join(f"{key}={value}" for key, value in summary.items() if key not in ('salt', 'hash'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.user.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Xóa các RevokedToken đã hết hạn (token hết hạn tự bị từ chối, không cần giữ trong danh sách thu hồi)"
+
+    def handle(self, *args, **options):
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(f"Deleted {deleted} expired revoked token(s)")
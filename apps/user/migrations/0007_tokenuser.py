@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:49
+
+import apps.user.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_remove_chatsession_user_delete_chatmessage_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('user.user',),
+            managers=[
+                ('objects', apps.user.models.CustomUserManager()),
+            ],
+        ),
+    ]
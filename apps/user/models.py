@@ -103,3 +103,46 @@ class User(AbstractBaseUser, PermissionsMixin):
         }
 
 
+
+# Claim thêm vào JWT khi cấp token, đủ cho kiểm tra quyền mà không cần query User
+TOKEN_USER_CLAIMS = ('role', 'is_active', 'is_delete')
+
+
+class TokenUser(User):
+    """
+    User dựng từ claim của access token (id, role, is_active, is_delete), không query DB.
+    Các field khác là deferred: lần đầu view truy cập thì load tất cả trong 1 query
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        return cls.from_db('default', ['id', *TOKEN_USER_CLAIMS], [user_id, *(claims[name] for name in TOKEN_USER_CLAIMS)])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields and deferred.intersection(fields):
+            fields = list(deferred.union(fields))
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
+class RevokedToken(models.Model):
+    """
+    JTI của token đã thu hồi (logout...). Được nạp vào bộ lọc trong bộ nhớ (apps.depends.token_revocation),
+    request không query bảng này
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    token_type = models.CharField(max_length=20)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def to_dict(self):
+        return {
+            "jti": self.jti,
+            "token_type": self.token_type,
+            "user": str(self.user_id) if self.user_id else None,
+            "expires_at": self.expires_at,
+            "created_at": self.created_at,
+        }
@@ -1,14 +1,35 @@
+from apps.depends.cookie_jwt_auth import load_user, parse_user_id
+from apps.depends.token_revocation import is_token_revoked
+from apps.user.models import TOKEN_USER_CLAIMS, User
 from apps.user.serializer_container import (
     AppStatus, serializers, TokenObtainPairSerializer, TokenRefreshSerializer, RefreshToken, authenticate, Dict, Any
 )
 
 
+def add_user_claims(token, user):
+    """
+    Ghi role/is_active/is_delete vào token để CookieJWTAuthentication kiểm tra quyền không cần query User
+    """
+    for name in TOKEN_USER_CLAIMS:
+        token[name] = getattr(user, name)
+    return token
+
+
+def get_tokens_for_user(user):
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
+    return refresh, refresh.access_token
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     username = serializers.CharField(max_length=256, required=True)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
         username = attrs.get('username')
         password = attrs.get('password')
@@ -17,16 +38,17 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             raise serializers.ValidationError(AppStatus.ENTER_USERNAME_OR_EMAIL.message)
         username = username
 
+        # Hash mật khẩu chỉ kiểm tra 1 lần (super().validate() sẽ gọi authenticate lần nữa)
         user = authenticate(request=self.context.get('request'), username=username, password=password)
         if not user or user.is_delete:
             raise serializers.ValidationError(AppStatus.USERNAME_OR_PASSWORD_INCORRECT.message)
-        
-        # Generate tokens using parent validation
-        data = super().validate(attrs)
-        
+        self.user = user
+
+        refresh = self.get_token(user)
+
         # Store tokens for cookie setting (will be handled in the view)
-        self.access_token = data['access']
-        self.refresh_token = data['refresh']
+        self.access_token = str(refresh.access_token)
+        self.refresh_token = str(refresh)
         
         # Return user data only (tokens will be set as cookies)
         return {
@@ -42,7 +64,12 @@ class CustomTokenRefreshSerializer(TokenRefreshSerializer):
             raise serializers.ValidationError(AppStatus.NOT_REFRESH.message)
         
         refresh_token = RefreshToken(refresh)
-        new_access_token = str(refresh_token.access_token)
+        if is_token_revoked(refresh_token):
+            raise serializers.ValidationError(AppStatus.TOKEN_REVOKED.message)
+        access_token = refresh_token.access_token
+        # Claim lấy lại từ User hiện tại (role/trạng thái có thể đã đổi từ lúc đăng nhập)
+        add_user_claims(access_token, load_user(User, parse_user_id(refresh_token)))
+        new_access_token = str(access_token)
         
         # Store new access token for cookie setting
         self.access_token = new_access_token
@@ -1,7 +1,8 @@
 from apps.user.models import User
+from apps.user.serializer_container.custom_token import get_tokens_for_user
 from apps.user.serializer_container.user import UserDetailSerializer
 from apps.user.serializer_container import (
-    serializers, AppStatus, make_password, RefreshToken, validate_create_user
+    serializers, AppStatus, make_password, validate_create_user
 )
 
 
@@ -43,9 +44,9 @@ class UserVerifySerializer(serializers.ModelSerializer):
         user.is_active = True
         user.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh, access = get_tokens_for_user(user)
         return {
             'refresh': str(refresh),
-            'access': str(refresh.access_token),
+            'access': str(access),
             'user': UserDetailSerializer(user).data
         }
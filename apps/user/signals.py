@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.depends.cookie_jwt_auth import invalidate_cached_user
+from apps.user.models import TokenUser, User
+
+
+def clear_auth_user_cache(sender, instance, **kwargs):
+    # Đổi role, khóa tài khoản, xóa user... có hiệu lực ngay ở request tiếp theo
+    invalidate_cached_user(instance.pk)
+
+
+# Signal của proxy model gửi với sender là proxy (request.user ở chế độ AUTH_TOKEN_USER_CLAIMS)
+for model in (User, TokenUser):
+    post_save.connect(clear_auth_user_cache, sender=model, dispatch_uid=f'clear_auth_user_cache_save_{model.__name__}')
+    post_delete.connect(clear_auth_user_cache, sender=model, dispatch_uid=f'clear_auth_user_cache_delete_{model.__name__}')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.html import strip_tags
+
+from apps.jobs.registry import task
+
+
+@task(name='user.send_html_mail', max_attempts=5, priority=10, queue='email')
+def send_html_mail(subject, html_message, recipient_list):
+    """
+    Gửi email HTML (kèm bản text) qua SMTP. Lỗi SMTP sẽ được retry bởi hàng đợi job
+    """
+    send_mail(
+        subject,
+        strip_tags(html_message),
+        settings.EMAIL_HOST_USER,
+        recipient_list,
+        fail_silently=False,
+        html_message=html_message
+    )
+    return {"recipients": len(recipient_list)}
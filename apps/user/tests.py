@@ -1,3 +1,279 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2SHA1PasswordHasher, ScryptPasswordHasher
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from apps.depends.cookie_jwt_auth import USER_CACHE_KEY, CookieJWTAuthentication
+from apps.depends.oauth2 import IsOwner
+from apps.depends.throttling import SlidingWindowThrottle
+from apps.depends.token_revocation import BloomFilter, revocation_list
+from apps.user.hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher
+from apps.user.models import RevokedToken, TokenUser, User
+from apps.user.serializers import CustomTokenObtainPairSerializer
+from apps.utils.enum_type import RoleSystemEnum
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CookieJWTAuthenticationCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="cached@example.com", username="cached", full_name="Cached",
+            role=RoleSystemEnum.USER.value, is_active=True,
+        )
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.url = reverse('user-detail')
+
+    def test_user_loaded_once_then_cached(self):
+        request = RequestFactory().get(self.url)
+        request.COOKIES['access_token'] = self.client.cookies['access_token'].value
+        authentication = CookieJWTAuthentication()
+        with self.assertNumQueries(1):
+            user, _ = authentication.authenticate(request)
+        with self.assertNumQueries(0):
+            cached_user, _ = authentication.authenticate(request)
+        self.assertEqual(cached_user.pk, user.pk)
+
+    def test_cache_holds_only_permission_fields(self):
+        self.client.get(self.url)
+        cached = cache.get(USER_CACHE_KEY.format(self.user.pk))
+        self.assertEqual(set(cached), {'role', 'is_active', 'is_delete'})
+
+    def test_cache_invalidated_on_save(self):
+        self.client.get(self.url)
+        self.user.role = RoleSystemEnum.OWNER.value
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).json()['role'], RoleSystemEnum.OWNER.value)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deleted_user_rejected(self):
+        self.client.get(self.url)
+        self.user.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(AUTH_TOKEN_USER_CLAIMS=True)
+class TokenUserClaimsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="claims@example.com", username="claims", full_name="Claims",
+            role=RoleSystemEnum.OWNER.value, is_active=True,
+        )
+        self.access = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.authentication = CookieJWTAuthentication()
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/')
+        request.COOKIES['access_token'] = str(token)
+        return self.authentication.authenticate(request)[0]
+
+    def test_permission_check_without_query(self):
+        self.assertEqual((self.access['role'], self.access['is_active'], self.access['is_delete']),
+                         (RoleSystemEnum.OWNER.value, True, False))
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.access)
+            request = RequestFactory().get('/')
+            request.user = user
+            self.assertTrue(IsOwner().has_permission(request, None))
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user, self.user)
+
+        # Field ngoài claim: load 1 lần cho tất cả
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.full_name), ("claims@example.com", "Claims"))
+
+    def test_inactive_claim_rejected(self):
+        self.access['is_active'] = False
+        with self.assertRaises(InvalidToken):
+            self.authenticate(self.access)
+
+    def test_token_without_claims_loads_user(self):
+        user = self.authenticate(AccessToken.for_user(self.user))
+        self.assertNotIsInstance(user, TokenUser)
+        self.assertEqual(user.email, "claims@example.com")
+
+
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        self.user = User.objects.create(
+            email="logout@example.com", username="logout", full_name="Logout",
+            role=RoleSystemEnum.USER.value, is_active=True,
+        )
+        self.user.set_password("secret-pass")
+        self.user.save()
+
+    def test_logout_revokes_access_and_refresh(self):
+        response = self.client.post(reverse('login_api'), {'username': 'logout', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        access, refresh = response.cookies['access_token'].value, response.cookies['refresh_token'].value
+        self.assertEqual(self.client.get(reverse('user-detail')).status_code, 200)
+
+        self.client.post(reverse('logout_api'))
+        self.assertEqual(set(RevokedToken.objects.values_list('token_type', flat=True)), {'access', 'refresh'})
+
+        # Token cũ (vd. bị đánh cắp) không dùng lại được
+        self.client.cookies['access_token'] = access
+        self.assertEqual(self.client.get(reverse('user-detail')).status_code, 401)
+        self.client.cookies['refresh_token'] = refresh
+        self.assertEqual(self.client.post(reverse('token_refresh')).status_code, 400)
+        del self.client.cookies['access_token']
+        self.assertEqual(self.client.get(reverse('user-detail'), HTTP_AUTHORIZATION=f"Bearer {access}").status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_REFRESH=3600)
+    def test_revocations_loaded_from_db_then_checked_in_memory(self):
+        token = AccessToken.for_user(self.user)
+        RevokedToken.objects.create(jti=token['jti'], token_type='access', user=self.user,
+                                    expires_at=timezone.now() + timedelta(hours=1))
+        # Process khác (chưa thấy row) nạp danh sách từ DB ở lần kiểm tra đầu
+        revocation_list.reset()
+        self.assertTrue(revocation_list.is_revoked(token['jti']))
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation_list.is_revoked(AccessToken.for_user(self.user)['jti']))
+
+    @override_settings(TOKEN_REVOCATION_REFRESH=0, TOKEN_REVOCATION_REBUILD=3600)
+    def test_refresh_picks_up_rows_committed_late(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        RevokedToken.objects.create(id=100, jti="read-first", token_type='access', expires_at=expires_at)
+        self.assertTrue(revocation_list.is_revoked("read-first"))
+        # Row có id nhỏ hơn, tạo trước lần đọc nhưng commit sau (transaction chậm)
+        RevokedToken.objects.create(id=50, jti="committed-late", token_type='access', expires_at=expires_at)
+        RevokedToken.objects.filter(id=50).update(created_at=timezone.now() - timedelta(seconds=5))
+        self.assertTrue(revocation_list.is_revoked("committed-late"))
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f"jti-{index}")
+        self.assertTrue(all(f"jti-{index}" in bloom for index in range(1000)))
+        false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class PasswordHashingTests(APITestCase):
+    def login(self):
+        return self.client.post(reverse('login_api'), {'username': 'hashing', 'password': 'secret-pass'})
+
+    def test_login_verifies_once_and_upgrades_hash(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = User.objects.create(email="hashing@example.com", username="hashing", full_name="Hashing",
+                                       role=RoleSystemEnum.USER.value, is_active=True)
+            user.set_password("secret-pass")
+            user.save()
+        self.assertIn("$1000$", user.password)
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000), \
+                mock.patch.object(TunedPBKDF2PasswordHasher, 'verify', autospec=True,
+                                  side_effect=TunedPBKDF2PasswordHasher.verify) as verify:
+            self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(verify.call_count, 1)
+        # Hash được nâng cấp theo cấu hình hiện tại ngay khi đăng nhập
+        user.refresh_from_db()
+        self.assertIn("$2000$", user.password)
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_legacy_default_hashes_still_verify_and_upgrade(self):
+        user = User.objects.create(email="hashing@example.com", username="hashing", full_name="Hashing",
+                                   role=RoleSystemEnum.USER.value, is_active=True)
+        for hasher in (PBKDF2SHA1PasswordHasher(), ScryptPasswordHasher()):
+            with self.subTest(hasher=hasher.algorithm), override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+                # Hash tạo bởi hasher mặc định của Django trước khi đổi cấu hình
+                User.objects.filter(pk=user.pk).update(password=hasher.encode("secret-pass", hasher.salt()))
+                self.assertEqual(self.login().status_code, 200)
+                user.refresh_from_db()
+                self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+
+def throttle_rates(**rates):
+    return {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates}}
+
+
+class TestThrottle(SlidingWindowThrottle):
+    scope = 'login_ip'
+
+
+class SlidingWindowThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['local'].clear()
+        self.request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+
+    def allow_at(self, timestamp):
+        throttle = TestThrottle()
+        with mock.patch('apps.depends.throttling.time.time', return_value=timestamp):
+            return throttle.allow_request(self.request, None), throttle.wait()
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='10/minute'))
+    def test_previous_window_is_weighted(self):
+        for _ in range(10):
+            self.assertTrue(self.allow_at(6050)[0])
+        allowed, wait = self.allow_at(6055)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 5)
+        # Window mới sau 30s: còn ước lượng 10 * 0.5 = 5 request của window trước
+        self.assertEqual([self.allow_at(6090)[0] for _ in range(6)], [True] * 5 + [False])
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='1/minute'))
+    def test_falls_back_to_local_memory(self):
+        with mock.patch.object(caches['default'], 'add', side_effect=ConnectionError("down")):
+            self.assertTrue(self.allow_at(6000)[0])
+            self.assertFalse(self.allow_at(6001)[0])
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_user='2/minute'), PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_login_throttled_per_username_and_ip(self):
+        victim = User.objects.create(email="victim@example.com", username="victim", full_name="Victim",
+                                     role=RoleSystemEnum.USER.value, is_active=True)
+        victim.set_password("secret-pass")
+        victim.save()
+        url = reverse('login_api')
+        # Kẻ tấn công dò mật khẩu của victim từ IP của mình
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'username': 'Victim', 'password': 'x'},
+                                              REMOTE_ADDR='10.6.6.6').status_code, 400)
+        response = self.client.post(url, {'username': 'victim ', 'password': 'x'}, REMOTE_ADDR='10.6.6.6')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+        # Chủ tài khoản ở IP khác vẫn đăng nhập được
+        response = self.client.post(url, {'username': 'victim', 'password': 'secret-pass'}, REMOTE_ADDR='10.9.9.9')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class BenchLoginCommandTests(TransactionTestCase):
+    # TransactionTestCase: request đăng nhập chạy trên thread khác, cần thấy user đã commit
+    def setUp(self):
+        cache.clear()
+
+    def test_bench_runs_past_login_throttle(self):
+        out = StringIO()
+        call_command('bench_login', requests=8, concurrency=2, hash_rounds=1, stdout=out)
+        self.assertIn("login: 8 requests", out.getvalue())
+        # Throttle đăng nhập được bật lại sau khi đo
+        for _ in range(5):
+            self.client.post(reverse('login_api'), {'username': 'ghost', 'password': 'x'})
+        self.assertEqual(self.client.post(reverse('login_api'), {'username': 'ghost', 'password': 'x'}).status_code, 429)
+
+    @override_settings(PASSWORD_HASHERS=['apps.user.hashers.TunedArgon2PasswordHasher'])
+    def test_missing_default_hasher_library_fails_clearly(self):
+        with mock.patch.object(TunedArgon2PasswordHasher, '_load_library',
+                               side_effect=ValueError("Couldn't load 'Argon2PasswordHasher' algorithm library")):
+            with self.assertRaisesMessage(CommandError, "Default password hasher argon2 is not usable"):
+                call_command('bench_login', skip_login=True, hash_rounds=1, stdout=StringIO())
@@ -1,11 +1,17 @@
 """
 Custom views for cookie-based JWT authentication
 """
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
+from apps.depends.throttling import LoginIPThrottle, LoginUsernameThrottle
+from apps.depends.token_revocation import revoke_token
+from apps.user.models import User
 from apps.utils.cookie_utils import set_jwt_cookies, clear_jwt_cookies
 
 
@@ -14,6 +20,9 @@ class CookieTokenObtainPairView(TokenObtainPairView):
     """
     Custom login view that sets JWT tokens as HTTP-only cookies
     """
+    # Chặn dò mật khẩu trước khi hash (theo IP và theo cặp username + IP)
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
+
     def post(self, request, *args, **kwargs):
         # Call parent's post method to get serializer and validate
         serializer = self.get_serializer(data=request.data)
@@ -88,9 +97,24 @@ class CookieTokenRefreshView(TokenRefreshView):
 
 class LogoutView(TokenRefreshView):
     """
-    Custom logout view that clears JWT cookies
+    Custom logout view that revokes the current tokens and clears JWT cookies
     """
     def post(self, request, *args, **kwargs):
+        raw_tokens = [
+            (AccessToken, request.COOKIES.get(settings.JWT_ACCESS_TOKEN_COOKIE)),
+            (RefreshToken, request.COOKIES.get(settings.JWT_REFRESH_TOKEN_COOKIE) or request.data.get('refresh')),
+        ]
+        for token_class, raw_token in raw_tokens:
+            if not raw_token:
+                continue
+            try:
+                token = token_class(raw_token)
+            except TokenError:
+                # Token hết hạn/không hợp lệ thì không cần thu hồi
+                continue
+            user_id = token.get(settings.SIMPLE_JWT['USER_ID_CLAIM'])
+            revoke_token(token, user=User.objects.filter(id=user_id).first() if user_id else None)
+
         response = Response({
             'message': 'Logout successful'
         }, status=status.HTTP_200_OK)
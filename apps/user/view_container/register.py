@@ -1,3 +1,4 @@
+from apps.depends.throttling import RegisterThrottle, VerifyCodeThrottle
 from apps.user.serializers import (
     UserRegisterSerializer, UserVerifySerializer
 )
@@ -13,6 +14,7 @@ class RegisterViewSet(GenericAPIView):
     serializer_class = UserRegisterSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterThrottle]
 
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -37,6 +39,7 @@ class VerifyCodeViewSet(GenericAPIView):
     serializer_class = UserVerifySerializer
     authentication_classes = []
     permission_classes = [AllowAny]
+    throttle_classes = [VerifyCodeThrottle]
 
     def put(self, request):
         serializer = self.get_serializer(data=request.data)
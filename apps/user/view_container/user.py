@@ -6,6 +6,7 @@ from apps.user.view_container import (
     LimitOffsetPagination, MultiPartParser, FormParser, DjangoFilterBackend, OrderingFilter, User, RoleSystemEnum,
     AppStatus, UserFilter
 )
+from apps.utils.http_cache import ConditionalGetMixin
 
 
 class UserDetailViewSet(APIView):
@@ -26,7 +27,7 @@ class UserDetailViewSet(APIView):
         return Response(serializer.data)
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsUser]
     queryset = User.objects.all()
     pagination_class = LimitOffsetPagination
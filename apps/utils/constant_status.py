@@ -12,6 +12,7 @@ class AppStatus(Enum):
     USER_NOT_EXIST = "USER_NOT_EXIST", 400, "User not exist."
     EMAIL_NOT_EXIST = "EMAIL_NOT_EXIST", 400, "Email not exist."
     NOT_REFRESH = "NOT_REFRESH", 400, "Refresh token is required."
+    TOKEN_REVOKED = "TOKEN_REVOKED", 400, "Token has been revoked."
     PERMISSION_DENIED = "PERMISSION_DENIED", 400, "Permission denied."
     INVALID_VERIFY_CODE = "INVALID_VERIFY_CODE", 400, "Invalid verification code."
     EMAIL_ALREADY_EXIST = "EMAIL_ALREADY_EXIST", 400, "User with email already exists."
@@ -19,12 +20,19 @@ class AppStatus(Enum):
 
     SPORT_CENTER_WITH_INFO_EXIST = "SPORT_CENTER_WITH_INFO_EXIST", 400, "Sport center with this info exist."
     OWNER_SPORT_CENTER_MUST_ROLE_OWNER = "OWNER_SPORT_CENTER_MUST_ROLE_OWNER", 400, "Owner sport center must role owner."
+    INVALID_COORDINATES = "INVALID_COORDINATES", 400, "Latitude and longitude must be provided together."
+    RADIUS_TOO_LARGE = "RADIUS_TOO_LARGE", 400, "Search radius is too large."
 
     SPORT_FIELD_WITH_INFO_EXIST = "SPORT_FIELD_WITH_INFO_EXIST", 400, "Sport field with this info exist."
     NO_RENTAL_SLOTS_FOUND = "NO_RENTAL_SLOTS_FOUND" , 400, "No rental slots found for these sport types."
     NO_ACTIVE_SPORT_FIELDS_FOUND = "NO_ACTIVE_SPORT_FIELDS_FOUND", 400, "No active sport fields found for this center."
     NO_VALID_DATES_IN_THIS_MONTH = "NO_VALID_DATES_IN_THIS_MONTH", 400, "No valid dates found for booking in this month."
 
+    INVALID_IMAGE_FILE = "INVALID_IMAGE_FILE", 400, "Invalid image file."
+    INVALID_IMAGE_FORMAT = "INVALID_IMAGE_FORMAT", 400, "Image format is not supported."
+    IMAGE_FILE_TOO_LARGE = "IMAGE_FILE_TOO_LARGE", 400, "Image file is too large."
+    IMAGE_DIMENSIONS_TOO_LARGE = "IMAGE_DIMENSIONS_TOO_LARGE", 400, "Image dimensions are too large."
+
     ENTER_USERNAME_OR_EMAIL = "ENTER_USERNAME_OR_EMAIL", 400, "Please enter the username or email."
     USERNAME_OR_PASSWORD_INCORRECT = "USERNAME_OR_PASSWORD_INCORRECT", 400, "Username or password is incorrect."
 
@@ -37,6 +37,17 @@ class StatusBookingEnum(EnumType):
     CANCELLED = "CANCELLED"
 
 
+class DistrictEnum(EnumType):
+    HAI_CHAU = "HAI_CHAU"
+    THANH_KHE = "THANH_KHE"
+    SON_TRA = "SON_TRA"
+    NGU_HANH_SON = "NGU_HANH_SON"
+    LIEN_CHIEU = "LIEN_CHIEU"
+    CAM_LE = "CAM_LE"
+    HOA_VANG = "HOA_VANG"
+    HOANG_SA = "HOANG_SA"
+
+
 class SportTypeEnum(EnumType):
     FOOTBALL = "FOOTBALL"
     BADMINTON = "BADMINTON"
@@ -47,3 +58,16 @@ class SportTypeEnum(EnumType):
 class RoleChatEnum(EnumType):
     USER = "USER"
     BOT = "BOT"
+
+
+class StatusJobEnum(EnumType):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class StatusPreviewEnum(EnumType):
+    PENDING = "PENDING"
+    READY = "READY"
+    FAILED = "FAILED"
@@ -0,0 +1,80 @@
+"""
+Geohash encoding, bounding boxes and haversine distance for radius searches.
+
+A radius query is answered in three steps: the geohash cells covering the query's bounding box
+become index range scans on the `geohash` column, the bounding box trims the cell corners, and
+the haversine distance gives the exact order.
+"""
+import math
+from typing import List, Tuple
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Even bits split longitude, odd bits latitude
+        target, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """
+    (height, width) in degrees of a geohash cell
+    """
+    total_bits = precision * 5
+    return 180.0 / 2 ** (total_bits // 2), 360.0 / 2 ** ((total_bits + 1) // 2)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lng, max_lng) enclosing the circle
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    delta_lng = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return (max(-90.0, latitude - delta_lat), min(90.0, latitude + delta_lat),
+            longitude - delta_lng, longitude + delta_lng)
+
+
+def covering_geohashes(box: Tuple[float, float, float, float]) -> List[str]:
+    """
+    At most 4 geohash prefixes whose cells cover the box: the longest precision whose cell is at
+    least as large as the box, so the box spans no more than 2 cells per axis
+    """
+    min_lat, max_lat, min_lng, max_lng = box
+    precision = GEOHASH_PRECISION
+    while precision > 1:
+        height, width = geohash_cell_size(precision)
+        if height >= max_lat - min_lat and width >= max_lng - min_lng:
+            break
+        precision -= 1
+    corners = [(lat, _wrap_longitude(lng)) for lat in (min_lat, max_lat) for lng in (min_lng, max_lng)]
+    return sorted({geohash_encode(lat, lng, precision) for lat, lng in corners})
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi, d_lambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _wrap_longitude(longitude: float) -> float:
+    return (longitude + 180.0) % 360.0 - 180.0
@@ -0,0 +1,100 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF read endpoints.
+
+Validators come from the rows actually served, never the payload itself: max(updated_at) (also
+across joined rows the payload embeds) + count of the queryset the response is built from, in one
+aggregate query. Being read from the database, they hold across web workers and job processes.
+A request whose If-None-Match matches gets 304 before the handler runs, so nothing is fetched
+or serialized.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+def make_etag(*parts) -> str:
+    return f'"{hashlib.sha1(repr(parts).encode()).hexdigest()[:20]}"'
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    ETag (and Last-Modified where it is sound) for GET/HEAD, 304 without running the handler.
+
+    - `last_modified_fields`: max() of each (joins allowed, e.g. 'sport_field__updated_at' when the
+      payload embeds the field's name) and count() over get_validator_queryset()
+    - `conditional_actions`: ViewSet actions validated (plain APIView: every GET)
+
+    The ETag is scoped to the full URL, the user and the negotiated renderer, since responses
+    depend on query params and role. Last-Modified / If-Modified-Since is only used for single
+    objects: for lists a deleted row does not move max(updated_at).
+    """
+    last_modified_fields = ('updated_at',)
+    conditional_actions = ('list', 'retrieve')
+
+    def is_conditional(self, request):
+        action = getattr(self, 'action', None)
+        return request.method in CONDITIONAL_METHODS and (action is None or action in self.conditional_actions)
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_etag_parts(self):
+        """
+        Extra values the response depends on (e.g. today's date for relative presets)
+        """
+        return ()
+
+    def get_validators(self, request):
+        """
+        Returns: (etag, last_modified timestamp | None)
+        """
+        maxima = {f'max_{index}': Max(field) for index, field in enumerate(self.last_modified_fields)}
+        # distinct: last_modified_fields may join to-many relations
+        row = self.get_validator_queryset().order_by().aggregate(count=Count('pk', distinct=True), **maxima)
+        last_modified = max((value for key, value in row.items() if key != 'count' and value), default=None)
+        etag = make_etag(
+            request.get_full_path(), getattr(request.user, 'pk', None), request.accepted_renderer.format,
+            *self.get_etag_parts(), sorted(row.items()),
+        )
+        single_object = getattr(self, 'action', None) == 'retrieve'
+        return etag, (int(last_modified.timestamp()) if single_object and last_modified else None)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_etag = self.conditional_last_modified = None
+        if self.is_conditional(request):
+            self.conditional_etag, self.conditional_last_modified = self.get_validators(request)
+            response = get_conditional_response(
+                request, etag=self.conditional_etag, last_modified=self.conditional_last_modified)
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'conditional_etag', None)
+        if etag and response.status_code in (200, 304):
+            response['ETag'] = etag
+            if self.conditional_last_modified:
+                response['Last-Modified'] = http_date(self.conditional_last_modified)
+            # Always revalidate, but only download again when the validators changed
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,190 @@
+"""
+Tạo preview/variants cho ảnh (dùng chung cho job upload và lệnh regenerate_previews)
+"""
+import hashlib
+import os
+from io import BytesIO
+from typing import BinaryIO, Dict, Iterable, List, Tuple, Union
+
+from PIL import Image
+
+PREVIEW_MAX_SIZE = (700, 700)
+PREVIEW_QUALITY = 70
+
+# format -> (format PIL, đuôi file, tham số save)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'optimize': True, 'progressive': True}),
+}
+
+
+def to_rgb(image: Image.Image) -> Image.Image:
+    """
+    Chuyển về RGB, phần trong suốt đổ lên nền trắng (JPEG không có alpha)
+    """
+    if image.mode in ("RGB", "L"):
+        return image.convert("RGB")
+
+    if image.mode == "P":
+        image = image.convert("RGBA")
+
+    if image.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        mask = image.getchannel("A") if "A" in image.getbands() else None
+        background.paste(image.convert("RGB"), mask=mask)
+        return background
+
+    return image.convert("RGB")
+
+
+def base_name(original_name: str) -> str:
+    return original_name.split('/')[-1].rsplit('.', 1)[0]
+
+
+def preview_name(original_name: str) -> str:
+    return f"{base_name(original_name)}_preview.jpg"
+
+
+def variant_name(original_name: str, width: int, image_format: str) -> str:
+    return f"{base_name(original_name)}_{width}w.{VARIANT_FORMATS[image_format][1]}"
+
+
+def check_pixels(img: Image.Image) -> None:
+    """
+    Từ chối ảnh vượt Image.MAX_IMAGE_PIXELS trước khi decode. PIL chỉ cảnh báo (tới 2 lần giới hạn),
+    còn warnings.catch_warnings không an toàn khi nhiều thread cùng xử lý ảnh nên kiểm tra trực tiếp
+    """
+    width, height = img.size
+    if Image.MAX_IMAGE_PIXELS and width * height > Image.MAX_IMAGE_PIXELS:
+        raise Image.DecompressionBombError(
+            f"Image size ({width * height} pixels) exceeds limit of {Image.MAX_IMAGE_PIXELS} pixels"
+        )
+
+
+def load_image(source: Union[str, BinaryIO], min_size: Tuple[int, int]) -> Image.Image:
+    """
+    Decode ảnh về RGB, tối thiểu min_size nếu ảnh gốc đủ lớn.
+    JPEG: draft() cho decoder thu nhỏ 1/2, 1/4, 1/8 ngay khi decode
+    """
+    with Image.open(source) as img:
+        check_pixels(img)
+        img.draft("RGB", min_size)
+        return to_rgb(img)
+
+
+def read_image_header(source: Union[str, BinaryIO]) -> Tuple[str, Tuple[int, int]]:
+    """
+    (format, (width, height)) chỉ từ header, không decode pixel
+    """
+    with Image.open(source) as img:
+        check_pixels(img)
+        return img.format, img.size
+
+
+def encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    pil_format, _, options = VARIANT_FORMATS[image_format]
+    output = BytesIO()
+    image.save(output, format=pil_format, quality=quality, **options)
+    return output.getvalue()
+
+
+def resize_preview(image: Image.Image, max_size: Tuple[int, int] = PREVIEW_MAX_SIZE,
+                   quality: int = PREVIEW_QUALITY) -> bytes:
+    preview = image.copy()
+    preview.thumbnail(max_size, Image.Resampling.LANCZOS)
+    return encode(preview, 'jpeg', quality)
+
+
+def render_preview(source: Union[str, BinaryIO], max_size: Tuple[int, int] = PREVIEW_MAX_SIZE,
+                   quality: int = PREVIEW_QUALITY) -> bytes:
+    """
+    Preview JPEG vừa khung max_size
+    """
+    return resize_preview(load_image(source, max_size), max_size, quality)
+
+
+def variant_widths(original_width: int, widths: Iterable[int]) -> List[int]:
+    """
+    Các chiều rộng không phóng to ảnh; ảnh gốc hẹp hơn width lớn nhất thì thêm chính width gốc
+    """
+    widths = list(widths)
+    fitting = {width for width in widths if width <= original_width}
+    if original_width < max(widths):
+        fitting.add(original_width)
+    return sorted(fitting)
+
+
+def render_variants(image: Image.Image, widths: Iterable[int], formats: Iterable[str],
+                    quality: int) -> List[Dict]:
+    """
+    Resize theo từng width (lớn trước, bước sau resize từ bước trước) và encode mỗi format.
+    Trả list dict width/height/format/bytes/content
+    """
+    variants = []
+    current = image
+    for width in sorted(variant_widths(image.width, widths), reverse=True):
+        if width != current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.Resampling.LANCZOS)
+        for image_format in formats:
+            content = encode(current, image_format, quality)
+            variants.append({
+                'width': current.width,
+                'height': current.height,
+                'format': image_format,
+                'bytes': len(content),
+                'content': content,
+            })
+    return sorted(variants, key=lambda variant: (variant['format'], variant['width']))
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as output:
+        output.write(content)
+    os.replace(tmp_path, path)
+
+
+def regenerate_derivatives(job: Dict) -> Dict:
+    """
+    Worker của process pool: ghi preview (và variants nếu có widths) cho 1 ảnh.
+    Chỉ làm việc với file, không cần setup Django
+    """
+    if job.get('max_pixels'):
+        Image.MAX_IMAGE_PIXELS = job['max_pixels']
+    media_root = job['media_root']
+    name = job['name']
+    source_path = os.path.join(media_root, name)
+    result = {'name': name, 'status': 'generated', 'bytes_read': os.path.getsize(source_path)}
+    try:
+        if job.get('check_hash'):
+            result['sha256'] = file_sha256(source_path)
+            if result['sha256'] == job.get('known_sha256'):
+                result['status'] = 'skipped'
+                return result
+
+        max_size = tuple(job['max_size'])
+        widths = list(job.get('widths') or [])
+        image = load_image(source_path, (max(widths + [max_size[0]]), max_size[1]))
+
+        variants = []
+        for variant in render_variants(image, widths, job['formats'], job['variant_quality']) if widths else []:
+            path = f"images/variants/{variant_name(name, variant['width'], variant['format'])}"
+            _write_atomic(os.path.join(media_root, path), variant.pop('content'))
+            variants.append({**variant, 'path': path})
+
+        # Ghi cuối cùng: preview mới hơn ảnh gốc nghĩa là mọi file của lần chạy đã xong
+        preview_path = f"images/preview/{preview_name(name)}"
+        _write_atomic(os.path.join(media_root, preview_path), resize_preview(image, max_size, job['quality']))
+        result.update({'preview': preview_path, 'variants': variants, 'size': list(image.size)})
+    except Exception as exc:
+        result.update({'status': 'failed', 'error': f"{type(exc).__name__}: {exc}"})
+    return result
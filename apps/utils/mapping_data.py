@@ -1,3 +1,4 @@
+from apps.utils.enum_type import StatusPreviewEnum
 
 class MappingData:
     def __init__(self, obj_images = None, obj_centers = None, obj_fields = None):
@@ -5,15 +6,42 @@ class MappingData:
         self.obj_centers = obj_centers
         self.obj_fields = obj_fields
 
+    @staticmethod
+    def image_info(img):
+        # Preview chưa sẵn sàng (PENDING/FAILED) thì trả file gốc làm placeholder
+        preview_ready = img.get('preview_status', StatusPreviewEnum.READY) == StatusPreviewEnum.READY
+        return {
+            'id': img['id'],
+            'preview': img['preview'] if preview_ready and img['preview'] else img['file'],
+            'preview_status': img.get('preview_status', StatusPreviewEnum.READY.value),
+            'file': img['file'],
+            **MappingData.image_sources(img.get('variants') or []),
+        }
+
+    @staticmethod
+    def image_sources(variants):
+        """
+        Nhóm variant theo định dạng (nhỏ -> lớn) và build chuỗi srcset để client chọn ảnh nhỏ nhất vừa khung:
+        {"sources": {"webp": [{"path", "width", "height", "bytes"}, ...]}, "srcset": {"webp": "a_160w.webp 160w, ..."}}
+        """
+        sources = {}
+        for variant in sorted(variants, key=lambda item: item['width']):
+            sources.setdefault(variant['format'], []).append({
+                'path': variant['path'],
+                'width': variant['width'],
+                'height': variant['height'],
+                'bytes': variant['bytes'],
+            })
+        srcset = {
+            image_format: ', '.join(f"{item['path']} {item['width']}w" for item in items)
+            for image_format, items in sources.items()
+        }
+        return {'sources': sources, 'srcset': srcset}
+
     def mapping_img(self):
         image_map = {}
         for img in self.obj_images:
-            image_info = {
-                'id': img['id'],
-                'preview': img['preview'],
-                'file': img['file']
-            }
-            image_map.setdefault(img['object_id'], []).append(image_info)
+            image_map.setdefault(img['object_id'], []).append(self.image_info(img))
         return image_map
 
 
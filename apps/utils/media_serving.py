@@ -0,0 +1,163 @@
+"""
+Phục vụ /media/: ETag/Last-Modified, Cache-Control dài hạn, Range và chuyển cho web server gửi file.
+Thay cho django.conf.urls.static.static (không header cache, tắt khi DEBUG=False)
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# Chỉ file gốc images/<sha256>.<ext> (ImageBlob) không bao giờ đổi nội dung;
+# preview/variants giữ tên khi được tạo lại (regenerate_previews) nên không immutable
+IMMUTABLE_NAME_RE = re.compile(r'^images/[0-9a-f]{64}\.\w+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class BoundedFile:
+    """
+    Đọc tối đa length byte từ vị trí hiện tại của file. Giữ fileno()/tell() để
+    wsgi.file_wrapper (gunicorn, uWSGI) vẫn gửi bằng sendfile()
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def make_etag(stat_result):
+    # File được thay nguyên khối (os.replace / tên mới) nên mtime + size xác định nội dung
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def cache_control(path):
+    if IMMUTABLE_NAME_RE.match(path):
+        return f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def parse_range(header, size):
+    """
+    (start, end) của 1 range `bytes=`; None = trả cả file; ValueError nếu range không hợp lệ (416)
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        # Nhiều range / đơn vị khác: trả cả file
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Range hậu tố: N byte cuối
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def range_applies(request, etag, last_modified):
+    """
+    If-Range: chỉ áp dụng Range khi bản client đang giữ vẫn là bản hiện tại
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def offload_response(path, full_path, content_type):
+    """
+    Để web server gửi nội dung file (nginx X-Accel-Redirect, Apache/lighttpd X-Sendfile),
+    conditional request và Range do web server xử lý
+    """
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE_BACKEND == 'nginx':
+        response['X-Accel-Redirect'] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{path}"
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def serve_media(request, path):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, ValueError, OSError):
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+
+    etag = make_etag(stat_result)
+    last_modified = int(stat_result.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        response = build_file_response(request, path, full_path, stat_result.st_size, content_type,
+                                       etag, last_modified)
+    for header, value in headers.items():
+        response.headers.setdefault(header, value)
+    return response
+
+
+def build_file_response(request, path, full_path, size, content_type, etag, last_modified):
+    if settings.MEDIA_SENDFILE_BACKEND:
+        return offload_response(path, full_path, content_type)
+
+    byte_range = None
+    if request.method == 'GET' and range_applies(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        # File có fileno(): gửi qua wsgi.file_wrapper / sendfile nếu server hỗ trợ
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(BoundedFile(file, end - start + 1), content_type=content_type, status=206)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    return response
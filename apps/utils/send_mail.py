@@ -1,11 +1,9 @@
 import random
 from datetime import timedelta
 
-from django.conf import settings
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.utils.html import strip_tags
 
+from apps.user.tasks import send_html_mail
 from apps.utils.enum_type import TypeEmailEnum
 
 
@@ -48,11 +46,5 @@ def sent_mail_verification(user, type_mail):
     elif type_mail == TypeEmailEnum.RESET_PASSWORD:
         message = TemplateMail.CONTENT_MAIL_VERIFICATION(user.full_name, verify_code)
         template_mail = TemplateMail.SUBJECT_MAIL_VERIFICATION
-    send_mail(
-        template_mail,
-        strip_tags(message),
-        settings.EMAIL_HOST_USER,
-        [user.email],
-        fail_silently=False,
-        html_message=message
-    )
+    # Gửi SMTP ở hàng đợi nền để request không phải chờ mail server
+    return send_html_mail.enqueue(args=(template_mail, message, [user.email]), user=user)
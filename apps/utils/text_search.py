@@ -0,0 +1,59 @@
+"""
+Accent-folded text normalization and trigram scoring for search columns.
+
+`fold_text` is applied both when a row is saved (search_* columns) and to the user's query,
+so "Sân Bóng Đá Quận 1" and "san bong da quan 1" compare equal. Trigram scoring mirrors
+pg_trgm's word similarity closely enough to rank the SQLite FTS5 candidates the same way.
+"""
+import re
+import unicodedata
+
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def fold_text(value) -> str:
+    """
+    Lowercase, strip Vietnamese diacritics (đ -> d) and punctuation, collapse whitespace
+    """
+    text = unicodedata.normalize('NFD', str(value or '')).replace('đ', 'd').replace('Đ', 'D')
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn').lower()
+    return ' '.join(_NON_WORD_RE.sub(' ', text).replace('_', ' ').split())
+
+
+def trigrams(text: str) -> set:
+    """
+    3-character windows of already folded text (same tokens as the FTS5 trigram tokenizer)
+    """
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def word_similarity(query: str, text: str) -> float:
+    """
+    Share of the query's trigrams found in text (0..1); 1.0 when the query is a substring
+    """
+    if not query:
+        return 0.0
+    if query in text:
+        return 1.0
+    query_grams = trigrams(query)
+    if not query_grams:
+        return 0.0
+    return len(query_grams & trigrams(text)) / len(query_grams)
+
+
+def find_last_phrase(text: str, phrases):
+    """
+    The phrase (already folded) occurring last as whole words in folded text, ties going to the
+    longer phrase; None when none occurs. Vietnamese addresses run from specific to general,
+    so the last place name is the most reliable one ("12 Ngu Hanh Son, Son Tra" -> "son tra")
+    """
+    padded = f" {text} "
+    best, best_key = None, None
+    for phrase in phrases:
+        position = padded.rfind(f" {phrase} ")
+        if position < 0:
+            continue
+        key = (position + len(phrase), len(phrase))
+        if best_key is None or key > best_key:
+            best, best_key = phrase, key
+    return best
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+
+class UploadTooLargeError(MultiPartParserError):
+    pass
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Ghi file upload ra file tạm theo từng chunk, dừng đọc ngay khi 1 file vượt UPLOAD_MAX_FILE_SIZE
+    hoặc cả request vượt UPLOAD_MAX_REQUEST_SIZE (DRF trả 400)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request_bytes = 0
+        self.file_bytes = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Từ chối theo header Content-Length trước khi đọc body
+        if content_length and content_length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            raise UploadTooLargeError(
+                f"Request body exceeds {settings.UPLOAD_MAX_REQUEST_SIZE} bytes"
+            )
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file_bytes = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file_bytes += len(raw_data)
+        self.request_bytes += len(raw_data)
+        if self.file_bytes > settings.UPLOAD_MAX_FILE_SIZE:
+            self.file.close()
+            raise UploadTooLargeError(f"File '{self.file_name}' exceeds {settings.UPLOAD_MAX_FILE_SIZE} bytes")
+        if self.request_bytes > settings.UPLOAD_MAX_REQUEST_SIZE:
+            self.file.close()
+            raise UploadTooLargeError(f"Uploaded files exceed {settings.UPLOAD_MAX_REQUEST_SIZE} bytes")
+        return super().receive_data_chunk(raw_data, start)
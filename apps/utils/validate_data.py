@@ -1,6 +1,8 @@
+from django.conf import settings
 from apps.user.models import User
 from rest_framework import serializers
 from apps.utils.constant_status import AppStatus
+from apps.utils.image_processing import read_image_header
 
 
 def validate_create_user(validated_data):
@@ -10,3 +12,22 @@ def validate_create_user(validated_data):
     user = User.objects.filter(email=validated_data["email"]).first()
     if user:
         raise serializers.ValidationError(AppStatus.EMAIL_ALREADY_EXIST.message)
+
+
+def validate_image_uploads(images):
+    """
+    Kiểm tra ảnh upload chỉ bằng header (không decode pixel): dung lượng, định dạng, kích thước
+    """
+    for image in images:
+        if image.size > settings.UPLOAD_MAX_FILE_SIZE:
+            raise serializers.ValidationError(AppStatus.IMAGE_FILE_TOO_LARGE.message)
+        try:
+            image_format, (width, height) = read_image_header(image)
+        except Exception:
+            raise serializers.ValidationError(AppStatus.INVALID_IMAGE_FILE.message)
+        finally:
+            image.seek(0)
+        if image_format not in settings.IMAGE_ALLOWED_FORMATS:
+            raise serializers.ValidationError(AppStatus.INVALID_IMAGE_FORMAT.message)
+        if width * height > settings.IMAGE_MAX_PIXELS or max(width, height) > settings.IMAGE_MAX_SIDE:
+            raise serializers.ValidationError(AppStatus.IMAGE_DIMENSIONS_TOO_LARGE.message)
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     'apps.sport_center',
     'apps.booking',
     'apps.chat',
+    'apps.jobs',
     'apps.fake_data',
 ]
 
@@ -130,6 +131,28 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hash mật khẩu: 'pbkdf2' (mặc định) hoặc 'argon2' (cần extra argon2: `poetry install -E argon2`).
+# Hasher đứng đầu dùng cho hash mới; hash cũ (thuật toán/tham số khác) được hash lại khi user đăng nhập
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+# Mặc định theo khuyến nghị OWASP cho argon2id: 19 MiB, 2 vòng, 1 luồng
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1))
+TUNED_PASSWORD_HASHERS = {
+    'pbkdf2': 'apps.user.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'apps.user.hashers.TunedArgon2PasswordHasher',
+}
+# Hasher đã chọn đứng đầu, sau đó các hasher mặc định còn lại của Django để hash cũ vẫn kiểm tra được
+# (và được nâng cấp khi đăng nhập). Không thêm PBKDF2PasswordHasher/Argon2PasswordHasher gốc:
+# cùng tên thuật toán với bản tuned và sẽ thay bản tuned khi Django tra hasher theo thuật toán
+PASSWORD_HASHERS = [
+    TUNED_PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in TUNED_PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -150,6 +173,37 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Phục vụ media: ''  = Django gửi file (FileResponse/sendfile), 'nginx' = X-Accel-Redirect, 'apache' = X-Sendfile
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND', '')
+# Location internal của nginx trỏ tới MEDIA_ROOT (chỉ dùng với backend 'nginx')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Cache-Control: file gốc đặt tên theo sha256 (ImageBlob) không đổi nội dung -> immutable
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+MEDIA_IMMUTABLE_MAX_AGE = int(os.environ.get('MEDIA_IMMUTABLE_MAX_AGE', 365 * 24 * 3600))
+# Upload: luôn ghi ra file tạm theo chunk, giới hạn dung lượng mỗi file / mỗi request
+FILE_UPLOAD_HANDLERS = ['apps.utils.upload_handlers.BoundedTemporaryFileUploadHandler']
+UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', 10 * 1024 * 1024))
+UPLOAD_MAX_REQUEST_SIZE = int(os.environ.get('UPLOAD_MAX_REQUEST_SIZE', 50 * 1024 * 1024))
+# Kiểm tra header ảnh trước khi decode (định dạng, kích thước); cũng là Image.MAX_IMAGE_PIXELS của PIL
+IMAGE_ALLOWED_FORMATS = os.environ.get('IMAGE_ALLOWED_FORMATS', 'JPEG,PNG,WEBP').split(',')
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 40_000_000))
+IMAGE_MAX_SIDE = int(os.environ.get('IMAGE_MAX_SIDE', 12000))
+# Preview ảnh upload (tạo ở hàng đợi job nền, queue 'images')
+IMAGE_PREVIEW_MAX_SIZE = int(os.environ.get('IMAGE_PREVIEW_MAX_SIZE', 700))
+IMAGE_PREVIEW_QUALITY = int(os.environ.get('IMAGE_PREVIEW_QUALITY', 70))
+# Các variant responsive (chiều rộng px, định dạng) tạo cùng job preview
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.environ.get('IMAGE_VARIANT_WIDTHS', '160,400,800,1600').split(',')]
+IMAGE_VARIANT_FORMATS = os.environ.get('IMAGE_VARIANT_FORMATS', 'webp,jpeg').split(',')
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 75))
+
+# Tìm kiếm trung tâm/sân (bỏ dấu, gần đúng): ngưỡng tương đồng trigram (cả 2 backend) và số ứng viên FTS5 tối đa sau khi lọc (SQLite)
+SEARCH_MIN_SIMILARITY = float(os.environ.get('SEARCH_MIN_SIMILARITY', 0.6))
+SEARCH_MAX_CANDIDATES = int(os.environ.get('SEARCH_MAX_CANDIDATES', 500))
+# Gazetteer (CSV name,latitude,longitude) dùng để geocode địa chỉ trung tâm chưa có tọa độ
+SPORT_CENTER_GAZETTEER = os.environ.get(
+    'SPORT_CENTER_GAZETTEER', str(BASE_DIR / 'apps' / 'sport_center' / 'data' / 'da_nang_districts.csv'))
+# Bán kính tối đa (km) của API tìm trung tâm gần nhất
+NEARBY_MAX_RADIUS_KM = float(os.environ.get('NEARBY_MAX_RADIUS_KM', 50))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -198,6 +252,17 @@ JWT_COOKIE_SAMESITE = 'Lax'  # CSRF protection
 JWT_COOKIE_DOMAIN = os.environ.get('JWT_COOKIE_DOMAIN', None)  # Set domain in production
 JWT_COOKIE_PATH = '/'  # Cookie path
 JWT_AUTO_REFRESH = True  # Automatically refresh access token if it's about to expire
+# Kiểm tra quyền từ claim role/is_active/is_delete của access token, không query User mỗi request.
+# Claim chỉ cập nhật khi refresh token -> nên dùng cùng ACCESS_TOKEN_LIFETIME ngắn
+AUTH_TOKEN_USER_CLAIMS = os.environ.get('AUTH_TOKEN_USER_CLAIMS', 'False').lower() == 'true'
+# Token thu hồi (logout): mỗi process nạp JTI vào bloom filter + set, đọc thêm row mới mỗi REFRESH giây,
+# dựng lại (bỏ token đã hết hạn) mỗi REBUILD giây
+TOKEN_REVOCATION_REFRESH = float(os.environ.get('TOKEN_REVOCATION_REFRESH', 30))
+TOKEN_REVOCATION_REBUILD = float(os.environ.get('TOKEN_REVOCATION_REBUILD', 3600))
+# Mỗi lần refresh đọc lại các row tạo trong MARGIN giây trước lần đọc trước: row ghi trong transaction
+# commit chậm (hoặc lệch giờ giữa các server) vẫn được nạp
+TOKEN_REVOCATION_REFRESH_MARGIN = float(os.environ.get('TOKEN_REVOCATION_REFRESH_MARGIN', 300))
+TOKEN_REVOCATION_ERROR_RATE = float(os.environ.get('TOKEN_REVOCATION_ERROR_RATE', 0.001))
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_USE_TLS = True
@@ -210,13 +275,73 @@ EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 578))
 FPT_API_KEY = os.environ.get('FPT_API_KEY')
 FPT_URL_API = os.environ.get('FPT_URL_API')
 FPT_MODEL_NAME = os.environ.get('FPT_MODEL_NAME')
+# Timeout (giây), connection pool keep-alive và retry khi gọi LLM
+FPT_CONNECT_TIMEOUT = float(os.environ.get('FPT_CONNECT_TIMEOUT', 3))
+FPT_READ_TIMEOUT = float(os.environ.get('FPT_READ_TIMEOUT', 30))
+FPT_POOL_MAX_CONNECTIONS = int(os.environ.get('FPT_POOL_MAX_CONNECTIONS', 20))
+FPT_POOL_MAX_KEEPALIVE = int(os.environ.get('FPT_POOL_MAX_KEEPALIVE', 10))
+FPT_POOL_KEEPALIVE_EXPIRY = float(os.environ.get('FPT_POOL_KEEPALIVE_EXPIRY', 30))
+FPT_MAX_RETRIES = int(os.environ.get('FPT_MAX_RETRIES', 2))
+FPT_RETRY_BACKOFF = float(os.environ.get('FPT_RETRY_BACKOFF', 0.5))
+FPT_RETRY_BACKOFF_MAX = float(os.environ.get('FPT_RETRY_BACKOFF_MAX', 4))
+# Circuit breaker: mở sau N lỗi liên tiếp, thử lại sau RESET_SECONDS giây
+CHAT_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CHAT_BREAKER_FAILURE_THRESHOLD', 5))
+CHAT_BREAKER_RESET_SECONDS = float(os.environ.get('CHAT_BREAKER_RESET_SECONDS', 30))
 CHAT_LIMIT_PER_MINUTE = int(os.environ.get('CHAT_LIMIT_PER_MINUTE', 20))
 
+# Cache câu trả lời chatbot (exact match + so khớp n-gram). Threshold >= 1 để tắt tầng so khớp gần đúng
+CHAT_CACHE_ENABLED = os.environ.get('CHAT_CACHE_ENABLED', 'True').lower() == 'true'
+CHAT_CACHE_ALIAS = os.environ.get('CHAT_CACHE_ALIAS', 'default')
+CHAT_CACHE_TTL = int(os.environ.get('CHAT_CACHE_TTL', 600))
+CHAT_CACHE_INDEX_SIZE = int(os.environ.get('CHAT_CACHE_INDEX_SIZE', 200))
+CHAT_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get('CHAT_CACHE_SIMILARITY_THRESHOLD', 0.85))
+# Ghi messages của lượt chat ở hàng đợi nền sau khi trả response
+CHAT_DEFER_PERSIST = os.environ.get('CHAT_DEFER_PERSIST', 'False').lower() == 'true'
+
+# Hàng đợi job nền: 'database' (worker `python manage.py run_jobs`), 'immediate' (chạy ngay sau commit) hoặc 'celery'
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'database')
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_BACKOFF = float(os.environ.get('JOB_RETRY_BACKOFF', 5))
+JOB_RETRY_BACKOFF_MAX = float(os.environ.get('JOB_RETRY_BACKOFF_MAX', 600))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+# Job RUNNING quá số giây này (worker chết) sẽ được trả lại hàng đợi
+JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', 900))
+
+# Cache dùng chung giữa các process (throttle, cache user...): Redis nếu có REDIS_URL, không thì bộ nhớ process.
+# 'local' là bộ nhớ process, dùng khi Redis lỗi
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'sport_dh',
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sport_dh-default',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sport_dh-local',
+    },
+}
+# Cache id/role/is_active/is_delete của user đã xác thực (giây, 0 = tắt); bị xóa khi User lưu/xóa.
+# Mặc định chỉ bật khi có Redis: cache bộ nhớ process không nhận được lệnh xóa từ process khác
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60 if REDIS_URL else 0))
+
 REST_FRAMEWORK = {
+    # Giới hạn tần suất theo cửa sổ trượt (apps.depends.throttling), dạng "<số request>/<second|minute|hour|day>"
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('THROTTLE_LOGIN_IP', '20/minute'),
+        'login_user': os.environ.get('THROTTLE_LOGIN_USER', '5/minute'),
+        'register': os.environ.get('THROTTLE_REGISTER', '10/hour'),
+        'verify_code': os.environ.get('THROTTLE_VERIFY_CODE', '10/minute'),
+        'booking_write': os.environ.get('THROTTLE_BOOKING_WRITE', '30/minute'),
+        'chat': f'{CHAT_LIMIT_PER_MINUTE}/minute',
+    },
     'DEFAULT_AUTHENTICATION_CLASSES': (
         # 'rest_framework.authentication.BasicAuthentication',
         'apps.depends.cookie_jwt_auth.CookieJWTAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # Fallback for API requests
+        'apps.depends.cookie_jwt_auth.HeaderJWTAuthentication',  # Fallback for API requests
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -15,13 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.conf.urls.static import static
 from django.urls import path, include
 from drf_yasg import openapi
 
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from apps.utils.media_serving import serve_media
+
 from sport_dh import settings
 
 schema_view = get_schema_view(
@@ -47,5 +48,6 @@ urlpatterns = [
          name='schema-yaml'),
 ]
 
-# Serve media files (user-uploaded) in development
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Serve media files (user-uploaded): ETag/Last-Modified, Cache-Control, Range, X-Accel-Redirect/X-Sendfile
+if not settings.MEDIA_URL.startswith(('http://', 'https://', '//')):
+    urlpatterns += [path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name='media')]
@@ -12,5 +12,6 @@ urlpatterns = [
     path('', include('apps.sport_center.urls')),
     path('', include('apps.booking.urls')),
     path('', include('apps.chat.urls')),
+    path('', include('apps.jobs.urls')),
     path('fake_data/', include('apps.fake_data.urls')),
 ]
\ No newline at end of file